@@ -0,0 +1,100 @@
+"""
+answer_cache.py — Semantic cache for generated answers
+
+A new question is served from the cache when its embedding is close enough
+(cosine similarity >= threshold) to a question already answered against the
+same corpus version. The corpus version is a fingerprint of the indexed
+articles in scope, so re-ingesting or changing articles invalidates entries
+automatically. Entries are persisted in SQLite and evicted LRU.
+"""
+
+import hashlib
+import json
+import time
+
+import numpy as np
+
+from article_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    corpus TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    first_doc TEXT,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_corpus ON answers (corpus);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+"""
+
+
+def corpus_fingerprint(entries, salt=""):
+    """
+    Fingerprint of a corpus given (pmid, content hash) pairs.
+    """
+    digest = hashlib.sha1(salt.encode("utf-8"))
+    for pmid, article_hash in sorted(entries):
+        digest.update(f"{pmid}:{article_hash};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SemanticAnswerCache(SQLiteStore):
+    schema = SCHEMA
+
+    def __init__(self, path, threshold=0.95, max_entries=1000):
+        super().__init__(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, query_embedding, corpus):
+        """
+        Returns the closest cached answer for this corpus above the threshold
+        as a dict with answer, sources and first_doc, or None.
+        """
+        rows = self._connect().execute(
+            "SELECT id, embedding FROM answers WHERE corpus = ?", (corpus,)
+        ).fetchall()
+        if rows:
+            matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+            query = np.asarray(query_embedding, dtype=np.float32)
+            similarities = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                entry_id = rows[best][0]
+                with self._transaction() as conn:
+                    conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), entry_id))
+                    answer, sources, first_doc = conn.execute(
+                        "SELECT answer, sources, first_doc FROM answers WHERE id = ?", (entry_id,)
+                    ).fetchone()
+                self.hits += 1
+                return {"answer": answer, "sources": json.loads(sources), "first_doc": first_doc}
+        self.misses += 1
+        return None
+
+    def put(self, query, query_embedding, corpus, answer, sources, first_doc):
+        embedding = np.asarray(query_embedding, dtype=np.float32).tobytes()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO answers (corpus, query, embedding, answer, sources, first_doc, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (corpus, query, embedding, answer, json.dumps(sources), first_doc, time.time())
+            )
+            conn.execute(
+                "DELETE FROM answers WHERE id IN "
+                "(SELECT id FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,76 @@
+"""
+answer_stream.py — Incremental LLM answers
+
+The QA prompt asks the model for "FINAL ANSWER: ... SOURCES: ...". The
+sources line is redundant with the retrieved documents' metadata, so
+AnswerStream forwards answer tokens as they arrive, stops at the sources
+marker and exposes the answer, sources and timing once exhausted.
+"""
+
+import re
+import time
+
+# Same markers RetrievalQAWithSourcesChain splits the answer on
+SOURCES_MARKER = re.compile(r"SOURCES?:|QUESTION:\s", re.IGNORECASE)
+# Longest marker; text this close to the end may be the start of one
+MARKER_HOLDBACK = len("QUESTION: ")
+
+
+def strip_sources(text):
+    """
+    The answer part of a complete "... SOURCES: ..." LLM response.
+    """
+    match = SOURCES_MARKER.search(text)
+    return text[:match.start()] if match else text
+
+
+class AnswerStream:
+    """
+    Iterable of answer text chunks.
+
+    After iteration `answer`, `sources` and `first_doc` hold the same values
+    `generate_answer` returns, `ttft` the seconds from the request to the
+    first chunk and `total_time` the seconds to the last one.
+    """
+
+    def __init__(self, chunks, sources, first_doc, started=None, on_complete=None):
+        self._chunks = chunks
+        self.sources = sources
+        self.first_doc = first_doc
+        self.started = started if started is not None else time.perf_counter()
+        self.on_complete = on_complete
+        self.answer = None
+        self.ttft = None
+        self.total_time = None
+
+    def __iter__(self):
+        parts = []
+        pending = ""
+        for chunk in self._chunks:
+            pending += chunk
+            match = SOURCES_MARKER.search(pending)
+            if match:
+                pending = pending[:match.start()]
+                break
+            if len(pending) > MARKER_HOLDBACK:
+                text, pending = pending[:-MARKER_HOLDBACK], pending[-MARKER_HOLDBACK:]
+                parts.append(text)
+                yield self._emit(text)
+        if pending:
+            parts.append(pending)
+            yield self._emit(pending)
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()  # stop generating once the sources line starts
+
+        self.answer = "".join(parts)
+        self.total_time = time.perf_counter() - self.started
+        if self.ttft is None:
+            self.ttft = self.total_time
+        if self.on_complete is not None:
+            self.on_complete(self)
+
+    def _emit(self, text):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+        return text
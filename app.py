@@ -1,8 +1,12 @@
 import streamlit as st
-import time
 import re
+import uuid
+from contextlib import closing
+from jobs import CANCELLED, DONE, JobManager
 from pubmed import PubMedRetriever
-from pubmed_vectorstore import process_pubmed_articles, generate_answer
+from pubmed_vectorstore import (
+    WARM_UP, namespaces, process_pubmed_articles, stream_answer, warm_up
+)
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(
@@ -11,6 +15,152 @@ st.set_page_config(
     layout="wide"
 )
 
+
+# -------------------- SHARED COMPONENTS --------------------
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Loads the LLM client, embedding model and Chroma once per server process
+    in a background thread; all sessions and reruns share them.
+    """
+    return warm_up()
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager():
+    """
+    Runs fetching, ingestion and answering outside the script run, shared by
+    all sessions: reruns poll jobs instead of repeating the work. Ingestions
+    run one at a time (pubmed_vectorstore's ingestion lock), so they get a
+    pool of their own and never hold up answers.
+    """
+    return JobManager(max_workers=4, pools={"ingest": 2})
+
+
+if WARM_UP:
+    start_warm_up()
+job_manager = get_job_manager()
+
+
+# -------------------- BACKGROUND JOBS --------------------
+def ingest_job(job, query=None, pmids=None):
+    """
+    Fetches the given PMIDs (or searches PubMed for the query) and ingests
+    the articles into a namespace of the job's own, which every session
+    waiting for the job then retrieves from (see use_namespace). Returns
+    that namespace.
+    """
+    job_namespace = f"job-{uuid.uuid4().hex}"
+    if pmids is not None:
+        job.report(f"📄 Fetching {len(pmids)} article abstracts...", 0.05)
+        articles = PubMedRetriever.fetch_pubmed_abstracts(pmids)
+    else:
+        # Pages are embedded while later ones are still downloading
+        job.report("🔎 Searching PubMed and processing relevant articles...", 0.05)
+        articles = PubMedRetriever.stream_pubmed_abstracts(query, max_results=100)
+    # closing() releases the ingestion lock right away if the job is cancelled
+    with closing(process_pubmed_articles(articles, namespace=job_namespace)) as messages:
+        for i, msg in enumerate(messages):
+            job.report(msg, min(0.95, 0.1 + i * 0.05))
+    return job_namespace
+
+
+def answer_job(job, query, namespace):
+    answer = stream_answer(query, namespace=namespace)
+    for text in answer:
+        job.report(partial=text)
+    return {"answer": answer.answer, "sources": answer.sources, "ttft": answer.ttft}
+
+
+def answer_job_key(query, namespace):
+    # Sessions asking the same question about the same articles share one answer
+    scope = namespaces.get(namespace)
+    return "answer", query, scope["corpus"] if scope else namespace
+
+
+@st.fragment(run_every=0.3)
+def job_progress(key):
+    """
+    Polls a job; reruns the whole script once it has finished.
+    """
+    job = job_manager.get(key)
+    if job is None or job.finished:
+        st.rerun()
+    if job.partial:
+        st.markdown(job.partial)
+    else:
+        st.progress(job.progress, text=job.messages[-1] if job.messages else job.description)
+    if st.button("✖️ Cancel", key=f"cancel-{key}"):
+        # Keeps running if another session is still waiting for it
+        job_manager.cancel(key, subscriber=session_id)
+        st.session_state["processing"] = False
+        st.session_state["auto_fetch_confirmed"] = False
+        st.rerun()
+
+
+def wait_for(job):
+    """
+    Returns the job once it has finished; until then shows its progress and
+    ends this script run (the fragment reruns it when the job is done).
+    """
+    if not job.finished:
+        job_progress(job.key)
+        st.stop()
+    if job.status != DONE:
+        if job.status == CANCELLED:
+            st.info("Cancelled.")
+        else:
+            st.error(f"❌ {job.error}")
+        st.session_state["processing"] = False
+        st.session_state["auto_fetch_confirmed"] = False
+        st.stop()
+    return job
+
+
+def use_namespace(job):
+    """
+    Points this session at the articles of a finished ingestion job. Sessions
+    waiting for the same job share its namespace instead of copying it, so
+    the registry holds one entry per ingestion. Returns False when it was
+    evicted in the meantime; the job is then forgotten, so submitting it
+    again re-ingests instead of returning the same finished job.
+    """
+    if namespaces.get(job.result) is None:
+        job_manager.forget(job.key)
+        return False
+    st.session_state["namespace"] = job.result
+    return True
+
+
+def show_answer(query):
+    """
+    Answers the query in the background and renders the answer as it
+    streams in, then its sources.
+    """
+    namespace = st.session_state["namespace"]
+    if namespaces.get(namespace) is None:
+        # Evicted while idle: ingest again rather than answer from other sessions' articles
+        st.error("❌ The articles of this session were evicted. Click **Search & Generate Answer** "
+                 "to fetch them again.")
+        st.session_state["urls_processed"] = False
+        st.session_state["processing"] = False
+        st.session_state["cache_reuse_confirmed"] = False
+        st.stop()
+
+    st.markdown("### 🧠 Answer")
+    job = job_manager.submit(
+        answer_job_key(query, namespace), answer_job, query, namespace,
+        subscriber=session_id, description="🧩 Generating answer..."
+    )
+    result = wait_for(job).result
+    st.markdown(result["answer"])
+    st.caption(f"⏱️ First token after {result['ttft']:.2f}s")
+
+    st.success("✅ Done!")
+    st.markdown("#### 🔗 Sources")
+    for src in sorted(set(result["sources"])):
+        st.write(f"- {src}")
+
 st.title("🧠 MediAssist AI — PubMed Research Assistant")
 st.markdown("""
 Welcome to **MediAssist**, a biomedical RAG system specialized in **Intermittent Fasting (IF)** as a treatment approach for **obesity**, 
@@ -42,6 +192,12 @@ if "cache_reuse_confirmed" not in st.session_state:
     st.session_state["cache_reuse_confirmed"] = False
 if "last_query" not in st.session_state:
     st.session_state["last_query"] = None
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+session_id = st.session_state["session_id"]
+if "namespace" not in st.session_state:
+    # Each browser session retrieves only from the articles it ingested
+    st.session_state["namespace"] = None
 
 # --- Ingest Button ---
 if st.sidebar.button("📚 Ingest Documents"):
@@ -65,6 +221,7 @@ if st.sidebar.button("🗑️ Clear Cache & Start Fresh"):
     st.session_state["urls_processed"] = False
     st.session_state["cache_reuse_confirmed"] = False
     st.session_state["last_query"] = None
+    st.session_state["namespace"] = None
     st.sidebar.success("Cache cleared! You can now start fresh.")
 
 st.sidebar.markdown("---")
@@ -136,40 +293,23 @@ if st.session_state.get("processing"):
                 if match:
                     pmids.append(match.group(1))
 
-            progress = st.progress(0)
-            status = st.empty()
-
-            with st.spinner("Fetching and processing your provided articles..."):
-                # Fetch abstracts for the provided PMIDs
-                status.text(f"📄 Fetching {len(pmids)} article abstracts...")
-                articles = PubMedRetriever.fetch_pubmed_abstracts(pmids)
-                progress.progress(40)
-                time.sleep(0.5)
-
-                # Process articles into vector store
-                status.text("⚙️ Processing articles and updating vector store...")
-                for i, msg in enumerate(process_pubmed_articles(articles)):
-                    progress.progress(min(80, 40 + i * 3))
-                    st.text(msg)
-                time.sleep(0.5)
-
-                progress.progress(100)
-                st.session_state["urls_processed"] = True
-
-            status.empty()
-            progress.empty()
+            # Fetch and ingest in the background; identical URL sets share one job
+            job = job_manager.submit(
+                ("urls", tuple(sorted(pmids))), ingest_job, pmids=pmids,
+                subscriber=session_id, description="Fetching and processing your provided articles...",
+                pool="ingest"
+            )
+            if not use_namespace(wait_for(job)):
+                st.error("❌ The ingested articles were evicted; please ingest the URLs again.")
+                st.session_state["processing"] = False
+                st.stop()
+            st.session_state["urls_processed"] = True
+            # The articles belong to this query; reruns while it is answered must not ask again
+            st.session_state["last_query"] = query
             st.success("✅ URLs processed successfully!")
 
-        # Now generate answer using the processed URLs
-        with st.spinner("Generating answer from provided articles..."):
-            answer, sources, _ = generate_answer(query)
-
-        st.success("✅ Done!")
-        st.markdown("### 🧠 Answer")
-        st.write(answer)
-        st.markdown("#### 🔗 Sources")
-        for src in sorted(set(sources)):
-            st.write(f"- {src}")
+        # Now generate answer using the processed URLs, rendered as it streams
+        show_answer(query)
 
         # Update tracking variables
         st.session_state["last_query"] = query
@@ -196,15 +336,7 @@ if st.session_state.get("processing"):
     else:
         # If reusing cache, just generate answer directly
         if st.session_state.get("cache_reuse_confirmed") and st.session_state.get("urls_processed"):
-            with st.spinner("Generating answer from cached data..."):
-                answer, sources, _ = generate_answer(query)
-
-            st.success("✅ Done!")
-            st.markdown("### 🧠 Answer")
-            st.write(answer)
-            st.markdown("#### 🔗 Sources")
-            for src in sorted(set(sources)):
-                st.write(f"- {src}")
+            show_answer(query)
 
             # Update tracking variables
             st.session_state["last_query"] = query
@@ -213,44 +345,22 @@ if st.session_state.get("processing"):
 
         # Otherwise, do auto-fetch
         else:
-            progress = st.progress(0)
-            status = st.empty()
-
-            with st.spinner("Fetching and processing PubMed data..."):
-                # Step 1: Search PMIDs
-                status.text("🔎 Searching PubMed for relevant articles...")
-                pmids = PubMedRetriever.search_pubmed_articles(query, max_results=100)
-                progress.progress(20)
-                time.sleep(0.5)
-
-                # Step 2: Fetch abstracts
-                status.text(f"📄 Fetching {len(pmids)} article abstracts...")
-                articles = PubMedRetriever.fetch_pubmed_abstracts(pmids)
-                progress.progress(50)
-                time.sleep(0.5)
-
-                # Step 3: Process articles into vector store
-                status.text("⚙️ Processing articles and updating vector store...")
-                for i, msg in enumerate(process_pubmed_articles(articles)):
-                    progress.progress(min(80, 50 + i * 2))
-                    st.text(msg)
-                time.sleep(0.5)
-
-                # Step 4: Generate the RAG-based answer
-                status.text("💬 Generating answer with retrieved context...")
-                answer, sources, _ = generate_answer(query)
-                progress.progress(100)
-                time.sleep(0.5)
-
+            # Steps 1-3: Search PubMed, fetch abstracts and index them in the
+            # background; sessions asking the same query share one job
+            job = job_manager.submit(
+                ("search", query.strip().lower()), ingest_job, query=query,
+                subscriber=session_id, description="Fetching and processing PubMed data...",
+                pool="ingest"
+            )
+            if not use_namespace(wait_for(job)):
+                st.error("❌ The fetched articles were evicted; please search again.")
+                st.session_state["processing"] = False
+                st.session_state["auto_fetch_confirmed"] = False
+                st.stop()
             st.success("✅ Auto-fetch complete!")
-            st.markdown("### 🧠 Answer")
-            st.write(answer)
-            st.markdown("#### 🔗 Sources")
-            for src in sorted(set(sources)):
-                st.write(f"- {src}")
-
-            status.empty()
-            progress.empty()
+
+            # Step 4: Generate the RAG-based answer, rendered as it streams
+            show_answer(query)
 
             # Update tracking variables
             st.session_state["urls_processed"] = True
@@ -0,0 +1,312 @@
+"""
+article_store.py — SQLite-backed PubMed article cache
+
+Articles are stored once per PMID; cached queries only keep the ordered
+list of PMIDs they returned. Queries are evicted LRU through an index on
+their last-use time, and optionally once older than the TTL (counted from
+when they were fetched); articles go with the last query referencing them.
+Articles stored without a query that keeps them (e.g. by a refresh of a
+query evicted meanwhile) are swept on eviction once `orphan_grace` seconds
+old; the grace period protects pages of a query that is still being fetched.
+
+Articles are stored in the binary form of articles.py; rows written as JSON
+by earlier versions are still read.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from articles import Article
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    pmid TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    refreshed_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS queries_last_used ON queries (last_used);
+CREATE TABLE IF NOT EXISTS query_pmids (
+    query TEXT NOT NULL REFERENCES queries (query) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    pmid TEXT NOT NULL,
+    PRIMARY KEY (query, position)
+);
+CREATE INDEX IF NOT EXISTS query_pmids_pmid ON query_pmids (pmid);
+"""
+
+
+class SQLiteStore:
+    """
+    Base for SQLite-backed stores that are shared between threads: every
+    thread gets its own connection and the database runs in WAL mode, so
+    readers never block the writer.
+    """
+
+    schema = ""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        self._connect().executescript(self.schema)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class ArticleStore(SQLiteStore):
+    """
+    PMID-keyed article store with a query -> PMID mapping.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path, max_queries=15, ttl=None, orphan_grace=3600):
+        super().__init__(path)
+        self.max_queries = max_queries
+        self.ttl = ttl  # seconds; None keeps entries until evicted
+        self.orphan_grace = orphan_grace  # seconds an unreferenced article is kept
+        self._migrate()
+
+    def _migrate(self):
+        conn = self._connect()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(queries)")}
+        if "refreshed_at" not in columns:
+            with self._transaction() as conn:
+                conn.execute("ALTER TABLE queries ADD COLUMN refreshed_at REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE queries SET refreshed_at = created_at")
+
+    def _expired_before(self):
+        return time.time() - self.ttl if self.ttl is not None else None
+
+    # ---------- ARTICLES ----------
+    def get_articles(self, pmids):
+        """
+        Returns {pmid: article} for the requested PMIDs that are cached and fresh.
+        """
+        pmids = list(pmids)
+        found = {}
+        conn = self._connect()
+        expired_before = self._expired_before()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(pmids), 500):
+            batch = pmids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT pmid, data, fetched_at FROM articles WHERE pmid IN ({placeholders})",
+                batch
+            )
+            for pmid, data, fetched_at in rows:
+                if expired_before is None or fetched_at >= expired_before:
+                    found[pmid] = decode_article(data)
+        return found
+
+    def put_articles(self, articles):
+        now = time.time()
+        rows = [(article["pmid"], encode_article(article), now) for article in articles]
+        if not rows:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO articles (pmid, data, fetched_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (pmid) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at",
+                rows
+            )
+
+    # ---------- QUERIES ----------
+    def get_query(self, query):
+        """
+        Returns the cached articles for a query, or None on a miss.
+        A hit refreshes the query's position in the LRU order.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT created_at FROM queries WHERE query = ?", (query,)).fetchone()
+        if row is None:
+            return None
+        expired_before = self._expired_before()
+        if expired_before is not None and row[0] < expired_before:
+            return None
+
+        pmids = [
+            pmid for (pmid,) in conn.execute(
+                "SELECT pmid FROM query_pmids WHERE query = ? ORDER BY position", (query,)
+            )
+        ]
+        articles = self.get_articles(pmids)
+        if len(articles) < len(set(pmids)):
+            return None  # some articles expired; treat as a miss
+
+        with self._transaction() as conn:
+            conn.execute("UPDATE queries SET last_used = ? WHERE query = ?", (time.time(), query))
+        return [articles[pmid] for pmid in pmids]
+
+    def put_query(self, query, pmids):
+        """
+        Records the PMIDs returned for a query and evicts the least recently
+        used queries beyond `max_queries`.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            old_pmids = self._pmids(conn, query)
+            conn.execute("DELETE FROM queries WHERE query = ?", (query,))
+            conn.execute(
+                "INSERT INTO queries (query, created_at, last_used, refreshed_at) VALUES (?, ?, ?, ?)",
+                (query, now, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO query_pmids (query, position, pmid) VALUES (?, ?, ?)",
+                [(query, position, pmid) for position, pmid in enumerate(pmids)]
+            )
+            # Articles only the previous result of this query referenced
+            self._delete_orphans(conn, old_pmids)
+            self._evict(conn)
+
+    def query_pmids(self, query):
+        """
+        Returns (PMIDs, last refresh time) of a cached query, or None.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT refreshed_at FROM queries WHERE query = ?", (query,)).fetchone()
+        if row is None:
+            return None
+        pmids = [
+            pmid for (pmid,) in conn.execute(
+                "SELECT pmid FROM query_pmids WHERE query = ? ORDER BY position", (query,)
+            )
+        ]
+        return pmids, row[0]
+
+    def stale_queries(self, max_age):
+        """
+        Cached queries last refreshed more than `max_age` seconds ago, most
+        recently used first.
+        """
+        return [
+            query for (query,) in self._connect().execute(
+                "SELECT query FROM queries WHERE refreshed_at < ? ORDER BY last_used DESC",
+                (time.time() - max_age,)
+            )
+        ]
+
+    def extend_query(self, query, pmids, refreshed_at=None):
+        """
+        Appends newly found PMIDs to a cached query (their articles must be
+        stored already) and records the refresh. Returns False if the query
+        was evicted in the meantime.
+        """
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE queries SET refreshed_at = ? WHERE query = ?",
+                (time.time() if refreshed_at is None else refreshed_at, query)
+            ).rowcount
+            if not updated:
+                return False
+            known = {
+                pmid for (pmid,) in conn.execute("SELECT pmid FROM query_pmids WHERE query = ?", (query,))
+            }
+            start = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM query_pmids WHERE query = ?", (query,)
+            ).fetchone()[0]
+            new_pmids = [pmid for pmid in dict.fromkeys(pmids) if pmid not in known]
+            conn.executemany(
+                "INSERT INTO query_pmids (query, position, pmid) VALUES (?, ?, ?)",
+                [(query, start + i, pmid) for i, pmid in enumerate(new_pmids)]
+            )
+        return True
+
+    def _evict(self, conn):
+        evicted = [
+            query for (query,) in conn.execute(
+                "SELECT query FROM queries ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+                (self.max_queries,)
+            )
+        ]
+        expired_before = self._expired_before()
+        if expired_before is not None:
+            # Same timestamp get_query checks, so expired entries do not linger
+            evicted.extend(
+                query for (query,) in conn.execute(
+                    "SELECT query FROM queries WHERE created_at < ?", (expired_before,)
+                )
+            )
+        for query in set(evicted):
+            pmids = self._pmids(conn, query)
+            conn.execute("DELETE FROM queries WHERE query = ?", (query,))
+            self._delete_orphans(conn, pmids)
+        conn.execute(
+            "DELETE FROM articles WHERE fetched_at < ? "
+            "AND NOT EXISTS (SELECT 1 FROM query_pmids WHERE query_pmids.pmid = articles.pmid)",
+            (time.time() - self.orphan_grace,)
+        )
+
+    @staticmethod
+    def _pmids(conn, query):
+        return [pmid for (pmid,) in conn.execute("SELECT pmid FROM query_pmids WHERE query = ?", (query,))]
+
+    @staticmethod
+    def _delete_orphans(conn, pmids):
+        # Drop articles no cached query still references
+        conn.executemany(
+            "DELETE FROM articles WHERE pmid = ? "
+            "AND NOT EXISTS (SELECT 1 FROM query_pmids WHERE pmid = ?)",
+            [(pmid, pmid) for pmid in set(pmids)]
+        )
+
+
+def encode_article(article):
+    if not isinstance(article, Article):
+        article = Article.from_dict(article)
+    return article.to_bytes()
+
+
+def decode_article(data):
+    if isinstance(data, str):
+        return Article.from_dict(json.loads(data))  # written before the binary form
+    return Article.from_bytes(data)
+
+
+class _Transaction:
+    """
+    Write transaction that takes the database lock up front (BEGIN IMMEDIATE)
+    so concurrent writers queue on the busy timeout instead of deadlocking.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,125 @@
+"""
+articles.py — Compact PubMed article records
+
+An Article is a slotted dataclass instead of a dict with a nested abstract
+dict: the abstract is packed into two tuples (section labels and texts),
+and journal names, section labels and years are interned, since a few
+hundred distinct values repeat across thousands of articles.
+
+Articles still support read access by key (article["abstract"],
+article["journal"], ...), so code written for the dict form keeps working.
+
+`to_bytes` / `from_bytes` are the binary form used by the article cache and
+to pass parsed articles between processes: all fields are joined with NUL,
+a character XML (and therefore PubMed) cannot contain, so encoding and
+decoding are one UTF-8 pass and one split.
+"""
+
+import sys
+from dataclasses import dataclass
+
+FORMAT_VERSION = b"\x01"
+SEPARATOR = "\x00"
+# Keys of the dict form, in order
+FIELDS = ("pmid", "title", "abstract", "journal", "authors", "publication_date")
+# Stand-ins for missing or empty fields, as shown in answers
+NO_TITLE = "No Title"
+NO_JOURNAL = "Unknown Journal"
+NO_AUTHORS = "No Authors"
+NO_YEAR = "Unknown Year"
+
+
+@dataclass(slots=True)
+class Article:
+    pmid: str | None
+    title: str
+    section_labels: tuple  # e.g. ("BACKGROUND", "METHODS"); interned
+    section_texts: tuple
+    journal: str
+    authors: str  # comma-joined, as shown in answers
+    publication_date: str
+    mesh_terms: tuple = ()  # only filled for corpus builds (see build_corpus.py)
+    keywords: tuple = ()
+
+    @classmethod
+    def create(cls, pmid, title, abstract, journal, authors, publication_date, mesh_terms=(), keywords=()):
+        """
+        Builds an Article from parsed fields; `abstract` is a {label: text}
+        dict. Missing (None) or empty fields get the placeholders above.
+        """
+        return cls(
+            pmid,
+            title or NO_TITLE,
+            tuple(map(sys.intern, abstract)),
+            tuple(text or "" for text in abstract.values()),
+            sys.intern(journal or NO_JOURNAL),
+            authors or NO_AUTHORS,
+            sys.intern(publication_date or NO_YEAR),
+            tuple(mesh_terms),
+            tuple(keywords)
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls.create(
+            data["pmid"], data["title"], data["abstract"], data["journal"], data["authors"],
+            data["publication_date"], data.get("mesh_terms", ()), data.get("keywords", ())
+        )
+
+    # ---------- DICT COMPATIBILITY ----------
+    @property
+    def abstract(self):
+        return dict(zip(self.section_labels, self.section_texts))
+
+    def __getitem__(self, key):
+        if key not in FIELDS and key not in ("mesh_terms", "keywords"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in FIELDS}
+
+    # ---------- BINARY FORM ----------
+    def to_bytes(self):
+        fields = [
+            self.pmid or "", self.title, self.journal, self.authors, self.publication_date,
+            str(len(self.section_labels)), *self.section_labels, *self.section_texts,
+            str(len(self.mesh_terms)), *self.mesh_terms, *self.keywords
+        ]
+        text = SEPARATOR.join(fields)
+        if text.count(SEPARATOR) != len(fields) - 1:
+            raise ValueError(f"Article {self.pmid} contains a NUL character")
+        return FORMAT_VERSION + text.encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:1] != FORMAT_VERSION:
+            raise ValueError("Not an encoded Article")
+        fields = data[1:].decode("utf-8").split(SEPARATOR)
+        pmid, title, journal, authors, publication_date, sections = fields[:6]
+        sections = int(sections)
+        labels_end = 6 + sections
+        texts_end = labels_end + sections
+        mesh_count = int(fields[texts_end])
+        mesh_end = texts_end + 1 + mesh_count
+        return cls(
+            pmid or None,
+            title,
+            tuple(map(sys.intern, fields[6:labels_end])),
+            tuple(fields[labels_end:texts_end]),
+            sys.intern(journal),
+            authors,
+            sys.intern(publication_date),
+            tuple(fields[texts_end + 1:mesh_end]),
+            tuple(fields[mesh_end:])
+        )
+
+    def __reduce__(self):
+        # Pickle (e.g. to and from build_corpus worker processes) via the binary form
+        return Article.from_bytes, (self.to_bytes(),)
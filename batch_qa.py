@@ -0,0 +1,249 @@
+"""
+batch_qa.py — Batch question answering for evaluations and FAQ answers
+
+Reads questions from a JSONL file (one object per line with a "question"
+field and optional "id" and "search" fields) or a CSV file with the same
+columns, and writes one JSONL record per question with the answer, its
+sources and timings.
+
+Each question is answered from the articles of its PubMed search (by
+default the question itself, as in main.py). Questions whose searches have
+the same words are grouped, so every distinct search runs once; the
+articles of all searches are then ingested together, once, and articles
+shared by several searches are embedded only once. Answers are generated
+concurrently, with LLM requests spaced to stay under the provider's rate
+limit.
+
+    python batch_qa.py questions.jsonl --output answers.jsonl --concurrency 4 --rate 0.5
+"""
+
+import argparse
+import csv
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import metrics
+from main import update_query_cache
+from pubmed_client import TokenBucket
+import pubmed_vectorstore as pv
+
+BATCH_NAMESPACE = "batch"
+# Words that do not change what PubMed returns for a grouping decision
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "the", "there", "to", "what", "when", "which", "who", "why", "with"
+}
+
+
+# ---------- INPUT ----------
+def read_questions(path):
+    """
+    Questions from a .jsonl or .csv file as dicts with "id", "question" and
+    "search"; ids default to the line number.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    questions = []
+    for number, row in enumerate(rows, 1):
+        question = (row.get("question") or "").strip()
+        if not question:
+            raise SystemExit(f"❌ {path}: row {number} has no question.")
+        questions.append({
+            "id": str(row.get("id") or number),
+            "question": question,
+            "search": (row.get("search") or "").strip() or question
+        })
+    return questions
+
+
+def search_key(search):
+    """
+    Searches with the same words (ignoring case, order, punctuation and
+    stopwords) share one key and are run once. Searches that merely overlap
+    stay separate: PubMed returns different articles for them.
+    """
+    words = set(re.findall(r"\w+", search.lower())) - STOPWORDS
+    return " ".join(sorted(words)) or search.lower()
+
+
+def group_by_search(questions):
+    """
+    Maps each search key to (the search run for it, its questions).
+    """
+    groups = {}
+    for question in questions:
+        key = search_key(question["search"])
+        groups.setdefault(key, (question["search"], []))[1].append(question)
+    return groups
+
+
+def done_ids(output):
+    """
+    Ids answered without error in an earlier, interrupted run. Rows of
+    failed questions are removed from `output`, so their retries replace them.
+    """
+    if not output.exists():
+        return set()
+    with open(output, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    answered = [record for record in records if record.get("error") is None]
+    if len(answered) < len(records):
+        tmp = output.with_name(output.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in answered)
+        tmp.replace(output)
+    return {record["id"] for record in answered}
+
+
+# ---------- BATCH ----------
+def fetch_groups(groups, concurrency):
+    """
+    Runs each distinct search once, concurrently; returns
+    {key: (articles, seconds, error)}. A failed search gets no articles and
+    an error message, and does not stop the other searches.
+    """
+
+    def fetch(search):
+        start = time.perf_counter()
+        try:
+            with metrics.span("batch_search") as span:
+                articles = update_query_cache(search)
+                span.add(len(articles))
+        except Exception as e:
+            # e.g. PubMed unreachable after retries; only this group's questions fail
+            print(f"❌ Search {search!r} failed: {type(e).__name__}: {e}")
+            return [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        return articles, time.perf_counter() - start, None
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        futures = {pool.submit(fetch, search): key for key, (search, _) in groups.items()}
+        return {futures[future]: future.result() for future in as_completed(futures)}
+
+
+def ingest(fetched):
+    """
+    Ingests the articles of all searches in one pass; returns seconds taken.
+    """
+    articles = {}
+    for group_articles, _, _ in fetched.values():
+        for article in group_articles:
+            articles.setdefault(article["pmid"], article)
+
+    start = time.perf_counter()
+    for message in pv.process_pubmed_articles(list(articles.values()), namespace=BATCH_NAMESPACE):
+        print("   ", message)
+    return time.perf_counter() - start
+
+
+def answer_all(groups, fetched, output, concurrency, limiter, use_cache, ingest_seconds):
+    """
+    Answers every question concurrently, each within the articles of its
+    own search, appending records to `output` as they complete.
+    """
+
+    def answer(question, key):
+        articles, search_seconds, search_error = fetched[key]
+        record = {
+            "id": question["id"],
+            "question": question["question"],
+            "search": question["search"],
+            "articles": len(articles)
+        }
+        answer_seconds = None
+        if search_error is not None:
+            # No articles to answer from
+            record.update(answer=None, sources=[], error=f"Search failed: {search_error}")
+        else:
+            limiter.acquire()
+            start = time.perf_counter()
+            try:
+                with metrics.span("batch_answer"):
+                    result, sources, _ = pv.generate_answer(
+                        question["question"],
+                        pmids=[article["pmid"] for article in articles],
+                        use_cache=use_cache
+                    )
+                record.update(answer=result, sources=sources, error=None)
+            except Exception as e:
+                # One failed question (e.g. an LLM timeout) must not end a nightly run
+                record.update(answer=None, sources=[], error=f"{type(e).__name__}: {e}")
+            answer_seconds = round(time.perf_counter() - start, 3)
+        record["timings"] = {
+            "search_s": round(search_seconds, 3),
+            "ingest_s": round(ingest_seconds, 3),
+            "answer_s": answer_seconds  # None when no answer was attempted
+        }
+        return record
+
+    answered = failed = 0
+    with open(output, "a", encoding="utf-8") as f, ThreadPoolExecutor(concurrency) as pool:
+        futures = [
+            pool.submit(answer, question, key)
+            for key, (_, questions) in groups.items()
+            for question in questions
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            answered += 1
+            failed += record["error"] is not None
+            status = f"❌ {record['error']}" if record["error"] else f"{record['timings']['answer_s']} s"
+            print(f"🩺 [{answered}/{len(futures)}] {record['id']}: {status}")
+    return answered, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a batch of questions from a JSONL or CSV file.")
+    parser.add_argument("input", type=Path, help=".jsonl or .csv with question (and optional id, search) fields")
+    parser.add_argument("--output", type=Path, default=Path("answers.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=4, help="questions answered (and searches run) at once")
+    parser.add_argument("--rate", type=float, default=0.5, help="LLM requests per second (Groq free tier: 0.5)")
+    parser.add_argument("--no-cache", action="store_true", help="always call the LLM, bypassing the answer cache")
+    parser.add_argument("--resume", action="store_true", help="skip ids already answered in --output, retry failed ones")
+    args = parser.parse_args()
+
+    questions = read_questions(args.input)
+    if args.resume:
+        done = done_ids(args.output)
+        questions = [question for question in questions if question["id"] not in done]
+    elif args.output.exists():
+        args.output.unlink()
+    if not questions:
+        print("✅ Nothing to answer.")
+        return
+
+    start = time.perf_counter()
+    if pv.WARM_UP:
+        pv.warm_up()
+    else:
+        pv.initialize_components()
+
+    groups = group_by_search(questions)
+    print(f"🗂️  {len(questions)} questions, {len(groups)} distinct searches")
+    fetched = fetch_groups(groups, args.concurrency)
+
+    print("\n📥 Storing articles into vector database...")
+    ingest_seconds = ingest(fetched)
+
+    print(f"\n🧩 Answering {len(questions)} questions...")
+    answered, failed = answer_all(
+        groups, fetched, args.output, args.concurrency,
+        TokenBucket(args.rate), not args.no_cache, ingest_seconds
+    )
+
+    print(f"\n✅ {answered} answers ({failed} failed) written to {args.output} "
+          f"in {time.perf_counter() - start:.1f} s")
+    metrics.export()
+
+
+if __name__ == "__main__":
+    main()
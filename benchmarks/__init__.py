@@ -0,0 +1,5 @@
+"""
+Benchmarks for the MediAssist retrieval pipeline.
+
+Run them from the repository root, e.g. `python -m benchmarks.bench_history`.
+"""
@@ -0,0 +1,86 @@
+"""
+Memory benchmark: article dicts with nested abstract dicts versus slotted
+Article records, for a corpus served by the E-utilities stand-in.
+
+Both forms are loaded the way the article cache loads them (JSON for the
+dicts, the binary form for Articles) and the memory they retain is measured
+with tracemalloc. Also reports serialized size and encode/decode time.
+
+    python -m benchmarks.bench_articles --articles 100000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from articles import Article
+from benchmarks.eutils_server import build_corpus
+from pubmed import iter_pubmed_articles
+
+PAGE_SIZE = 1000
+
+
+def parse_corpus(n):
+    _, records = build_corpus(n)
+    articles = []
+    for i in range(0, len(records), PAGE_SIZE):
+        content = b"<PubmedArticleSet>" + b"".join(records[i:i + PAGE_SIZE]) + b"</PubmedArticleSet>"
+        articles.extend(iter_pubmed_articles(content))
+    return articles
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def retained(load, blobs):
+    """
+    Runs load(blobs) and returns (result, bytes it still holds, seconds).
+    Timed separately, as tracing allocations slows loading down unevenly.
+    """
+    _, seconds = timed(load, blobs)
+    gc.collect()
+    tracemalloc.start()
+    result = load(blobs)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"Parsing {args.articles} articles...")
+    articles = parse_corpus(args.articles)
+
+    json_blobs, json_encode = timed(lambda: [json.dumps(article.to_dict()) for article in articles])
+    binary_blobs, binary_encode = timed(lambda: [article.to_bytes() for article in articles])
+    del articles
+
+    dicts, dict_bytes, json_decode = retained(lambda blobs: [json.loads(blob) for blob in blobs], json_blobs)
+    records, record_bytes, binary_decode = retained(
+        lambda blobs: [Article.from_bytes(blob) for blob in blobs], binary_blobs
+    )
+    assert [record.to_dict() for record in records[:100]] == dicts[:100]
+
+    json_size = sum(len(blob.encode("utf-8")) for blob in json_blobs)
+    binary_size = sum(map(len, binary_blobs))
+    n = len(records)
+    print(f"\n{'':<16} {'in memory MB':>13} {'per article B':>14} {'stored MB':>10} {'encode s':>9} {'decode s':>9}")
+    print(f"{'dict + JSON':<16} {dict_bytes / 1e6:>13.1f} {dict_bytes / n:>14.0f} {json_size / 1e6:>10.1f} "
+          f"{json_encode:>9.2f} {json_decode:>9.2f}")
+    print(f"{'Article + bytes':<16} {record_bytes / 1e6:>13.1f} {record_bytes / n:>14.0f} {binary_size / 1e6:>10.1f} "
+          f"{binary_encode:>9.2f} {binary_decode:>9.2f}")
+    print(f"\nIn-memory reduction: {1 - record_bytes / dict_bytes:.0%}, "
+          f"stored size reduction: {1 - binary_size / json_size:.0%}")
+
+
+if __name__ == "__main__":
+    main()
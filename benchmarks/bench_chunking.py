@@ -0,0 +1,174 @@
+"""
+Chunking benchmark: fixed-size recursive splitting vs. section-aware
+chunking — chunk counts, characters embedded, chunking and ingestion time,
+and the context retrieval hands to the LLM (with and without a
+RESULTS/CONCLUSIONS section filter).
+
+The corpus holds the fixture articles (the relevant documents for the
+labelled queries) plus generated distractors of typical PubMed abstract
+length (1,500-2,500 characters), most of them structured; the short
+distractors of bench_retrieval fit in one chunk either way.
+
+Ingestion embeds every chunk into a fresh Chroma collection and BM25 index,
+so its time is dominated by the embedding model; --fake-embeddings measures
+chunking and storage overhead only.
+
+    python -m benchmarks.bench_chunking --distractors 2000 --k 4
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from benchmarks.bench_retrieval import DIETS, OUTCOMES, POPULATIONS
+from benchmarks.eutils_server import FIXTURES_DIR
+from embedding_backends import BACKENDS, make_embeddings
+from hybrid_retrieval import BM25Index
+from pubmed import iter_pubmed_articles
+from pubmed_vectorstore import EMBEDDING_MODEL, chunk_id, split_articles
+from qa_engine import QAEngine, estimate_tokens
+from section_chunking import section_filter
+
+FILTER_SECTIONS = ["RESULTS", "CONCLUSIONS"]
+BATCH_SIZE = 1000  # chunks per add_documents call (Chroma caps a batch at ~5,000)
+
+
+def full_length_articles(n, structured=0.7, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        diet, population = rng.choice(DIETS), rng.choice(POPULATIONS)
+        outcomes = rng.sample(OUTCOMES, 5)
+        participants, weeks = rng.randint(20, 400), rng.randint(4, 52)
+        sections = {
+            "BACKGROUND": [
+                f"Dietary strategies such as {diet} are widely used by {population}, "
+                f"but their effects on {outcomes[0]} remain uncertain.",
+                f"Previous trials were small, short and rarely reported {outcomes[1]} or {outcomes[2]}.",
+                f"Adherence to {diet} in everyday settings is also poorly described.",
+            ],
+            "OBJECTIVE": [
+                f"To assess whether {diet} changes {outcomes[0]} and related outcomes in {population} "
+                f"compared with usual care.",
+            ],
+            "METHODS": [
+                f"We randomly assigned {participants} {population} to {diet} or usual care for {weeks} weeks.",
+                f"The primary outcome was the change in {outcomes[0]}; secondary outcomes included "
+                f"{outcomes[1]}, {outcomes[2]} and {outcomes[3]}.",
+                "Outcomes were assessed at baseline, mid-intervention and at the end of the study "
+                "by staff blinded to group allocation.",
+                "Analyses followed the intention-to-treat principle with mixed-effects models "
+                "adjusted for age, sex and baseline values.",
+            ],
+            "RESULTS": [
+                f"Of {participants} participants, {participants - rng.randint(0, participants // 5)} "
+                f"completed the study.",
+                f"Compared with usual care, {diet} changed {outcomes[0]} by {rng.uniform(-9, 9):.1f}% "
+                f"(95% CI {rng.uniform(-12, -1):.1f} to {rng.uniform(1, 12):.1f}).",
+                f"{outcomes[1].capitalize()} and {outcomes[2]} improved modestly, whereas {outcomes[3]} "
+                f"did not differ between groups.",
+                f"Effects on {outcomes[4]} were larger in participants with higher baseline values.",
+                f"Adverse events were mild and occurred in {rng.randint(2, 20)}% of participants in both groups.",
+            ],
+            "CONCLUSIONS": [
+                f"In {population}, {diet} had a modest effect on {outcomes[0]} over {weeks} weeks.",
+                "Longer trials are needed to establish whether these changes are sustained.",
+            ],
+        }
+        if rng.random() < structured:
+            abstract = {label: " ".join(sentences) for label, sentences in sections.items()}
+        else:
+            abstract = {"SUMMARY": " ".join(" ".join(sentences) for sentences in sections.values())}
+        yield {
+            "pmid": str(80000000 + i),
+            "title": f"Effects of {diet} on {outcomes[0]} in {population}: a randomized controlled trial",
+            "abstract": abstract,
+            "journal": "Synthetic journal",
+            "authors": "No Authors",
+            "publication_date": "2020"
+        }
+
+
+def ingest(docs, embeddings, name):
+    ids = [chunk_id(doc.metadata["pmid"], doc.page_content) for doc in docs]
+    start = time.perf_counter()
+    vector_store = Chroma(
+        collection_name=name,
+        embedding_function=embeddings,
+        persist_directory=tempfile.mkdtemp()
+    )
+    for i in range(0, len(docs), BATCH_SIZE):
+        vector_store.add_documents(docs[i:i + BATCH_SIZE], ids=ids[i:i + BATCH_SIZE])
+    bm25_index = BM25Index(Path(tempfile.mkdtemp()) / "bm25.pkl")
+    bm25_index.add(ids, [doc.page_content for doc in docs], [doc.metadata["pmid"] for doc in docs])
+    return vector_store, bm25_index, time.perf_counter() - start
+
+
+def evaluate(engine, queries, sections=None):
+    filter = section_filter(sections) if sections else None
+    context, retrieve_ms, relevant = [], [], 0
+    for item in queries:
+        start = time.perf_counter()
+        found = engine.retrieve(item["query"], filter=filter, sections=sections)
+        retrieve_ms.append((time.perf_counter() - start) * 1000)
+        context.append(estimate_tokens(engine.inputs(item["query"], found)["summaries"]))
+        relevant += any(doc.metadata["pmid"] == item["pmid"] for doc in found)
+    return statistics.mean(context), statistics.median(retrieve_ms), relevant / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--distractors", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--structured", type=float, default=0.7, help="share of distractors with section labels")
+    parser.add_argument("--backend", default="huggingface", choices=BACKENDS)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="random vectors instead of the model (dense results become noise)")
+    args = parser.parse_args()
+
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+    articles.extend(full_length_articles(args.distractors, args.structured))
+    queries = json.loads((FIXTURES_DIR / "retrieval_queries.json").read_text(encoding="utf-8"))
+
+    embeddings = DeterministicFakeEmbedding(size=384) if args.fake_embeddings \
+        else make_embeddings(EMBEDDING_MODEL, args.backend)
+    llm = FakeListChatModel(responses=["FINAL ANSWER: -\nSOURCES: -"])
+
+    print(f"{len(articles)} articles, {len(queries)} queries, k={args.k}\n")
+    print(f"{'chunking':<31} {'chunks':>7} {'chars/chunk':>11} {'chars MB':>8} {'chunk s':>7} {'ingest s':>8} "
+          f"{'context tok':>11} {'retrieve ms':>11} {'relevant':>8}")
+    results = {}
+    for chunking in ("recursive", "sections"):
+        start = time.perf_counter()
+        docs = split_articles(articles, chunking)
+        chunk_seconds = time.perf_counter() - start
+        vector_store, bm25_index, ingest_seconds = ingest(docs, embeddings, f"bench_chunking_{chunking}")
+        engine = QAEngine(llm, vector_store, bm25_index, k=args.k)
+
+        chars = sum(len(doc.page_content) for doc in docs)
+        runs = [(chunking, None)]
+        if chunking == "sections":
+            runs.append((f"sections ({', '.join(FILTER_SECTIONS)})", FILTER_SECTIONS))
+        for label, sections in runs:
+            context, retrieve_ms, relevant = evaluate(engine, queries, sections)
+            results[label] = (len(docs), ingest_seconds, context)
+            print(f"{label:<31} {len(docs):>7} {chars / len(docs):>11.0f} {chars / 1e6:>8.2f} {chunk_seconds:>7.2f} "
+                  f"{ingest_seconds:>8.2f} {context:>11.0f} {retrieve_ms:>11.1f} {relevant:>8.2f}")
+
+    recursive, sections = results["recursive"], results["sections"]
+    filtered = results[f"sections ({', '.join(FILTER_SECTIONS)})"]
+    print(f"\nSection chunks: {1 - sections[0] / recursive[0]:.0%} fewer chunks, "
+          f"ingestion {recursive[1] / sections[1]:.2f}x faster; context tokens "
+          f"{recursive[2]:.0f} -> {sections[2]:.0f} ({filtered[2]:.0f} with the section filter)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Context compression benchmark: prompt tokens sent to the LLM with whole
+retrieved chunks vs. extractive compression, the compression overhead and
+the latency saved per answer.
+
+Without --groq the LLM time is estimated from the prompt size with
+--prefill-ms-per-1k (prompt processing time per 1,000 tokens); with --groq
+each answer is generated by the real model (GROQ_API_KEY required) and
+timed end to end.
+
+    python -m benchmarks.bench_compression --distractors 500 --k 6
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from benchmarks.bench_retrieval import distractor_articles
+from benchmarks.eutils_server import FIXTURES_DIR
+from context_compression import ContextCompressor
+from embedding_backends import BACKENDS, make_embeddings
+from hybrid_retrieval import BM25Index
+from prompt import PROMPT
+from pubmed import iter_pubmed_articles
+from pubmed_vectorstore import CHUNK_SIZE, EMBEDDING_MODEL, LLM_MODEL, article_to_document, chunk_id
+from qa_engine import QAEngine, estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--distractors", type=int, default=500)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--max-sentences", type=int, default=12)
+    parser.add_argument("--backend", default="huggingface", choices=BACKENDS)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="random vectors instead of the model (sentence scores become noise)")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=120.0)
+    parser.add_argument("--groq", action="store_true", help="time real answers from the Groq LLM")
+    args = parser.parse_args()
+
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+    articles.extend(distractor_articles(args.distractors))
+    queries = json.loads((FIXTURES_DIR / "retrieval_queries.json").read_text(encoding="utf-8"))
+
+    splitter = RecursiveCharacterTextSplitter(separators=["\n\n", "\n", ".", " "], chunk_size=CHUNK_SIZE)
+    docs = splitter.split_documents([article_to_document(article) for article in articles])
+    ids = [chunk_id(doc.metadata["pmid"], doc.page_content) for doc in docs]
+
+    embeddings = DeterministicFakeEmbedding(size=384) if args.fake_embeddings \
+        else make_embeddings(EMBEDDING_MODEL, args.backend)
+    vector_store = Chroma(
+        collection_name="bench_compression",
+        embedding_function=embeddings,
+        persist_directory=tempfile.mkdtemp()
+    )
+    vector_store.add_documents(docs, ids=ids)
+    bm25_index = BM25Index(Path(tempfile.mkdtemp()) / "bm25.pkl")
+    bm25_index.add(ids, [doc.page_content for doc in docs], [doc.metadata["pmid"] for doc in docs])
+
+    if args.groq:
+        from langchain_groq import ChatGroq
+
+        llm = ChatGroq(model=LLM_MODEL, temperature=0.3, max_tokens=2000)
+    else:
+        llm = FakeListChatModel(responses=["FINAL ANSWER: -\nSOURCES: -"])
+
+    engines = {
+        "whole": QAEngine(llm, vector_store, bm25_index, k=args.k),
+        "compressed": QAEngine(
+            llm, vector_store, bm25_index, k=args.k,
+            compressor=ContextCompressor(embeddings, max_sentences=args.max_sentences)
+        ),
+    }
+
+    base_tokens = estimate_tokens(PROMPT.format(question="", summaries=""))
+    results = {}
+    for name, engine in engines.items():
+        context, tokens, retrieve_ms, llm_ms, relevant = [], [], [], [], 0
+        for item in queries:
+            start = time.perf_counter()
+            found = engine.retrieve(item["query"])
+            retrieve_ms.append((time.perf_counter() - start) * 1000)
+            inputs = engine.inputs(item["query"], found)
+            context.append(estimate_tokens(inputs["summaries"]))
+            tokens.append(context[-1] + base_tokens)
+            relevant += any(doc.metadata["pmid"] == item["pmid"] for doc in found)
+            if args.groq:
+                start = time.perf_counter()
+                engine.answer(item["query"], found)
+                llm_ms.append((time.perf_counter() - start) * 1000)
+            else:
+                llm_ms.append(tokens[-1] / 1000 * args.prefill_ms_per_1k)
+        results[name] = {
+            "context": statistics.mean(context),
+            "tokens": statistics.mean(tokens),
+            "retrieve_ms": statistics.median(retrieve_ms),
+            "llm_ms": statistics.median(llm_ms),
+            "relevant": relevant / len(queries),
+        }
+
+    llm_label = "LLM p50 ms" if args.groq else "LLM est. ms"
+    print(f"{'context':<11} {'context tok':>11} {'prompt tok':>10} {'retrieve ms':>11} {llm_label:>11} {'relevant':>8}")
+    for name, r in results.items():
+        print(f"{name:<11} {r['context']:>11.0f} {r['tokens']:>10.0f} {r['retrieve_ms']:>11.1f} "
+              f"{r['llm_ms']:>11.1f} {r['relevant']:>8.2f}")
+
+    whole, compressed = results["whole"], results["compressed"]
+    saved = (whole["llm_ms"] + whole["retrieve_ms"]) - (compressed["llm_ms"] + compressed["retrieve_ms"])
+    print(f"\nContext tokens reduced {whole['context'] / compressed['context']:.1f}x "
+          f"(whole prompt {whole['tokens'] / compressed['tokens']:.1f}x); "
+          f"compression overhead {compressed['retrieve_ms'] - whole['retrieve_ms']:.1f} ms; "
+          f"latency saved per answer {saved:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+End-to-end benchmark: PubMed fetching, ingestion and answering against the
+local E-utilities stand-in and a deterministic fake LLM.
+
+Scenarios (each repeated --repeat times):
+
+    cold_auto_fetch    app auto-fetch on empty stores: search + fetch, ingest, answer
+    cached_query       the CLI flow for a query already in the article cache
+    url_ingestion      a few PMIDs pasted as URLs: fetch, ingest, answer
+    repeated_question  the same question again and a paraphrase (answer cache)
+
+Per stage it reports p50/p95/mean latency, throughput (articles or
+questions per second) and peak RSS, as JSON so runs can be compared:
+
+    python -m benchmarks.bench_e2e --fake-embeddings --output before.json
+    python -m benchmarks.bench_e2e --fake-embeddings --compare before.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks.eutils_server import EUtilsServer
+from benchmarks.fake_llm import FakeChatModel
+from pubmed import PubMedRetriever
+from pubmed_client import configure_client
+import pubmed_vectorstore as pv
+
+QUERY = "intermittent fasting insulin sensitivity"
+PARAPHRASE = "intermittent fasting and insulin sensitivity"
+SCENARIOS = ("cold_auto_fetch", "cached_query", "url_ingestion", "repeated_question")
+
+
+# ---------- MEASUREMENT ----------
+def current_rss():
+    """
+    Resident set size in bytes (Linux), else the process peak so far.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.stages = {}  # (scenario, stage) -> {"seconds": [...], "items": [...], "peak_rss": int}
+
+    @contextmanager
+    def stage(self, scenario, stage, items=1):
+        """
+        Times the block and samples its peak RSS; `items` may be a callable
+        evaluated afterwards (e.g. the number of articles fetched).
+        """
+        peak = [current_rss()]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.01):
+                peak[0] = max(peak[0], current_rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            done.set()
+            sampler.join()
+            peak[0] = max(peak[0], current_rss())
+            entry = self.stages.setdefault((scenario, stage), {"seconds": [], "items": [], "peak_rss": 0})
+            entry["seconds"].append(seconds)
+            entry["items"].append(items() if callable(items) else items)
+            entry["peak_rss"] = max(entry["peak_rss"], peak[0])
+
+    def results(self):
+        results = {}
+        for (scenario, stage), entry in self.stages.items():
+            seconds = sorted(entry["seconds"])
+            results.setdefault(scenario, {})[stage] = {
+                "runs": len(seconds),
+                "p50_ms": statistics.median(seconds) * 1000,
+                "p95_ms": seconds[min(len(seconds) - 1, math.ceil(0.95 * len(seconds)) - 1)] * 1000,
+                "mean_ms": statistics.mean(seconds) * 1000,
+                "items_per_s": sum(entry["items"]) / sum(seconds) if sum(seconds) else 0.0,
+                "peak_rss_mb": entry["peak_rss"] / 2 ** 20
+            }
+        return results
+
+
+# ---------- ENVIRONMENT ----------
+def fresh_components(directory, llm, fake_embeddings):
+    """
+    Points pubmed_vectorstore at empty stores in `directory` and builds
+    its components around the fake LLM.
+    """
+    release_components()
+    directory = Path(directory)
+    pv.VECTORSTORE_DIR = directory / "vectorstore"
+    pv.MANIFEST_FILE = pv.VECTORSTORE_DIR / "manifest.json"
+    pv.BM25_INDEX_FILE = pv.VECTORSTORE_DIR / "bm25.pkl"
+    pv.NUMPY_STORE_DIR = pv.VECTORSTORE_DIR / "numpy"
+    pv.EMBEDDING_CACHE_DIR = directory / "embedding_cache"
+    pv.ANSWER_CACHE_FILE = directory / "answers.sqlite3"
+    pv.llm = llm
+    pv.vector_store = pv.bm25_index = pv.answer_cache = pv.qa_engine = None
+    pv.namespaces.clear()
+
+    if fake_embeddings:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from embedding_cache import CachedEmbeddings
+
+        embeddings = CachedEmbeddings(
+            DeterministicFakeEmbedding(size=384), model_name="fake", cache_dir=pv.EMBEDDING_CACHE_DIR
+        )
+    else:
+        embeddings = pv.create_embeddings()
+    pv.vector_store = pv.create_vector_store(embeddings=embeddings)
+    pv.initialize_components()
+
+
+def release_components():
+    # Persist the embedding cache now; its directory is deleted before exit
+    if pv.vector_store is not None:
+        pv.vector_store.embeddings.flush()
+
+
+def ingest(articles, namespace):
+    for _ in pv.process_pubmed_articles(articles, namespace=namespace):
+        pass
+
+
+def answer(question, namespace):
+    stream = pv.stream_answer(question, namespace=namespace)
+    for _ in stream:
+        pass
+    return stream
+
+
+# ---------- SCENARIOS ----------
+def run_scenarios(args, recorder, work_dir):
+    import main as cli
+
+    llm = FakeChatModel(first_token_latency=args.llm_first_token, token_latency=args.llm_token)
+    ttft = []
+
+    for run in range(args.repeat):
+        # Empty stores every run: nothing fetched, embedded or answered before
+        fresh_components(work_dir / f"cold-{run}", llm, args.fake_embeddings)
+        namespace = f"cold-{run}"
+        if "cold_auto_fetch" in args.scenarios:
+            articles = []
+            with recorder.stage("cold_auto_fetch", "search_fetch", items=lambda: len(articles)):
+                articles = PubMedRetriever.retrieve_pubmed_abstracts(QUERY, max_results=args.max_results)
+            with recorder.stage("cold_auto_fetch", "ingest", items=len(articles)):
+                ingest(articles, namespace)
+            with recorder.stage("cold_auto_fetch", "answer"):
+                ttft.append(answer(QUERY, namespace).ttft)
+
+        if "cached_query" in args.scenarios:
+            cli.configure_article_store(work_dir / f"articles-{run}.sqlite3")
+            list(cli.stream_query_articles(QUERY))  # fill the article cache
+            pages = []
+            with recorder.stage("cached_query", "article_cache", items=lambda: sum(map(len, pages))):
+                pages = list(cli.stream_query_articles(QUERY))
+            with recorder.stage("cached_query", "ingest", items=sum(map(len, pages))):
+                ingest(pages, "cached")
+            with recorder.stage("cached_query", "answer"):
+                answer(PARAPHRASE, "cached")
+
+        if "url_ingestion" in args.scenarios:
+            pmids = PubMedRetriever.search_pubmed_articles(QUERY, max_results=args.max_results)
+            pmids = pmids[run * 3 % len(pmids):][:3]
+            articles = []
+            with recorder.stage("url_ingestion", "fetch", items=lambda: len(articles)):
+                articles = PubMedRetriever.fetch_pubmed_abstracts(pmids)
+            with recorder.stage("url_ingestion", "ingest", items=len(articles)):
+                ingest(articles, "urls")
+            with recorder.stage("url_ingestion", "answer"):
+                answer(QUERY, "urls")
+
+        if "repeated_question" in args.scenarios:
+            if pv.namespaces.get(namespace) is None:
+                ingest(PubMedRetriever.retrieve_pubmed_abstracts(QUERY, max_results=args.max_results), namespace)
+                answer(QUERY, namespace)
+            with recorder.stage("repeated_question", "same_question"):
+                answer(QUERY, namespace)
+            with recorder.stage("repeated_question", "paraphrase"):
+                answer(PARAPHRASE, namespace)
+
+    return ttft
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f"{'scenario':<18} {'stage':<15} {'p50 ms':>9} {'p95 ms':>9} {'items/s':>9} {'RSS MB':>8}"
+    print(header + ("  p50 vs baseline" if baseline else ""))
+    for scenario, stages in results.items():
+        for stage, r in stages.items():
+            line = (f"{scenario:<18} {stage:<15} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                    f"{r['items_per_s']:>9.1f} {r['peak_rss_mb']:>8.0f}")
+            old = (baseline or {}).get(scenario, {}).get(stage)
+            if old and old["p50_ms"]:
+                line += f"  {r['p50_ms'] / old['p50_ms']:.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=1000, help="articles served by the stand-in server")
+    parser.add_argument("--max-results", type=int, default=100, help="articles per auto-fetch")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-first-token", type=float, default=0.3, help="fake LLM time to first token (s)")
+    parser.add_argument("--llm-token", type=float, default=0.005, help="fake LLM delay per token (s)")
+    parser.add_argument("--fake-embeddings", action="store_true", help="random vectors instead of the model")
+    parser.add_argument("--vector-store", default=pv.VECTOR_STORE_BACKEND, choices=("chroma", "numpy"))
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="JSON from an earlier run to compare p50 against")
+    args = parser.parse_args()
+    pv.VECTOR_STORE_BACKEND = args.vector_store
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_e2e_"))
+    try:
+        with EUtilsServer(args.articles, latency=args.latency) as server:
+            configure_client(base_url=server.base_url, api_key=None, rate=1000)
+            recorder = Recorder()
+            ttft = run_scenarios(args, recorder, work_dir)
+            requests = dict(server.requests)
+    finally:
+        release_components()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "server_requests": requests,
+            "ttft_p50_ms": statistics.median(ttft) * 1000 if ttft else None
+        },
+        "results": recorder.results()
+    }
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"] if args.compare else None
+    print_table(report["results"], baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Embedding backend benchmark: chunks/sec and cosine-similarity drift against
+the reference HuggingFaceEmbeddings model, on chunks built from the fixtures.
+
+    python -m benchmarks.bench_embeddings --chunks 2000 --backends huggingface torch torch-int8 onnx-int8
+"""
+
+import argparse
+import time
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from benchmarks.eutils_server import build_corpus
+from embedding_backends import BACKENDS, make_embeddings
+from pubmed import iter_pubmed_articles
+from pubmed_vectorstore import CHUNK_SIZE, EMBEDDING_MODEL, article_to_document
+
+
+def fixture_chunks(n_chunks):
+    _, records = build_corpus(n_chunks)
+    content = b"<PubmedArticleSet>" + b"".join(records) + b"</PubmedArticleSet>"
+    docs = [article_to_document(article) for article in iter_pubmed_articles(content)]
+    splitter = RecursiveCharacterTextSplitter(separators=["\n\n", "\n", ".", " "], chunk_size=CHUNK_SIZE)
+    # Vary the text so chunks are not byte-identical copies of the fixtures
+    return [f"[{i}] {doc.page_content}" for i, doc in enumerate(splitter.split_documents(docs))][:n_chunks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    texts = fixture_chunks(args.chunks)
+    reference = None
+    print(f"{len(texts)} chunks, model {EMBEDDING_MODEL}")
+    print(f"{'backend':<12} {'load s':>7} {'chunks/s':>9} {'mean cos':>9} {'min cos':>8}")
+
+    backends = ["huggingface"] + [b for b in args.backends if b != "huggingface"]
+    for backend in backends:
+        start = time.perf_counter()
+        try:
+            model = make_embeddings(EMBEDDING_MODEL, backend, args.batch_size, args.threads)
+        except ImportError as exc:
+            print(f"{backend:<12} skipped: {exc}")
+            continue
+        load_time = time.perf_counter() - start
+
+        model.embed_documents(texts[:32])  # warm-up
+        start = time.perf_counter()
+        vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+        elapsed = time.perf_counter() - start
+
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        if reference is None:
+            reference = vectors
+        cosine = np.sum(vectors * reference, axis=1)
+        print(f"{backend:<12} {load_time:>7.1f} {len(texts) / elapsed:>9.1f} {cosine.mean():>9.5f} {cosine.min():>8.5f}")
+
+
+if __name__ == "__main__":
+    main()
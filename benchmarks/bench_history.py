@@ -0,0 +1,52 @@
+"""
+Paged esearch + efetch-by-ID versus history-server (WebEnv) bulk retrieval,
+both against the local stand-in E-utilities server.
+
+    python -m benchmarks.bench_history --articles 1000 --latency 0.2
+"""
+
+import argparse
+import time
+
+from benchmarks.eutils_server import EUtilsServer
+from pubmed import PubMedRetriever
+from pubmed_client import configure_client
+
+
+def run(label, server, retrieve):
+    server.requests.clear()
+    server.max_url_length = 0
+    start = time.perf_counter()
+    articles = retrieve()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} {len(articles):>6} articles  {elapsed:7.2f} s  "
+        f"esearch={server.requests['esearch.fcgi']:<3} efetch={server.requests['efetch.fcgi']:<3} "
+        f"max URL={server.max_url_length} chars"
+    )
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated server latency (s)")
+    parser.add_argument("--rate", type=float, default=3, help="client requests per second")
+    args = parser.parse_args()
+
+    with EUtilsServer(args.articles, args.latency) as server:
+        configure_client(base_url=server.base_url, rate=args.rate)
+
+        paged = run("paged", server, lambda: PubMedRetriever.fetch_pubmed_abstracts(
+            PubMedRetriever.search_pubmed_articles("intermittent fasting", args.articles)
+        ))
+        bulk = run("history", server, lambda: PubMedRetriever.retrieve_pubmed_abstracts(
+            "intermittent fasting", args.articles
+        ))
+
+    assert [a["pmid"] for a in paged] == [a["pmid"] for a in bulk], "result sets differ"
+    assert paged == bulk, "parsed articles differ"
+
+
+if __name__ == "__main__":
+    main()
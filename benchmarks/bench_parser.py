@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: the previous ElementTree.fromstring + find() parser versus
+the streaming iterparse parser, on efetch responses built from the XML fixtures.
+
+    python -m benchmarks.bench_parser --articles 500 2000 10000
+"""
+
+import argparse
+import time
+import tracemalloc
+from xml.etree import ElementTree
+
+from benchmarks.eutils_server import build_corpus
+from pubmed import iter_pubmed_articles
+
+
+def find_parse(content):
+    """
+    The parser used before iter_pubmed_articles, kept as the reference.
+    """
+    abstracts = []
+    fetch_root = ElementTree.fromstring(content)
+
+    for article in fetch_root.findall(".//PubmedArticle"):
+        pmid = article.find(".//PMID").text
+        title = article.find(".//ArticleTitle").text if article.find(
+            ".//ArticleTitle") is not None else "No Title"
+
+        abstract_sections = article.findall(".//AbstractText")
+        abstract = {
+            section.attrib.get('Label', 'SUMMARY'): section.text
+            for section in abstract_sections if section.text is not None
+        } if abstract_sections else {"SUMMARY": "No Abstract"}
+
+        journal = article.find(".//Journal/Title").text if article.find(
+            ".//Journal/Title") is not None else "Unknown Journal"
+        pub_date = article.find(".//PubDate/Year").text if article.find(
+            ".//PubDate/Year") is not None else "Unknown Year"
+
+        authors = [
+            f"{author.find('.//ForeName').text} {author.find('.//LastName').text}"
+            for author in article.findall(".//Author")
+            if author.find(".//ForeName") is not None and author.find(".//LastName") is not None
+        ]
+
+        abstracts.append({
+            "pmid": pmid,
+            "title": title,
+            "abstract": abstract,
+            "journal": journal,
+            "authors": ", ".join(authors) if authors else "No Authors",
+            "publication_date": pub_date
+        })
+    return abstracts
+
+
+def stream_parse(content):
+    # Consume the generator the way a streaming caller would, without keeping results
+    count = 0
+    for _ in iter_pubmed_articles(content):
+        count += 1
+    return count
+
+
+def measure(parse, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, nargs="+", default=[500, 2000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'articles':>8} {'MB':>6} | {'find() s':>9} {'peak MB':>8} | {'iterparse s':>11} {'peak MB':>8} | speedup")
+    for n in args.articles:
+        _, records = build_corpus(n)
+        content = b"<?xml version=\"1.0\" ?>\n<PubmedArticleSet>" + b"".join(records) + b"</PubmedArticleSet>"
+        assert find_parse(content) == [article.to_dict() for article in iter_pubmed_articles(content)], \
+            "parsers disagree"
+
+        find_time, find_peak = measure(find_parse, content, args.repeat)
+        stream_time, stream_peak = measure(stream_parse, content, args.repeat)
+        print(
+            f"{n:>8} {len(content) / 1e6:>6.1f} | {find_time:>9.3f} {find_peak / 1e6:>8.1f} | "
+            f"{stream_time:>11.3f} {stream_peak / 1e6:>8.1f} | {find_time / stream_time:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
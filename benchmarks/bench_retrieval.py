@@ -0,0 +1,114 @@
+"""
+Retrieval benchmark: dense-only, BM25-only and hybrid (RRF) retrieval on a
+fixture corpus — recall@k and per-query latency.
+
+The corpus holds the fixture articles (the relevant documents for the
+labelled queries in fixtures/retrieval_queries.json) plus generated
+distractor abstracts on neighbouring topics.
+
+    python -m benchmarks.bench_retrieval --distractors 2000 --k 4
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.eutils_server import FIXTURES_DIR
+from embedding_backends import BACKENDS, make_embeddings
+from hybrid_retrieval import BM25Index, HybridRetriever
+from pubmed import iter_pubmed_articles
+from pubmed_vectorstore import CHUNK_SIZE, EMBEDDING_MODEL, article_to_document, chunk_id
+
+DIETS = ["calorie restriction", "a ketogenic diet", "a Mediterranean diet", "a low-fat diet",
+         "a high-protein diet", "meal replacement", "a plant-based diet", "exercise training"]
+OUTCOMES = ["body weight", "LDL cholesterol", "waist circumference", "resting energy expenditure",
+            "appetite ratings", "sleep quality", "liver fat", "lean mass", "triglycerides"]
+POPULATIONS = ["older adults", "women with overweight", "adolescents", "shift workers",
+               "patients with NAFLD", "healthy volunteers", "athletes"]
+
+
+def distractor_articles(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        diet, population = rng.choice(DIETS), rng.choice(POPULATIONS)
+        outcomes = rng.sample(OUTCOMES, 3)
+        yield {
+            "pmid": str(80000000 + i),
+            "title": f"Effects of {diet} on {outcomes[0]} in {population}",
+            "abstract": {
+                "BACKGROUND": f"Dietary strategies such as {diet} are widely used by {population}.",
+                "METHODS": f"We followed {rng.randint(20, 400)} {population} for {rng.randint(4, 52)} weeks.",
+                "RESULTS": f"{diet.capitalize()} changed {outcomes[0]}, {outcomes[1]} and {outcomes[2]} "
+                           f"compared with usual care.",
+                "CONCLUSIONS": f"{diet.capitalize()} may benefit {population}."
+            },
+            "journal": "Synthetic journal",
+            "authors": "No Authors",
+            "publication_date": "2020"
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--distractors", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--backend", default="huggingface", choices=BACKENDS)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="random vectors instead of the model (dense results become noise)")
+    args = parser.parse_args()
+
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+    articles.extend(distractor_articles(args.distractors))
+    queries = json.loads((FIXTURES_DIR / "retrieval_queries.json").read_text(encoding="utf-8"))
+
+    splitter = RecursiveCharacterTextSplitter(separators=["\n\n", "\n", ".", " "], chunk_size=CHUNK_SIZE)
+    docs = splitter.split_documents([article_to_document(article) for article in articles])
+    ids = [chunk_id(doc.metadata["pmid"], doc.page_content) for doc in docs]
+
+    embeddings = DeterministicFakeEmbedding(size=384) if args.fake_embeddings \
+        else make_embeddings(EMBEDDING_MODEL, args.backend)
+    vector_store = Chroma(
+        collection_name="bench_retrieval",
+        embedding_function=embeddings,
+        persist_directory=tempfile.mkdtemp()
+    )
+    vector_store.add_documents(docs, ids=ids)
+
+    bm25_index = BM25Index(Path(tempfile.mkdtemp()) / "bm25.pkl")
+    start = time.perf_counter()
+    bm25_index.add(ids, [doc.page_content for doc in docs], [doc.metadata["pmid"] for doc in docs])
+    print(f"{len(docs)} chunks; BM25 index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    retrievers = {
+        "dense": lambda q: vector_store.similarity_search(q, k=args.k),
+        "bm25": lambda q: vector_store.get_by_ids([id_ for id_, _ in bm25_index.search(q, args.k)]),
+        "hybrid": HybridRetriever(vector_store=vector_store, bm25_index=bm25_index, k=args.k).invoke,
+    }
+
+    print(f"{'retriever':<8} {f'recall@{args.k}':>9} {'p50 ms':>8} {'max ms':>8}")
+    for name, retrieve in retrievers.items():
+        hits, latencies = 0, []
+        for item in queries:
+            start = time.perf_counter()
+            docs_found = retrieve(item["query"])
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(doc.metadata["pmid"] == item["pmid"] for doc in docs_found)
+        print(f"{name:<8} {hits / len(queries):>9.2f} {statistics.median(latencies):>8.2f} {max(latencies):>8.2f}")
+
+    start = time.perf_counter()
+    for item in queries:
+        bm25_index.search(item["query"], args.k)
+    print(f"BM25 index lookup alone: {(time.perf_counter() - start) * 1000 / len(queries):.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
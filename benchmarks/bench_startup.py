@@ -0,0 +1,119 @@
+"""
+Startup benchmark: import time of the front-end modules and cold start of
+the components (LLM client, embedding model, Chroma, first embedding), each
+measured in fresh interpreters.
+
+Exits with status 1 when an import exceeds --max-import-ms, so it can guard
+against heavy dependencies creeping back into module import.
+
+    python -m benchmarks.bench_startup --repeat 5 --max-import-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from embedding_backends import BACKENDS
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["pubmed_vectorstore", "pubmed", "article_store", "main"]
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000)
+"""
+
+# Components go to a temporary directory so the real stores are untouched
+COLD_START_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+start = time.perf_counter()
+import pubmed_vectorstore as pv
+imported = time.perf_counter()
+d = Path(sys.argv[1])
+pv.VECTORSTORE_DIR = d / "vectorstore"
+pv.MANIFEST_FILE = d / "vectorstore" / "manifest.json"
+pv.BM25_INDEX_FILE = d / "vectorstore" / "bm25.pkl"
+pv.EMBEDDING_CACHE_DIR = d / "embedding_cache"
+pv.ANSWER_CACHE_FILE = d / "answers.sqlite3"
+pv.initialize_components()
+initialized = time.perf_counter()
+pv.vector_store.embeddings.embed_query("intermittent fasting and insulin sensitivity")
+embedded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "initialize_ms": (initialized - imported) * 1000,
+    "first_embedding_ms": (embedded - initialized) * 1000,
+    "total_ms": (embedded - start) * 1000
+}))
+"""
+
+
+def run_python(script, *args, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, help="fail when a module import is slower (median)")
+    parser.add_argument("--backend", default=None, choices=BACKENDS, help="embedding backend for the cold start")
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "cold_start": None}
+    for module in MODULES:
+        timings = [float(run_python(IMPORT_SCRIPT.format(module=module))) for _ in range(args.repeat)]
+        results["imports"][module] = {"median_ms": statistics.median(timings), "max_ms": max(timings)}
+
+    if not args.skip_cold_start:
+        env = dict(os.environ)
+        env.setdefault("GROQ_API_KEY", "benchmark")  # the client is created, never called
+        env["WARM_UP"] = "false"
+        if args.backend:
+            env["EMBEDDING_BACKEND"] = args.backend
+        try:
+            results["cold_start"] = json.loads(run_python(COLD_START_SCRIPT, tempfile.mkdtemp(), env=env))
+        except RuntimeError as exc:
+            results["cold_start"] = {"error": str(exc)}
+
+    too_slow = [
+        module for module, timing in results["imports"].items()
+        if args.max_import_ms is not None and timing["median_ms"] > args.max_import_ms
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'import':<20} {'median ms':>10} {'max ms':>8}")
+        for module, timing in results["imports"].items():
+            flag = "  << over budget" if module in too_slow else ""
+            print(f"{module:<20} {timing['median_ms']:>10.1f} {timing['max_ms']:>8.1f}{flag}")
+        cold = results["cold_start"]
+        if cold is not None:
+            print()
+            if "error" in cold:
+                print(f"Cold start failed: {cold['error']}")
+            else:
+                print(f"Cold start: import {cold['import_ms']:.0f} ms, initialize {cold['initialize_ms']:.0f} ms, "
+                      f"first embedding {cold['first_embedding_ms']:.0f} ms, total {cold['total_ms']:.0f} ms")
+
+    if too_slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
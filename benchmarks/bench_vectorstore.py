@@ -0,0 +1,124 @@
+"""
+Vector store benchmark: Chroma vs. the NumPy store (float32 and float16) —
+insert throughput, query latency with and without a PMID scope filter,
+recall@k against exact search, and save/open time of the NumPy store.
+
+Embeddings are random unit vectors looked up by text, so the numbers are
+the stores' own cost, without an embedding model.
+
+    python -m benchmarks.bench_vectorstore --sizes 1000 10000 100000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from numpy_vectorstore import NumpyVectorStore
+from pubmed_vectorstore import scope_filter
+
+DIM = 384  # all-MiniLM-L6-v2
+BATCH_SIZE = 1000  # chunks per add_texts call, as in ingestion batches
+CHUNKS_PER_ARTICLE = 3
+SCOPE_ARTICLES = 100  # PMIDs in a session's scope (one auto-fetch)
+
+
+class LookupEmbeddings(Embeddings):
+    """
+    Text "<n>" embeds to row n of a fixed matrix; queries to their own vectors.
+    """
+
+    def __init__(self, vectors, queries):
+        self.vectors = vectors
+        self.queries = queries
+
+    def embed_documents(self, texts):
+        return self.vectors[[int(text) for text in texts]].tolist()
+
+    def embed_query(self, text):
+        return self.queries[int(text)].tolist()
+
+
+def unit_vectors(rng, n):
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def insert(store, n):
+    for start in range(0, n, BATCH_SIZE):
+        ids = [str(i) for i in range(start, min(n, start + BATCH_SIZE))]
+        store.add_texts(ids, [{"pmid": str(int(id_) // CHUNKS_PER_ARTICLE)} for id_ in ids], ids=ids)
+
+
+def query_latency(store, queries, k, filter=None):
+    """
+    Per-query latencies in ms and the returned IDs.
+    """
+    latencies, results = [], []
+    for i in range(queries):
+        start = time.perf_counter()
+        docs = store.similarity_search(str(i), k=k, filter=filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([doc.id for doc in docs])
+    return latencies, results
+
+
+def recall(results, exact):
+    return statistics.mean(len(set(found) & set(truth)) / len(truth) for found, truth in zip(results, exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>7} {'store':<15} {'insert/s':>9} {'query p50':>9} {'query p95':>9} {'scoped p50':>10} "
+          f"{'recall':>6} {'save s':>6} {'open ms':>7}")
+    for n in args.sizes:
+        embeddings = LookupEmbeddings(unit_vectors(rng, n), unit_vectors(rng, args.queries))
+        articles = (n + CHUNKS_PER_ARTICLE - 1) // CHUNKS_PER_ARTICLE
+        scope_pmids = random.Random(n).sample(range(articles), min(SCOPE_ARTICLES, articles))
+        scope = scope_filter(str(pmid) for pmid in scope_pmids)
+
+        stores = {
+            "chroma": Chroma(
+                collection_name="bench_vectorstore",
+                embedding_function=embeddings,
+                persist_directory=tempfile.mkdtemp()
+            ),
+            "numpy float32": NumpyVectorStore(embeddings, tempfile.mkdtemp(), dtype="float32"),
+            "numpy float16": NumpyVectorStore(embeddings, tempfile.mkdtemp(), dtype="float16"),
+        }
+        scores = embeddings.queries @ embeddings.vectors.T
+        exact = [[str(i) for i in np.argsort(-row)[:args.k]] for row in scores]
+        for name, store in stores.items():
+            _, insert_seconds = timed(lambda: insert(store, n))
+            latencies, results = query_latency(store, args.queries, args.k)
+            scoped, _ = query_latency(store, args.queries, args.k, scope)
+            save = open_ms = ""
+            if isinstance(store, NumpyVectorStore):
+                _, save_seconds = timed(store.save)
+                _, open_seconds = timed(lambda: NumpyVectorStore.load(store.path, embeddings, dtype=store.dtype.name))
+                save, open_ms = f"{save_seconds:.2f}", f"{open_seconds * 1000:.1f}"
+            latencies.sort()
+            print(f"{n:>7} {name:<15} {n / insert_seconds:>9.0f} {statistics.median(latencies):>9.2f} "
+                  f"{latencies[int(0.95 * (len(latencies) - 1))]:>9.2f} {statistics.median(scoped):>10.2f} "
+                  f"{recall(results, exact):>6.3f} {save:>6} {open_ms:>7}")
+
+
+if __name__ == "__main__":
+    main()
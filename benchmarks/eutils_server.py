@@ -0,0 +1,174 @@
+"""
+eutils_server.py — Local stand-in for the NCBI E-utilities API
+
+Replays the PubmedArticle records in fixtures/*.xml. The records are cloned
+under fresh PMIDs until the corpus reaches the requested size, and every
+esearch term matches the whole corpus. Supports paged esearch, the history
+server (usehistory=y, WebEnv/query_key), efetch by ID list or by history,
+and an artificial per-request latency.
+
+    python -m benchmarks.eutils_server --articles 5000 --latency 0.05 --port 8800
+    PUBMED_EUTILS_URL=http://127.0.0.1:8800 streamlit run app.py
+"""
+
+import argparse
+import copy
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlparse
+from xml.etree import ElementTree
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIRST_PMID = 30000000
+
+
+def load_fixture_articles(fixtures_dir=FIXTURES_DIR):
+    articles = []
+    for path in sorted(fixtures_dir.glob("efetch_*.xml")):
+        articles.extend(ElementTree.parse(path).getroot().findall("PubmedArticle"))
+    return articles
+
+
+def build_corpus(n_articles, fixtures_dir=FIXTURES_DIR):
+    """
+    Returns (pmids, serialized PubmedArticle records) for a corpus of `n_articles`.
+    """
+    templates = load_fixture_articles(fixtures_dir)
+    pmids, records = [], []
+    for i in range(n_articles):
+        article = copy.deepcopy(templates[i % len(templates)])
+        pmid = str(FIRST_PMID + i)
+        article.find("MedlineCitation/PMID").text = pmid
+        for article_id in article.iterfind("PubmedData/ArticleIdList/ArticleId"):
+            if article_id.get("IdType") == "pubmed":
+                article_id.text = pmid
+        pmids.append(pmid)
+        records.append(ElementTree.tostring(article, encoding="utf-8"))
+    return pmids, records
+
+
+class EUtilsServer:
+    def __init__(self, n_articles=1000, latency=0.0, host="127.0.0.1", port=0,
+                 fixtures_dir=FIXTURES_DIR):
+        self.pmids, self.records = build_corpus(n_articles, fixtures_dir)
+        self.index = {pmid: i for i, pmid in enumerate(self.pmids)}
+        self.latency = latency
+        self.histories = {}
+        self.requests = Counter()
+        self.max_url_length = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- ENDPOINTS ----------
+    def esearch(self, params):
+        retstart = int(params.get("retstart", 0))
+        retmax = int(params.get("retmax", 20))
+        ids = "".join(f"<Id>{pmid}</Id>" for pmid in self.pmids[retstart:retstart + retmax])
+        history = ""
+        if params.get("usehistory") == "y":
+            webenv = uuid.uuid4().hex
+            with self._lock:
+                self.histories[webenv] = list(self.pmids)
+            history = f"<QueryKey>1</QueryKey><WebEnv>{webenv}</WebEnv>"
+        return (
+            '<?xml version="1.0" encoding="UTF-8" ?>\n<eSearchResult>'
+            f"<Count>{len(self.pmids)}</Count><RetMax>{retmax}</RetMax><RetStart>{retstart}</RetStart>"
+            f"{history}<IdList>{ids}</IdList></eSearchResult>"
+        ).encode()
+
+    def efetch(self, params):
+        if "WebEnv" in params:
+            pmids = self.histories.get(params["WebEnv"], [])
+            retstart = int(params.get("retstart", 0))
+            pmids = pmids[retstart:retstart + int(params.get("retmax", 20))]
+        else:
+            pmids = [pmid for pmid in params.get("id", "").split(",") if pmid]
+        body = b"".join(self.records[self.index[pmid]] for pmid in pmids if pmid in self.index)
+        return b'<?xml version="1.0" ?>\n<PubmedArticleSet>' + body + b"</PubmedArticleSet>"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, params):
+                endpoint = urlparse(self.path).path.rsplit("/", 1)[-1]
+                with server._lock:
+                    server.requests[endpoint] += 1
+                    server.max_url_length = max(server.max_url_length, len(self.path))
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if endpoint == "esearch.fcgi":
+                    body = server.esearch(params)
+                elif endpoint == "efetch.fcgi":
+                    body = server.efetch(params)
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/xml; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond(dict(parse_qsl(urlparse(self.path).query)))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                params = dict(parse_qsl(urlparse(self.path).query))
+                params.update(parse_qsl(self.rfile.read(length).decode()))
+                self._respond(params)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the NCBI E-utilities API")
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    server = EUtilsServer(args.articles, args.latency, args.host, args.port)
+    print(f"📡 Serving {args.articles} articles at {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
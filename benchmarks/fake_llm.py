@@ -0,0 +1,53 @@
+"""
+Deterministic stand-in for the Groq chat model.
+
+Answers are built from the prompt (the question plus the sources of the
+retrieved chunks), so the same prompt always yields the same answer, with a
+configurable time to first token and per-token delay. Supports invoke and
+streaming, like ChatGroq.
+"""
+
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    first_token_latency: float = 0.0  # seconds
+    token_latency: float = 0.0  # seconds per generated token
+    answer_tokens: int = 60
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _answer(self, messages):
+        prompt = messages[-1].content if messages else ""
+        question = re.findall(r"QUESTION: (.*)", prompt)
+        sources = sorted(set(re.findall(r"Source: (\S+)", prompt)))
+        words = (question[-1].split() if question else ["answer"]) * self.answer_tokens
+        answer = " ".join(words[:self.answer_tokens])
+        return [f"FINAL ANSWER: {answer}.", "\n", f"SOURCES: {', '.join(sources)}"]
+
+    def _tokens(self, messages):
+        parts = self._answer(messages)
+        return [token for part in parts for token in re.findall(r"\S+\s*|\s+", part)]
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency + self.token_latency * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,303 @@
+"""
+build_corpus.py — Offline corpus builder from PubMed baseline/update dumps
+
+Builds a large domain corpus without the E-utilities. Local pubmed*.xml.gz
+files (from https://ftp.ncbi.nlm.nih.gov/pubmed/baseline/ and
+/updatefiles/) are parsed in parallel worker processes with the same field
+logic as live efetch, filtered by MeSH terms and/or keywords, embedded in
+batches in the main process and written to N shards. Each shard directory
+has the layout of resources/vectorstore (Chroma collection, manifest.json,
+bm25.pkl), so any shard can be served as the app's vector store.
+
+Files are processed in name order, so update files revise or delete
+articles from earlier ones. Each finished file is recorded in
+checkpoint.json; an interrupted build resumes with the first unfinished
+file and processes it again from the start (chunk ids are deterministic, so
+chunks it already wrote are overwritten, not duplicated). The checkpoint
+records the filters and embedding settings; resuming with different ones
+is refused.
+
+    python build_corpus.py dumps/ --mesh "Intermittent Fasting" --mesh "Obesity" \\
+        --keyword "time-restricted" --shards 4
+"""
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+from pubmed import iter_pubmed_articles
+import pubmed_vectorstore as pv
+
+CORPUS_DIR = Path(__file__).parent / "resources" / "corpus"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+# ---------- PARSING (worker processes) ----------
+def find_dump_files(paths):
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("pubmed*.xml.gz")) if path.is_dir() else [path])
+    return sorted(files, key=lambda f: f.name)
+
+
+def matches(article, mesh_terms, keywords):
+    """
+    True if the article has one of the MeSH terms, or one of the keywords
+    appears among its keywords, title or abstract. No filters keep everything.
+    """
+    if not mesh_terms and not keywords:
+        return True
+    if mesh_terms and any(term.lower() in mesh_terms for term in article.mesh_terms):
+        return True
+    if keywords:
+        text = " ".join([article.title, *article.section_texts, *article.keywords]).lower()
+        return any(keyword in text for keyword in keywords)
+    return False
+
+
+def parse_dump(task):
+    """
+    Parses one dump file; returns (file name, matching articles, deleted
+    PMIDs, articles parsed, seconds).
+    """
+    path, mesh_terms, keywords = task
+    start = time.perf_counter()
+    deleted = []
+    parsed = 0
+    kept = []
+    with gzip.open(path, "rb") as f:
+        for article in iter_pubmed_articles(f, with_terms=True, deleted=deleted):
+            parsed += 1
+            if article.pmid and matches(article, mesh_terms, keywords):
+                # Only needed for filtering; the articles are pickled back to the main process
+                article.mesh_terms = article.keywords = ()
+                kept.append(article)
+    return Path(path).name, kept, deleted, parsed, time.perf_counter() - start
+
+
+# ---------- SHARDS (main process) ----------
+class Shard:
+    """
+    One Chroma collection with its manifest and BM25 index, laid out like
+    resources/vectorstore.
+    """
+
+    def __init__(self, path, embeddings):
+        from langchain_chroma import Chroma
+        from hybrid_retrieval import BM25Index
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vector_store = Chroma(
+            collection_name=pv.COLLECTION_NAME,
+            embedding_function=embeddings,
+            persist_directory=str(self.path)
+        )
+        self.bm25_index = BM25Index.load(self.path / "bm25.pkl")
+        manifest_file = self.path / "manifest.json"
+        self.manifest = json.loads(manifest_file.read_text(encoding="utf-8")) if manifest_file.exists() else {}
+
+    def add(self, articles, batch_size):
+        """
+        Embeds new or changed articles; returns how many were (re)embedded.
+        """
+        changed = []
+        stale_ids = []
+        hashes = {}
+        for article in articles:
+            pmid = article.pmid
+            hashes[pmid] = pv.document_hash(pv.article_to_document(article))
+            entry = self.manifest.get(pmid)
+            if entry is not None:
+                if entry["hash"] == hashes[pmid]:
+                    continue
+                stale_ids.extend(entry["ids"])
+            changed.append(article)
+        self._delete_ids(stale_ids)
+
+        chunks = pv.split_articles(changed)
+        chunk_ids = {}
+        for start in range(0, len(chunks), batch_size):
+            batch = []
+            ids = []
+            for doc in chunks[start:start + batch_size]:
+                id_ = pv.chunk_id(doc.metadata["pmid"], doc.page_content)
+                if id_ in chunk_ids:
+                    continue
+                chunk_ids[id_] = doc.metadata["pmid"]
+                batch.append(doc)
+                ids.append(id_)
+            if not batch:
+                continue
+            self.vector_store.add_documents(batch, ids=ids)
+            self.bm25_index.add(ids, [doc.page_content for doc in batch], [doc.metadata["pmid"] for doc in batch])
+
+        ids_by_pmid = {}
+        for id_, pmid in chunk_ids.items():
+            ids_by_pmid.setdefault(pmid, []).append(id_)
+        for pmid, ids in ids_by_pmid.items():
+            self.manifest[pmid] = {"hash": hashes[pmid], "ids": ids}
+        return len(changed)
+
+    def delete(self, pmids):
+        entries = [self.manifest.pop(pmid) for pmid in pmids if pmid in self.manifest]
+        self._delete_ids([id_ for entry in entries for id_ in entry["ids"]])
+        return len(entries)
+
+    def _delete_ids(self, ids):
+        if ids:
+            self.vector_store.delete(ids=ids)
+            self.bm25_index.delete(ids)
+
+    def save(self):
+        tmp_file = self.path / "manifest.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        tmp_file.replace(self.path / "manifest.json")
+        self.bm25_index.save()
+
+
+def shard_of(pmid, shards):
+    return int(pmid) % shards
+
+
+# ---------- BUILD ----------
+def load_checkpoint(out_dir, settings):
+    checkpoint_file = out_dir / CHECKPOINT_FILE
+    if not checkpoint_file.exists():
+        return {"settings": settings, "completed": {}}
+    checkpoint = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+    if checkpoint["settings"] != settings:
+        raise SystemExit(
+            f"❌ {out_dir} was built with different settings ({checkpoint['settings']}); "
+            "use another --out directory or delete it to rebuild."
+        )
+    return checkpoint
+
+
+def save_checkpoint(out_dir, checkpoint):
+    tmp_file = out_dir / (CHECKPOINT_FILE + ".tmp")
+    tmp_file.write_text(json.dumps(checkpoint, indent=2), encoding="utf-8")
+    tmp_file.replace(out_dir / CHECKPOINT_FILE)
+
+
+def build(files, out_dir, shards=1, mesh_terms=(), keywords=(), workers=None, batch_size=256, backend=None,
+          embeddings=None):
+    """
+    Builds (or resumes) the sharded corpus in out_dir from the dump files.
+    Returns totals: files, parsed, matched, embedded, deleted and seconds.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    mesh_terms = sorted({term.lower() for term in mesh_terms})
+    keywords = sorted({keyword.lower() for keyword in keywords})
+    settings = {
+        "shards": shards,
+        "mesh_terms": mesh_terms,
+        "keywords": keywords,
+        "embedding_model": pv.EMBEDDING_MODEL,
+        "embedding_backend": backend or pv.EMBEDDING_BACKEND,
+        "chunk_size": pv.CHUNK_SIZE,
+        "chunking": pv.CHUNKING
+    }
+    checkpoint = load_checkpoint(out_dir, settings)
+
+    pending = [f for f in files if f.name not in checkpoint["completed"]]
+    skipped = len(files) - len(pending)
+    if skipped:
+        print(f"⏭️  Resuming: {skipped} files already done, {len(pending)} to go.")
+    totals = {"files": 0, "parsed": 0, "matched": 0, "embedded": 0, "deleted": 0, "seconds": 0.0}
+    if not pending:
+        return totals
+
+    embeddings = embeddings or pv.create_embeddings(backend)
+    shard_stores = [Shard(out_dir / f"shard-{i:02d}", embeddings) for i in range(shards)]
+
+    start = time.perf_counter()
+    # spawn: workers only need the parser, never a copy of the loaded model
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers or max(1, (os.cpu_count() or 2) - 1)) as pool:
+        tasks = [(str(f), mesh_terms, keywords) for f in pending]
+        # imap keeps file order (updates after baseline) while workers parse ahead
+        for name, articles, deleted, parsed, parse_seconds in pool.imap(parse_dump, tasks):
+            file_start = time.perf_counter()
+            by_shard = [[] for _ in range(shards)]
+            for article in articles:
+                by_shard[shard_of(article["pmid"], shards)].append(article)
+            deleted_by_shard = [[] for _ in range(shards)]
+            for pmid in deleted:
+                deleted_by_shard[shard_of(pmid, shards)].append(pmid)
+
+            embedded = removed = 0
+            for shard, shard_articles, shard_deleted in zip(shard_stores, by_shard, deleted_by_shard):
+                removed += shard.delete(shard_deleted)
+                embedded += shard.add(shard_articles, batch_size)
+                shard.save()
+
+            index_seconds = time.perf_counter() - file_start
+            checkpoint["completed"][name] = {
+                "parsed": parsed,
+                "matched": len(articles),
+                "embedded": embedded,
+                "deleted": removed
+            }
+            save_checkpoint(out_dir, checkpoint)
+
+            totals["files"] += 1
+            totals["parsed"] += parsed
+            totals["matched"] += len(articles)
+            totals["embedded"] += embedded
+            totals["deleted"] += removed
+            print(
+                f"📦 {name}: {parsed} parsed ({parsed / max(parse_seconds, 1e-9):.0f}/s per worker), "
+                f"{len(articles)} matched, {embedded} embedded ({embedded / max(index_seconds, 1e-9):.1f}/s), "
+                f"{removed} deleted"
+            )
+
+    totals["seconds"] = time.perf_counter() - start
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a sharded PubMed corpus from baseline/update dump files.")
+    parser.add_argument("paths", nargs="+", help="pubmed*.xml.gz files or directories containing them")
+    parser.add_argument("--out", type=Path, default=CORPUS_DIR, help="output directory for shards and checkpoint")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--mesh", action="append", default=[], help="MeSH descriptor to keep (repeatable)")
+    parser.add_argument("--keyword", action="append", default=[],
+                        help="keyword to keep, matched in keywords, title and abstract (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPUs - 1)")
+    parser.add_argument("--batch-size", type=int, default=256, help="chunks per embedding call")
+    parser.add_argument("--backend", default=None, help="embedding backend (default: EMBEDDING_BACKEND)")
+    args = parser.parse_args()
+
+    files = find_dump_files(args.paths)
+    if not files:
+        raise SystemExit("❌ No pubmed*.xml.gz files found.")
+    print(f"🗂️  {len(files)} dump files -> {args.out} ({args.shards} shards)")
+
+    totals = build(
+        files,
+        args.out,
+        shards=args.shards,
+        mesh_terms=args.mesh,
+        keywords=args.keyword,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        backend=args.backend
+    )
+
+    seconds = max(totals["seconds"], 1e-9)
+    print(
+        f"\n✅ {totals['files']} files: {totals['parsed']} articles parsed ({totals['parsed'] / seconds:.0f}/s), "
+        f"{totals['matched']} matched, {totals['embedded']} embedded ({totals['embedded'] / seconds:.1f}/s), "
+        f"{totals['deleted']} deleted in {totals['seconds']:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+context_compression.py — Extractive compression of retrieved chunks
+
+Sits between retrieval and PROMPT. Each chunk is split into sentences
+(dropping the "Title:"/"Abstract:" wrappers), sentences are scored by cosine
+similarity to the question using the same embedding model as the vector
+store, near-duplicates within a PMID (e.g. from overlapping chunks) are
+dropped and only the best sentences are kept, in their original order, on
+documents that keep their citation metadata.
+
+Sentence vectors are kept in a bounded in-memory LRU cache (the same chunks
+come back for related questions) rather than the persistent embedding
+cache, which would otherwise fill up with sentences and evict chunk vectors.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.documents import Document
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[\"'])")
+WRAPPER = re.compile(r"^\s*(?:Title|Abstract):\s*", re.MULTILINE)
+
+
+def split_sentences(text):
+    text = WRAPPER.sub("", text)
+    sentences = []
+    for block in re.split(r"\n\s*\n", text):
+        sentences.extend(s.strip() for s in SENTENCE_BOUNDARY.split(block.strip()) if s.strip())
+    return sentences
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
+
+class ContextCompressor:
+    def __init__(self, embeddings, max_sentences=12, duplicate_threshold=0.95, min_similarity=None,
+                 cache_size=10_000):
+        """
+        embeddings: the vector store's embedding model, without its
+            persistent cache (see pubmed_vectorstore.initialize_components).
+        max_sentences: sentences kept across all chunks.
+        duplicate_threshold: cosine similarity above which two sentences of
+            the same PMID count as the same sentence.
+        min_similarity: optionally drop sentences scoring below this.
+        cache_size: sentence and query vectors kept in memory.
+        """
+        self.embeddings = embeddings
+        self.max_sentences = max_sentences
+        self.duplicate_threshold = duplicate_threshold
+        self.min_similarity = min_similarity
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (kind, text) -> vector, least recently used first
+        self._lock = threading.Lock()
+
+    def _embed(self, kind, texts, embed_fn):
+        """
+        Vectors for `texts`; only those not in the in-memory cache reach the model.
+        """
+        with self._lock:
+            vectors = {}
+            for text in texts:
+                vector = self._cache.get((kind, text))
+                if vector is not None:
+                    self._cache.move_to_end((kind, text))
+                    vectors[text] = vector
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        if missing:
+            vectors.update(zip(missing, _normalize(embed_fn(missing))))
+            with self._lock:
+                for text in missing:
+                    self._cache[(kind, text)] = vectors[text]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return np.array([vectors[text] for text in texts])
+
+    def compress(self, query, docs):
+        """
+        Returns new documents holding only the selected sentences; chunks
+        left without any are dropped. Document order is preserved.
+        """
+        candidates = [
+            (doc_index, position, sentence)
+            for doc_index, doc in enumerate(docs)
+            for position, sentence in enumerate(split_sentences(doc.page_content))
+        ]
+        if not candidates:
+            return docs
+
+        vectors = self._embed("document", [sentence for _, _, sentence in candidates],
+                              self.embeddings.embed_documents)
+        scores = vectors @ self._embed("query", [query], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+        selected = []
+        kept_by_pmid = {}  # pmid -> vectors of sentences already selected
+        for i in np.argsort(-scores, kind="stable"):
+            if len(selected) >= self.max_sentences:
+                break
+            if self.min_similarity is not None and scores[i] < self.min_similarity:
+                break
+            pmid = docs[candidates[i][0]].metadata.get("pmid")
+            kept = kept_by_pmid.setdefault(pmid, [])
+            if kept and max(float(vectors[i] @ other) for other in kept) >= self.duplicate_threshold:
+                continue
+            kept.append(vectors[i])
+            selected.append(i)
+
+        sentences_by_doc = {}
+        for i in sorted(selected, key=lambda i: candidates[i][:2]):
+            doc_index, _, sentence = candidates[i]
+            sentences_by_doc.setdefault(doc_index, []).append(sentence)
+
+        return [
+            Document(id=docs[doc_index].id, page_content=" ".join(sentences), metadata=docs[doc_index].metadata)
+            for doc_index, sentences in sorted(sentences_by_doc.items())
+        ]
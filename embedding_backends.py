@@ -0,0 +1,110 @@
+"""
+embedding_backends.py — Selectable CPU embedding backends
+
+    huggingface   langchain's HuggingFaceEmbeddings (the reference)
+    torch         SentenceTransformer on CPU with explicit batching and threads
+    torch-int8    same, with dynamically int8-quantized Linear layers
+    onnx          ONNX Runtime export of the model
+    onnx-int8     ONNX Runtime with the int8-quantized export
+
+The int8 backends produce slightly different vectors from the reference;
+use benchmarks/bench_embeddings.py to check the cosine-similarity drift.
+"""
+
+from langchain_core.embeddings import Embeddings
+
+BACKENDS = ("huggingface", "torch", "torch-int8", "onnx", "onnx-int8")
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"  # shipped with sentence-transformers models
+
+
+class CPUEmbeddings(Embeddings):
+    """
+    SentenceTransformer wrapper tuned for CPU-only hosts.
+
+    Texts are sorted by length before batching so each batch is padded to
+    similar lengths, then results are restored to input order.
+    """
+
+    def __init__(self, model_name, batch_size=64, num_threads=None, backend="torch", quantize=False,
+                 onnx_file=ONNX_INT8_FILE, normalize=False):
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise ImportError(
+                "CPUEmbeddings requires sentence-transformers. "
+                "Install it with `pip install sentence-transformers`."
+            ) from exc
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        if backend == "onnx":
+            try:
+                import onnxruntime  # noqa: F401
+                import optimum  # noqa: F401
+            except ImportError as exc:
+                raise ImportError(
+                    "The ONNX backend requires optimum and onnxruntime. "
+                    "Install them with `pip install optimum[onnxruntime]`."
+                ) from exc
+            model_kwargs = {"file_name": onnx_file} if quantize else {}
+            self.model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        elif backend == "torch":
+            self.model = SentenceTransformer(model_name, device="cpu")
+            if quantize:
+                self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            raise ValueError(f"Unknown backend {backend!r}; expected 'torch' or 'onnx'")
+
+    def embed_documents(self, texts):
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embeddings = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                normalize_embeddings=self.normalize,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            for i, vector in zip(batch, embeddings):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def make_embeddings(model_name, backend="huggingface", batch_size=None, num_threads=None):
+    """
+    Builds the embedding model for one of BACKENDS.
+    """
+    if backend == "huggingface":
+        from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+        return HuggingFaceEmbeddings(
+            model=model_name,
+            model_kwargs={"trust_remote_code": True},
+            encode_kwargs={"batch_size": batch_size} if batch_size else {}
+        )
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+
+    engine, _, precision = backend.partition("-")
+    return CPUEmbeddings(
+        model_name,
+        batch_size=batch_size or 64,
+        num_threads=num_threads,
+        backend=engine,
+        quantize=precision == "int8"
+    )
@@ -0,0 +1,289 @@
+"""
+embedding_cache.py — Persistent, content-addressed embedding cache
+
+Vectors are keyed by SHA-1 of (model name, kind, text), so identical chunk
+text is embedded once per model across resets and processes. On disk each
+model gets a directory holding:
+
+    vectors.bin   memory-mapped (rows x dim) float16/float32 matrix
+    keys.bin      memory-mapped (rows x 20) key of each row, zeros if free
+    used.bin      memory-mapped last-use time of each row
+    meta.json     model name, dimension, dtype, allocated rows and a
+                  generation counter bumped by every write
+    .lock         lock file serializing writers across processes
+
+Several processes (e.g. Streamlit and a build_corpus run) can share one
+cache: writers take the lock, pick up rows written by the others (when the
+generation changed) and write new rows in place; readers check a row's key
+after copying its vector, so a row overwritten by another process reads as
+a miss instead of a wrong vector. Rows are written straight into the shared
+mapping; `flush` only syncs them to disk, which happens every FLUSH_ROWS new
+rows and at exit rather than after every miss.
+
+The cache holds at most `max_entries` vectors; once full, the least recently
+used rows are overwritten.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import metrics
+
+FORMAT = 2
+KEY_BYTES = 20  # SHA-1 digest
+FLUSH_ROWS = 1024  # new rows between syncs of the mapped files to disk
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive inter-process lock on `path` (created if missing).
+    """
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model; cache hits skip the model forward pass entirely.
+    Serves both document and query embeddings.
+    """
+
+    def __init__(self, embeddings, model_name, cache_dir, max_entries=200_000, dtype="float16"):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.path = Path(cache_dir) / re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._unflushed = 0
+        self._dim = None
+        self._capacity = 0
+        self._generation = None
+        self._vectors = None
+        self._keys = None
+        self._used = None
+        self._rows = {}  # key -> row, as of self._generation
+        with self._lock, file_lock(self.path / ".lock"):
+            self._sync()
+        atexit.register(self.flush)
+
+    # ---------- STORAGE ----------
+    def _read_meta(self):
+        try:
+            meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        if meta.get("format") != FORMAT or meta["model"] != self.model_name or meta["dtype"] != self.dtype.name:
+            return None  # written by another configuration; start over on the next write
+        return meta
+
+    def _write_meta(self):
+        self._generation = (self._generation or 0) + 1
+        meta = {
+            "format": FORMAT,
+            "model": self.model_name,
+            "dim": self._dim,
+            "dtype": self.dtype.name,
+            "capacity": self._capacity,
+            "generation": self._generation
+        }
+        (self.path / "meta.tmp").write_text(json.dumps(meta), encoding="utf-8")
+        (self.path / "meta.tmp").replace(self.path / "meta.json")
+
+    def _map(self):
+        shape = (self._capacity,)
+        self._vectors = np.memmap(self.path / "vectors.bin", dtype=self.dtype, mode="r+",
+                                  shape=shape + (self._dim,))
+        self._keys = np.memmap(self.path / "keys.bin", dtype=np.uint8, mode="r+", shape=shape + (KEY_BYTES,))
+        self._used = np.memmap(self.path / "used.bin", dtype=np.float64, mode="r+", shape=shape)
+
+    def _sync(self):
+        """
+        Catches up with writes of other processes; call with the file lock held.
+        """
+        meta = self._read_meta()
+        if meta is None:
+            if self._generation is not None:
+                self._reset()
+            return
+        if meta["capacity"] != self._capacity:
+            self._dim, self._capacity = meta["dim"], meta["capacity"]
+            self._map()
+        if meta["generation"] != self._generation:
+            rows = np.flatnonzero(self._keys.any(axis=1))
+            self._rows = dict(zip(self._keys[rows].view(f"V{KEY_BYTES}").ravel().tolist(), rows.tolist()))
+            self._generation = meta["generation"]
+
+    def _reset(self):
+        self._vectors = self._keys = self._used = None
+        self._dim, self._capacity, self._generation = None, 0, None
+        self._rows = {}
+
+    def _grow(self, rows_needed):
+        capacity = max(rows_needed, min(self.max_entries, max(self._capacity * 2, 1024)))
+        mode = "ab" if self._capacity else "wb"  # a fresh cache discards files of another configuration
+        # Growing the files keeps existing rows in place
+        for name, row_bytes in (("vectors.bin", self._dim * self.dtype.itemsize),
+                                ("keys.bin", KEY_BYTES),
+                                ("used.bin", 8)):
+            with open(self.path / name, mode) as f:
+                f.truncate(capacity * row_bytes)
+        (self.path / "index.npy").unlink(missing_ok=True)  # pre-FORMAT 2 index
+        self._capacity = capacity
+        self._map()
+
+    def _allocate(self, n):
+        """
+        Rows for `n` new entries: free rows first, then new rows, then the
+        least recently used ones.
+        """
+        occupied = self._keys.any(axis=1) if self._keys is not None else np.zeros(0, dtype=bool)
+        rows = np.flatnonzero(~occupied)[:n].tolist()
+        if len(rows) < n and self._capacity < self.max_entries:
+            start = self._capacity
+            self._grow(min(self.max_entries, start + n - len(rows)))
+            rows += range(start, self._capacity)[:n - len(rows)]
+        if len(rows) < n:
+            candidates = np.flatnonzero(occupied)
+            oldest = np.argpartition(self._used[candidates], n - len(rows) - 1)[:n - len(rows)]
+            rows += candidates[oldest].tolist()
+        return rows
+
+    def flush(self):
+        with self._lock:
+            if not self._unflushed or self._vectors is None:
+                return
+            for mapped in (self._vectors, self._keys, self._used):
+                mapped.flush()
+            self._unflushed = 0
+
+    def _key(self, kind, text):
+        return hashlib.sha1(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).digest()
+
+    def _lookup(self, key):
+        """
+        The cached vector for `key`, or None; drops rows another process reused.
+        """
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        vector = self._vectors[row].astype(np.float32)
+        # Checked after the copy: writers clear a row's key before overwriting it
+        if self._keys[row].tobytes() != key:
+            del self._rows[key]
+            return None
+        self._used[row] = time.time()
+        return vector.tolist()
+
+    def _store(self, entries):
+        """
+        Writes (key, vector) pairs; call with the file lock held, after _sync.
+        """
+        entries = [(key, vector) for key, vector in entries if key not in self._rows][-self.max_entries:]
+        if not entries:
+            return
+        if self._dim is None:
+            self._dim = len(entries[0][1])
+        now = time.time()
+        for (key, vector), row in zip(entries, self._allocate(len(entries))):
+            old_key = self._keys[row].tobytes()
+            self._rows.pop(old_key, None)
+            self._keys[row] = 0
+            self._vectors[row] = vector
+            self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+            self._used[row] = now
+            self._rows[key] = row
+        self._write_meta()
+        self._unflushed += len(entries)
+        if self._unflushed >= FLUSH_ROWS:
+            self.flush()
+
+    def _find(self, results, missing):
+        for key in list(missing):
+            vector = self._lookup(key)
+            if vector is not None:
+                for i in missing.pop(key):
+                    results[i] = vector
+
+    def _embed(self, kind, texts, embed_fn):
+        keys = [self._key(kind, text) for text in texts]
+        results = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                missing.setdefault(key, []).append(i)
+            self._find(results, missing)
+            if missing:
+                # Other processes may have embedded these since our last sync
+                with file_lock(self.path / ".lock"):
+                    self._sync()
+                self._find(results, missing)
+            misses = sum(len(positions) for positions in missing.values())
+            self.hits += len(texts) - misses
+            self.misses += misses
+
+        metrics.count("embedding_cache", len(texts) - misses, kind=kind, result="hit")
+        metrics.count("embedding_cache", misses, kind=kind, result="miss")
+        if missing:
+            # Only unseen texts reach the model
+            with metrics.span("embed", kind=kind) as span:
+                vectors = embed_fn([texts[positions[0]] for positions in missing.values()])
+                span.add(len(missing))
+            vectors = [np.asarray(vector, dtype=self.dtype) for vector in vectors]
+            for positions, vector in zip(missing.values(), vectors):
+                for i in positions:
+                    results[i] = vector.astype(np.float32).tolist()
+            with self._lock, file_lock(self.path / ".lock"):
+                self._sync()
+                self._store(zip(missing, vectors))
+        return results
+
+    # ---------- EMBEDDINGS API ----------
+    def embed_documents(self, texts):
+        return self._embed("document", texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def stats(self):
+        """
+        Hit rate and on-disk footprint of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_on_disk": sum(f.stat().st_size for f in self.path.iterdir() if f.is_file())
+            }
@@ -0,0 +1,220 @@
+"""
+hybrid_retrieval.py — BM25 lexical index and reciprocal rank fusion
+
+Dense MiniLM retrieval is weak on exact medical terms ("16:8", "HbA1c",
+drug names). BM25Index is an incremental inverted index over the same chunk
+IDs as the Chroma collection, and HybridRetriever fuses both rankings with
+reciprocal rank fusion (RRF).
+"""
+
+import math
+import pickle
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, List, Optional
+
+from langchain_core.retrievers import BaseRetriever
+
+from section_chunking import matches_sections
+
+# Compound tokens such as "16:8", "hba1c", "covid-19" or "2.5" are kept whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[:./-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were what which with how does do did".split()
+)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        # Index the parts of compound tokens too, so "time-restricted" matches "restricted"
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[:./-]", token) if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index keyed by chunk ID.
+
+    Statistics (document frequencies, average length) are kept up to date on
+    every add/delete, so no rebuild is needed as articles are ingested.
+    """
+
+    def __init__(self, path=None, k1=1.5, b=0.75):
+        self.path = Path(path) if path is not None else None
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> {chunk id: term frequency}
+        self.docs = {}  # chunk id -> (pmid, document length, distinct terms)
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        index = cls(path, **kwargs)
+        if index.path.exists():
+            with open(index.path, "rb") as f:
+                index.postings, index.docs, index.total_length = pickle.load(f)
+        return index
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            with open(tmp_file, "wb") as f:
+                pickle.dump((self.postings, self.docs, self.total_length), f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_file.replace(self.path)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.docs
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, ids, texts, pmids):
+        with self._lock:
+            for chunk_id, text, pmid in zip(ids, texts, pmids):
+                if chunk_id in self.docs:
+                    continue
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[chunk_id] = tf
+                self.docs[chunk_id] = (pmid, length, tuple(counts))
+                self.total_length += length
+
+    def delete(self, ids):
+        ids = {chunk_id for chunk_id in ids if chunk_id in self.docs}
+        if not ids:
+            return
+        with self._lock:
+            for chunk_id in ids:
+                _, length, terms = self.docs.pop(chunk_id)
+                self.total_length -= length
+                for term in terms:
+                    posting = self.postings[term]
+                    del posting[chunk_id]
+                    if not posting:
+                        del self.postings[term]
+
+    def clear(self):
+        with self._lock:
+            self.postings = {}
+            self.docs = {}
+            self.total_length = 0
+
+    def search(self, query, k=10, pmids=None):
+        """
+        Returns up to k (chunk id, score) pairs, best first, optionally
+        restricted to chunks of the given PMIDs.
+        """
+        allowed = set(pmids) if pmids is not None else None
+        scores = Counter()
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    pmid, length, _ = self.docs[chunk_id]
+                    if allowed is not None and pmid not in allowed:
+                        continue
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (
+                        tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    )
+        return scores.most_common(k)
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """
+    Fuses ranked ID lists; each list contributes 1 / (rrf_k + rank) per ID.
+    """
+    scores = Counter()
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, 1):
+            scores[id_] += 1 / (rrf_k + rank)
+    return [id_ for id_, _ in scores.most_common()]
+
+
+SEARCH_TYPES = ("similarity", "mmr", "similarity_score_threshold")
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense (vector store) + lexical (BM25) retrieval fused with RRF.
+
+    The dense side runs a plain similarity search, maximal marginal
+    relevance ("mmr", diverse results out of `fetch_k` candidates) or a
+    similarity search keeping only hits with relevance >= `score_threshold`.
+
+    With `sections`, `filter` must include the matching section filter; the
+    BM25 index has no chunk metadata, so its hits are checked against the
+    vector store's metadata instead.
+    """
+
+    vector_store: Any
+    bm25_index: Any
+    k: int = 4
+    dense_k: int = 10
+    lexical_k: int = 10
+    rrf_k: int = 60
+    search_type: str = "similarity"
+    fetch_k: int = 20  # MMR candidates
+    lambda_mult: float = 0.5  # MMR: 1 = relevance only, 0 = diversity only
+    score_threshold: float = 0.0
+    filter: Optional[dict] = None  # vector store metadata filter
+    pmids: Optional[List[str]] = None  # the same scope, for the BM25 side
+    sections: Optional[List[str]] = None  # abstract sections, for the BM25 side
+
+    def _dense_search(self, query):
+        if self.search_type == "similarity":
+            return self.vector_store.similarity_search(query, k=self.dense_k, filter=self.filter)
+        if self.search_type == "mmr":
+            return self.vector_store.max_marginal_relevance_search(
+                query, k=self.dense_k, fetch_k=max(self.fetch_k, self.dense_k),
+                lambda_mult=self.lambda_mult, filter=self.filter
+            )
+        if self.search_type == "similarity_score_threshold":
+            hits = self.vector_store.similarity_search_with_relevance_scores(
+                query, k=self.dense_k, filter=self.filter
+            )
+            return [doc for doc, score in hits if score >= self.score_threshold]
+        raise ValueError(f"Unknown search type {self.search_type!r}; expected one of {SEARCH_TYPES}")
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        dense_docs = self._dense_search(query)
+        docs_by_id = {doc.id: doc for doc in dense_docs}
+        if self.sections:
+            # Over-fetch, as hits from other sections are dropped
+            lexical_hits = self.bm25_index.search(query, k=self.lexical_k * 3, pmids=self.pmids)
+            missing = [id_ for id_, _ in lexical_hits if id_ not in docs_by_id]
+            if missing:
+                docs_by_id.update((doc.id, doc) for doc in self.vector_store.get_by_ids(missing))
+            lexical_hits = [
+                (id_, score) for id_, score in lexical_hits
+                if id_ in docs_by_id and matches_sections(docs_by_id[id_].metadata, self.sections)
+            ][:self.lexical_k]
+        else:
+            lexical_hits = self.bm25_index.search(query, k=self.lexical_k, pmids=self.pmids)
+
+        fused_ids = reciprocal_rank_fusion(
+            [[doc.id for doc in dense_docs], [chunk_id for chunk_id, _ in lexical_hits]],
+            self.rrf_k
+        )[:self.k]
+
+        missing = [id_ for id_ in fused_ids if id_ not in docs_by_id]
+        if missing:
+            docs_by_id.update((doc.id, doc) for doc in self.vector_store.get_by_ids(missing))
+        return [docs_by_id[id_] for id_ in fused_ids if id_ in docs_by_id]
@@ -0,0 +1,190 @@
+"""
+jobs.py — Background jobs shared between Streamlit sessions
+
+Long-running work (PubMed fetching, ingestion, answering) runs on a thread
+pool instead of inside the Streamlit script run, so reruns caused by widget
+interaction never repeat or abandon it and never tie up the server thread.
+The script submits a job and polls it for progress and its result.
+
+Jobs are keyed: submitting a key whose job is still queued or running (or
+finished less than `keep_finished` seconds ago) returns the existing job,
+so identical requests from several sessions share one execution. Each
+session subscribes to the jobs it submitted; cancelling unsubscribes it,
+and the job is only cancelled once nobody is waiting for it.
+
+Jobs run on named pools: work that mostly waits (e.g. ingestions queued on
+the ingestion lock) gets a pool of its own, so it never holds the workers
+that quick jobs such as answers need.
+
+Cancellation is cooperative: job functions receive their Job and call
+`job.report(...)` between steps, which raises JobCancelled once the job
+has been cancelled.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, description=""):
+        self.key = key
+        self.description = description
+        self.status = QUEUED
+        self.progress = 0.0  # 0..1
+        self.messages = []
+        self.partial = ""  # streamed output so far, e.g. answer text
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.subscribers = set()
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def report(self, message=None, progress=None, partial=None):
+        """
+        Called by the job function to publish progress; raises JobCancelled
+        when the job has been cancelled, so the function stops at this step.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        if message is not None:
+            self.messages.append(message)
+        if progress is not None:
+            self.progress = max(self.progress, min(1.0, progress))
+        if partial is not None:
+            self.partial += partial
+
+    def _run(self, fn, args, kwargs):
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return
+        self.status = RUNNING
+        try:
+            result = fn(self, *args, **kwargs)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self._finish(FAILED)
+        else:
+            self.result = result
+            self.progress = 1.0
+            self._finish(DONE)
+
+    def _finish(self, status):
+        self.finished_at = time.time()
+        self.status = status
+
+
+class JobManager:
+    def __init__(self, max_workers=4, keep_finished=300, pools=None):
+        """
+        max_workers: jobs running at once in the default pool; more are queued.
+        keep_finished: seconds a finished job stays available for polling
+        (and for deduplicating repeated submissions).
+        pools: {name: max_workers} of additional pools, e.g. {"ingest": 2}.
+        """
+        self.keep_finished = keep_finished
+        self._executors = {
+            name: ThreadPoolExecutor(workers, thread_name_prefix=f"job-{name}")
+            for name, workers in {None: max_workers, **(pools or {})}.items()
+        }
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, subscriber=None, description="", pool=None, **kwargs):
+        """
+        Runs fn(job, *args, **kwargs) in the background on `pool` (the
+        default pool when None), or returns the live job already submitted
+        under `key`. Failed and cancelled jobs are replaced by a new run.
+        """
+        with self._lock:
+            self._forget_expired()
+            job = self._jobs.get(key)
+            if job is None or job.status in (FAILED, CANCELLED) or job.cancelled:
+                job = Job(key, description)
+                self._jobs[key] = job
+                job.future = self._executors[pool].submit(job._run, fn, args, kwargs)
+            if subscriber is not None:
+                job.subscribers.add(subscriber)
+            return job
+
+    def get(self, key):
+        with self._lock:
+            self._forget_expired()
+            return self._jobs.get(key)
+
+    def cancel(self, key, subscriber=None):
+        """
+        Unsubscribes `subscriber` from the job and cancels it when no other
+        subscriber is left (or unconditionally without a subscriber).
+        Returns True if the job was cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.finished:
+                return False
+            job.subscribers.discard(subscriber)
+            if subscriber is not None and job.subscribers:
+                return False
+            job._cancel.set()
+            if job.future.cancel():
+                # Never started; _run will not be called
+                job._finish(CANCELLED)
+            return True
+
+    def forget(self, key):
+        """
+        Drops a finished job, so the next submission of `key` runs again
+        (e.g. when its result is no longer usable). Returns True if dropped.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or not job.finished:
+                return False
+            del self._jobs[key]
+            return True
+
+    def jobs(self):
+        with self._lock:
+            self._forget_expired()
+            return list(self._jobs.values())
+
+    def _forget_expired(self):
+        now = time.time()
+        expired = [
+            key for key, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.keep_finished
+        ]
+        for key in expired:
+            del self._jobs[key]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel.set()
+                if job.future.cancel():
+                    job._finish(CANCELLED)
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
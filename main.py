@@ -4,86 +4,158 @@ main.py — MediAssist Retrieval Pipeline
 Two-tier system:
 1. General Knowledge Base (200 articles): permanent PubMed foundation.
 2. Query-specific Cache (100 articles per user query): temporary, capped at 15.
+
+Cached queries are served immediately; once older than QUERY_REFRESH_TTL
+they are refreshed in the background with only newly published articles,
+which are indexed right away (see refresh.py).
 """
 
+import threading
 from pathlib import Path
+import metrics
 from pubmed import PubMedRetriever
-from pubmed_vectorstore import process_pubmed_articles, generate_answer, initialize_components
-from datetime import datetime
-import json
+from pubmed_vectorstore import WARM_UP, initialize_components, process_pubmed_articles, stream_answer, warm_up
+from article_store import ArticleStore
+from refresh import RefreshScheduler
 
 # Paths for caching
 CACHE_DIR = Path(__file__).parent / "resources" / "cache"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
-QUERY_CACHE_FILE = CACHE_DIR / "query_cache.json"
+ARTICLE_DB_FILE = CACHE_DIR / "articles.sqlite3"
+MAX_CACHED_QUERIES = 15
+REFRESH_NAMESPACE = "refresh"
 
 
-def load_cache(file_path):
-    if file_path.exists():
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+def index_new_articles(query, articles):
+    """
+    Embeds articles found by a background refresh, so the next question
+    about the query does not wait for them.
+    """
+    for _ in process_pubmed_articles(articles, namespace=REFRESH_NAMESPACE):
+        pass
 
 
-def save_cache(data, file_path):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+# ---------- ARTICLE CACHE ----------
+# Opened on first use, so importing this module (e.g. from batch_qa.py) creates no files
+_article_store = None
+_refresher = None
+_lock = threading.Lock()
 
 
-def update_query_cache(query):
+def _open_article_store(path):
+    global _article_store, _refresher
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    _article_store = ArticleStore(path, max_queries=MAX_CACHED_QUERIES)
+    _refresher = RefreshScheduler(_article_store, on_new_articles=index_new_articles)
+    return _article_store
+
+
+def configure_article_store(path=ARTICLE_DB_FILE):
     """
-    Fetch up to 100 new PubMed articles related to the given query.
-    Keeps only the 15 most recent queries.
+    Replaces the process-wide article cache (and the refresher over it),
+    e.g. to point it at another file.
     """
-    query_cache = load_cache(QUERY_CACHE_FILE)
+    with _lock:
+        return _open_article_store(path)
 
-    if query in query_cache:
+
+def get_article_store():
+    """
+    Returns the process-wide article cache, opening ARTICLE_DB_FILE on first use.
+    """
+    with _lock:
+        if _article_store is None:
+            _open_article_store(ARTICLE_DB_FILE)
+        return _article_store
+
+
+def get_refresher():
+    """
+    Returns the background refresher of the process-wide article cache.
+    """
+    with _lock:
+        if _refresher is None:
+            _open_article_store(ARTICLE_DB_FILE)
+        return _refresher
+
+
+def stream_query_articles(query):
+    """
+    Yields pages of up to 100 PubMed articles related to the given query,
+    from the cache or streamed from PubMed and cached as they arrive.
+    Keeps only the 15 most recently used queries. Stale cached queries are
+    still served from the cache and refreshed in the background.
+    """
+    article_store = get_article_store()
+    articles = article_store.get_query(query)
+
+    metrics.count("query_cache", result="hit" if articles is not None else "miss")
+    if articles is not None:
         print(f"🧠 Using cached results for query: '{query}'")
-        return query_cache[query]["articles"]
+        if get_refresher().request(query):
+            print("🔄 Checking PubMed for newer articles in the background...")
+        yield articles
+        return
 
     print(f"🔎 Searching PubMed for new query: '{query}'...")
     pmids = PubMedRetriever.search_pubmed_articles(query, max_results=100)
-    articles = PubMedRetriever.fetch_pubmed_abstracts(pmids)
 
-    query_cache[query] = {
-        "articles": articles,
-        "timestamp": str(datetime.now())
-    }
+    # Articles already stored for other queries are not fetched again
+    cached = article_store.get_articles(pmids)
+    metrics.count("article_store", len(cached), result="hit")
+    metrics.count("article_store", len(pmids) - len(cached), result="miss")
+    if cached:
+        yield [cached[pmid] for pmid in pmids if pmid in cached]
 
-    # Limit to last 15 queries
-    if len(query_cache) > 15:
-        oldest_key = sorted(
-            query_cache.items(), key=lambda x: x[1]["timestamp"]
-        )[0][0]
-        del query_cache[oldest_key]
+    found = set(cached)
+    for page in PubMedRetriever.stream_abstracts_by_id([pmid for pmid in pmids if pmid not in cached]):
+        article_store.put_articles(page)
+        found.update(article["pmid"] for article in page)
+        yield page
 
-    save_cache(query_cache, QUERY_CACHE_FILE)
-    print(f"✅ Cached {len(articles)} articles for query: '{query}'")
+    pmids = [pmid for pmid in pmids if pmid in found]
+    article_store.put_query(query, pmids)
+    print(f"✅ Cached {len(pmids)} articles for query: '{query}'")
 
-    return articles
+
+def update_query_cache(query):
+    """
+    Fetch up to 100 new PubMed articles related to the given query.
+    Keeps only the 15 most recently used queries.
+    """
+    return [article for page in stream_query_articles(query) for article in page]
 
 
 def main():
-    # Step 1: Initialize LLM + Vector DB
-    initialize_components()
+    # Step 1: Initialize LLM + Vector DB, in the background while the user types
+    if WARM_UP:
+        warm_up()
+    else:
+        initialize_components()
 
     # Step 2: Handle a user query
     query = input("\n💬 Enter your medical question: ").strip()
 
-    # Step 3: Retrieve or fetch query-specific articles
-    query_articles = update_query_cache(query)
-
-    # Step 4: Store in vector DB
-    print("\n📥 Storing combined articles into vector database...")
-    for message in process_pubmed_articles(query_articles):
+    # Step 3-4: Retrieve or fetch query-specific articles and store them in
+    # the vector DB; fetching and embedding overlap
+    print("\n📥 Storing query articles into vector database...")
+    for message in process_pubmed_articles(stream_query_articles(query)):
         print("   ", message)
 
     # Step 5: Generate an answer
     print("\n🧩 Generating answer...\n")
-    answer, sources, _ = generate_answer(query)
+    answer = stream_answer(query)
+
+    print("\n🩺 Answer:\n", end=" ", flush=True)
+    for text in answer:
+        print(text, end="", flush=True)
+    print(f"\n\n⏱️ First token after {answer.ttft:.2f}s, complete after {answer.total_time:.2f}s")
+    print("\n🔗 Sources:\n", "\n".join(answer.sources))
+
+    # Step 6: Let a background refresh finish indexing before exiting
+    get_refresher().wait()
 
-    print("\n🩺 Answer:\n", answer)
-    print("\n🔗 Sources:\n", "\n".join(sources))
+    # Step 7: Write stage timings if METRICS_ENABLED and METRICS_FILE are set
+    metrics.export()
 
 
 if __name__ == "__main__":
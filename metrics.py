@@ -0,0 +1,320 @@
+"""
+metrics.py — Stage timing spans, counters and their export
+
+    with metrics.span("efetch") as s:
+        articles = ...
+        s.add(len(articles))
+    metrics.count("answer_cache", result="hit")
+
+Spans record duration and item counts per stage (and their parent span, so
+nested stages such as embedding inside a Chroma insert can be told apart);
+counters record cache hits/misses and retries. Everything is exported as
+Prometheus text (an HTTP endpoint and/or a file) and, per span, as a JSON
+log line.
+
+Disabled unless METRICS_ENABLED is set (or `enable()` is called). When
+disabled `span()` returns a shared no-op object and `count()`/`observe()`
+return immediately, so instrumentation costs one flag check.
+
+    METRICS_ENABLED=true
+    METRICS_PORT=9464                  # serve /metrics over HTTP
+    METRICS_HOST=127.0.0.1             # interface to serve it on
+    METRICS_FILE=metrics.prom          # written by export() and at exit
+    METRICS_LOG=metrics.jsonl          # one JSON line per span ("-" for stderr)
+"""
+
+import atexit
+import bisect
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+PREFIX = "mediassist"
+# Histogram buckets (seconds) for span durations
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # "0.0.0.0" to let a remote Prometheus scrape
+METRICS_FILE = os.getenv("METRICS_FILE") or None
+METRICS_LOG = os.getenv("METRICS_LOG") or None
+
+_enabled = False
+_lock = threading.Lock()
+_spans = {}  # (name, labels) -> [count, sum, items, bucket counts]
+_counters = {}  # (name, labels) -> value
+_observations = {}  # (name, labels) -> [count, sum, bucket counts]
+# Per thread and asyncio task; new threads start without a parent span unless run
+# in a copied context (as Pipeline stages are)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_server = None
+
+log = logging.getLogger("mediassist.metrics")
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, items):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "labels", "items", "start", "parent", "_token")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.items = 0
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        key = (self.name, self.labels)
+        with _lock:
+            entry = _spans.get(key)
+            if entry is None:
+                entry = _spans[key] = [0, 0.0, 0, [0] * len(BUCKETS)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += self.items
+            _add_to_buckets(entry[3], seconds)
+        if log.handlers:
+            log.info(json.dumps({
+                "ts": time.time(),
+                "span": self.name,
+                "parent": self.parent,
+                "seconds": round(seconds, 6),
+                "items": self.items,
+                "error": exc_type.__name__ if exc_type else None,
+                **dict(self.labels)
+            }))
+        return False
+
+    def add(self, items):
+        self.items += items
+
+
+def _add_to_buckets(buckets, value):
+    index = bisect.bisect_left(BUCKETS, value)
+    if index < len(buckets):
+        buckets[index] += 1
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# ---------- RECORDING ----------
+def enabled():
+    return _enabled
+
+
+def span(name, **labels):
+    """
+    Context manager timing one stage; call .add(n) on it to record items.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, _labels(labels))
+
+
+def count(name, value=1, **labels):
+    """
+    Adds to a counter, e.g. count("embedding_cache", 12, result="hit").
+    """
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """
+    Records a measured value in seconds, e.g. time to first token.
+    """
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        entry = _observations.get(key)
+        if entry is None:
+            entry = _observations[key] = [0, 0.0, [0] * len(BUCKETS)]
+        entry[0] += 1
+        entry[1] += value
+        _add_to_buckets(entry[2], value)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _observations.clear()
+
+
+# ---------- EXPORT ----------
+def _format_labels(labels, **extra):
+    pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _histogram_lines(name, labels, total, value_sum, buckets):
+    lines = []
+    cumulative = 0
+    for bound, bucket in zip(BUCKETS, buckets):
+        cumulative += bucket
+        lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {total}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {value_sum}")
+    lines.append(f"{name}_count{_format_labels(labels)} {total}")
+    return lines
+
+
+def prometheus_text():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        spans = {key: (entry[0], entry[1], entry[2], list(entry[3])) for key, entry in _spans.items()}
+        counters = dict(_counters)
+        observations = {key: (entry[0], entry[1], list(entry[2])) for key, entry in _observations.items()}
+
+    lines = []
+    if spans:
+        name = f"{PREFIX}_stage_seconds"
+        lines += [f"# HELP {name} Duration of pipeline stages.", f"# TYPE {name} histogram"]
+        for (stage, labels), (total, value_sum, _, buckets) in sorted(spans.items()):
+            lines += _histogram_lines(name, (("stage", stage),) + labels, total, value_sum, buckets)
+        name = f"{PREFIX}_stage_items_total"
+        lines += [f"# HELP {name} Items processed by pipeline stages.", f"# TYPE {name} counter"]
+        for (stage, labels), (_, _, items, _) in sorted(spans.items()):
+            lines.append(f"{name}{_format_labels((('stage', stage),) + labels)} {items}")
+    for counter in sorted({name for name, _ in counters}):
+        name = f"{PREFIX}_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        for (other, labels), value in sorted(counters.items()):
+            if other == counter:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    for observed in sorted({name for name, _ in observations}):
+        name = f"{PREFIX}_{observed}"
+        lines.append(f"# TYPE {name} histogram")
+        for (other, labels), (total, value_sum, buckets) in sorted(observations.items()):
+            if other == observed:
+                lines += _histogram_lines(name, labels, total, value_sum, buckets)
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """
+    All metrics as a JSON-serializable dict.
+    """
+    with _lock:
+        return {
+            "spans": [
+                {"stage": name, **dict(labels), "count": entry[0], "seconds": entry[1], "items": entry[2]}
+                for (name, labels), entry in _spans.items()
+            ],
+            "counters": [{"name": name, **dict(labels), "value": value} for (name, labels), value in _counters.items()],
+            "observations": [
+                {"name": name, **dict(labels), "count": entry[0], "sum": entry[1]}
+                for (name, labels), entry in _observations.items()
+            ]
+        }
+
+
+def write_prometheus(path=None):
+    """
+    Writes the Prometheus text to `path` (default METRICS_FILE), atomically,
+    e.g. for node_exporter's textfile collector.
+    """
+    path = path or METRICS_FILE
+    if not _enabled or path is None:
+        return
+    path = Path(path)
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    tmp_file.write_text(prometheus_text(), encoding="utf-8")
+    tmp_file.replace(path)
+
+
+def export():
+    """
+    Writes METRICS_FILE if configured; call at the end of a CLI run.
+    """
+    write_prometheus()
+
+
+def serve(port=None, host=None):
+    """
+    Serves /metrics over HTTP from a daemon thread (once per process), on
+    METRICS_HOST (localhost only) unless `host` is given.
+    """
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or METRICS_HOST, port or METRICS_PORT), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+def enable(port=METRICS_PORT, log_file=METRICS_LOG):
+    """
+    Turns recording on and starts the configured exporters.
+    """
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    if log_file and not log.handlers:
+        handler = logging.StreamHandler(sys.stderr) if log_file == "-" else logging.FileHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    if port:
+        serve(port)
+    if METRICS_FILE:
+        atexit.register(write_prometheus)
+
+
+if os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes"):
+    enable()
@@ -0,0 +1,114 @@
+"""
+namespaces.py — Per-session retrieval scopes over the shared collection
+
+Every user session (or CLI run) ingests into the same Chroma collection, so
+identical articles are embedded once, but retrieves only from its own
+article set. A namespace maps a session to that set of PMIDs and its corpus
+fingerprint. Namespaces idle for longer than `idle_ttl` seconds, or beyond
+`max_namespaces`, are evicted least recently used first; articles no longer
+referenced by any namespace become candidates for removal from the index.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class NamespaceEvicted(LookupError):
+    """
+    Raised when answering from a namespace that never existed or was evicted;
+    its articles must be ingested again.
+    """
+
+    def __init__(self, name):
+        super().__init__(f"The articles of namespace {name!r} were evicted; ingest them again")
+        self.name = name
+
+
+class NamespaceRegistry:
+    def __init__(self, max_namespaces=64, idle_ttl=None):
+        self.max_namespaces = max_namespaces
+        self.idle_ttl = idle_ttl
+        self._namespaces = OrderedDict()  # name -> {"pmids", "corpus", "last_used"}, least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._namespaces)
+
+    def _evict_expired(self, now):
+        if self.idle_ttl is None:
+            return
+        while self._namespaces:
+            name, entry = next(iter(self._namespaces.items()))
+            if now - entry["last_used"] <= self.idle_ttl:
+                break
+            del self._namespaces[name]
+
+    def assign(self, name, pmids, corpus):
+        """
+        Sets the article set of a namespace, evicting idle namespaces to stay
+        within max_namespaces.
+        """
+        now = time.time()
+        with self._lock:
+            self._namespaces.pop(name, None)
+            self._namespaces[name] = {"pmids": tuple(pmids), "corpus": corpus, "last_used": now}
+            self._evict_expired(now)
+            while len(self._namespaces) > self.max_namespaces:
+                self._namespaces.popitem(last=False)
+
+    def get(self, name):
+        """
+        Returns {"pmids", "corpus", "last_used"} for a live namespace, marking
+        it as used, or None when it never existed or was evicted.
+        """
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._namespaces.get(name)
+            if entry is None:
+                return None
+            entry["last_used"] = now
+            self._namespaces.move_to_end(name)
+            return dict(entry)
+
+    def refresh_corpus(self, pmids, corpus_version):
+        """
+        Recomputes, with `corpus_version(pmids)`, the corpus fingerprint of
+        every namespace sharing an article with `pmids` after those articles
+        were (re)indexed, so their cached answers are no longer served.
+        """
+        pmids = set(pmids)
+        with self._lock:
+            for entry in self._namespaces.values():
+                if not pmids.isdisjoint(entry["pmids"]):
+                    entry["corpus"] = corpus_version(entry["pmids"])
+
+    def discard(self, name):
+        with self._lock:
+            self._namespaces.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+
+    def evict_lru(self, keep=None):
+        """
+        Evicts the least recently used namespace other than `keep` and
+        returns its name, or None when there is nothing to evict.
+        """
+        with self._lock:
+            for name in self._namespaces:
+                if name != keep:
+                    del self._namespaces[name]
+                    return name
+        return None
+
+    def referenced_pmids(self):
+        """
+        PMIDs used by at least one live namespace.
+        """
+        with self._lock:
+            self._evict_expired(time.time())
+            return {pmid for entry in self._namespaces.values() for pmid in entry["pmids"]}
@@ -0,0 +1,347 @@
+"""
+numpy_vectorstore.py — In-memory NumPy vector store
+
+An alternative to the Chroma collection for small, transient indexes (an
+auto-fetch indexes a few hundred chunks): embeddings are rows of one
+contiguous, L2-normalized float32 or float16 matrix, and a search is one
+matrix product followed by an exact top-k, with no SQLite writes or HNSW
+graph to maintain.
+
+Metadata filters use the Chroma syntax the rest of the code builds
+($eq, $ne, $in, $nin, $and, $or; see scope_filter and section_filter).
+Each metadata key is kept as a dictionary-encoded int32 column, so a filter
+becomes a few vectorized comparisons instead of a loop over documents.
+
+Scores are cosine similarities. Deleting moves the last row into the freed
+one, so the matrix stays contiguous. `save` writes the matrix as a raw file
+that `load` maps with np.memmap (copy-on-write), so a saved store opens
+without reading the vectors up front.
+"""
+
+import pickle
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+DTYPES = ("float32", "float16")
+VECTORS_FILE = "vectors.bin"
+RECORDS_FILE = "records.pkl"
+MISSING = -1  # column code of documents without the key
+MIN_CAPACITY = 1024
+BLOCK_ROWS = 16384  # float16 rows converted to float32 per matrix product
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(self, embedding_function, persist_directory=None, dtype="float32"):
+        """
+        embedding_function: the embedding model, as for Chroma.
+        persist_directory: where `save` writes the store; None for memory only.
+        dtype: "float32", or "float16" to halve the matrix size.
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype {dtype!r}; expected one of {DTYPES}")
+        self._embedding_function = embedding_function
+        self.path = Path(persist_directory) if persist_directory is not None else None
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._vectors = None  # (capacity, dim); rows past _count are unused
+        self._count = 0
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._rows = {}  # id -> row
+        self._columns = {}  # metadata key -> int32 codes per row
+        self._codes = {}  # metadata key -> {(type, value): code}
+
+    @classmethod
+    def load(cls, persist_directory, embedding_function, dtype="float32"):
+        """
+        Opens the store saved in `persist_directory`, or an empty one. A
+        save interrupted between its two files loads as empty; ingestion
+        then re-embeds what the manifest lists but the store lacks.
+        """
+        store = cls(embedding_function, persist_directory, dtype)
+        records_file = store.path / RECORDS_FILE
+        vectors_file = store.path / VECTORS_FILE
+        if not records_file.exists() or not vectors_file.exists():
+            return store
+        with open(records_file, "rb") as f:
+            records = pickle.load(f)
+        count, dim = records["count"], records["dim"]
+        saved_dtype = np.dtype(records["dtype"])
+        if not count or vectors_file.stat().st_size != count * dim * saved_dtype.itemsize:
+            return store
+
+        vectors = np.memmap(vectors_file, dtype=saved_dtype, mode="c", shape=(count, dim))
+        store._vectors = vectors if saved_dtype == store.dtype else vectors.astype(store.dtype)
+        store._count = count
+        store._ids = records["ids"]
+        store._texts = records["texts"]
+        store._metadatas = records["metadatas"]
+        store._rows = {id_: row for row, id_ in enumerate(store._ids)}
+        store._columns = records["columns"]
+        store._codes = records["codes"]
+        return store
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            count = self._count
+            dim = self._vectors.shape[1] if self._vectors is not None else 0
+            tmp_vectors = self.path / (VECTORS_FILE + ".tmp")
+            if count:
+                out = np.memmap(tmp_vectors, dtype=self.dtype, mode="w+", shape=(count, dim))
+                out[:] = self._vectors[:count]
+                out.flush()
+                del out
+            else:
+                tmp_vectors.write_bytes(b"")
+            records = {
+                "dtype": self.dtype.str,
+                "dim": dim,
+                "count": count,
+                "ids": self._ids,
+                "texts": self._texts,
+                "metadatas": self._metadatas,
+                "columns": {key: column[:count].copy() for key, column in self._columns.items()},
+                "codes": self._codes
+            }
+            tmp_records = self.path / (RECORDS_FILE + ".tmp")
+            with open(tmp_records, "wb") as f:
+                pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_vectors.replace(self.path / VECTORS_FILE)
+            tmp_records.replace(self.path / RECORDS_FILE)
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    def __len__(self):
+        return self._count
+
+    # ---------- WRITES ----------
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        """
+        Adds texts, replacing documents that already have one of the IDs.
+        """
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate IDs in one add")
+        if not texts:
+            return ids
+        vectors = np.asarray(self._embedding_function.embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+        with self._lock:
+            self.delete([id_ for id_ in ids if id_ in self._rows])
+            start = self._count
+            self._reserve(start + len(texts), vectors.shape[1])
+            self._vectors[start:start + len(texts)] = vectors
+            for row, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas), start):
+                self._rows[id_] = row
+                self._ids.append(id_)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+                for key, value in metadata.items():
+                    column = self._column(key)
+                    codes = self._codes[key]
+                    column[row] = codes.setdefault((type(value), value), len(codes))
+            self._count += len(texts)
+        return ids
+
+    def _reserve(self, count, dim):
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Expected {self._vectors.shape[1]}-dimensional embeddings, got {dim}")
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if count <= capacity:
+            return
+        capacity = max(count, 2 * capacity, MIN_CAPACITY)
+        vectors = np.empty((capacity, dim), dtype=self.dtype)
+        if self._count:
+            vectors[:self._count] = self._vectors[:self._count]
+        self._vectors = vectors
+        for key, column in self._columns.items():
+            grown = np.full(capacity, MISSING, dtype=np.int32)
+            grown[:self._count] = column[:self._count]
+            self._columns[key] = grown
+
+    def _column(self, key):
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = np.full(len(self._vectors), MISSING, dtype=np.int32)
+            self._codes[key] = {}
+        return column
+
+    def delete(self, ids=None, **kwargs):
+        with self._lock:
+            for id_ in ids or ():
+                row = self._rows.pop(id_, None)
+                if row is None:
+                    continue
+                last = self._count - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = moved
+                    self._texts[row] = self._texts[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[moved] = row
+                    for column in self._columns.values():
+                        column[row] = column[last]
+                for column in self._columns.values():
+                    column[last] = MISSING
+                self._ids.pop()
+                self._texts.pop()
+                self._metadatas.pop()
+                self._count = last
+
+    def reset_collection(self):
+        """
+        Removes every document, and the saved files.
+        """
+        with self._lock:
+            self._clear()
+            if self.path is not None:
+                for name in (VECTORS_FILE, RECORDS_FILE):
+                    (self.path / name).unlink(missing_ok=True)
+
+    # ---------- READS ----------
+    def _document(self, row):
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas"), **kwargs):
+        """
+        Chroma-style get: {"ids": [...], "documents": [...], "metadatas": [...]}
+        for the given IDs (those present) and/or filter.
+        """
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[id_] for id_ in ids if id_ in self._rows]
+            else:
+                rows = list(range(self._count))
+            if where is not None:
+                mask = self._mask(where)
+                rows = [row for row in rows if mask[row]]
+            rows = rows[offset or 0:None if limit is None else (offset or 0) + limit]
+            result = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._texts[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [dict(self._metadatas[row]) for row in rows]
+            if "embeddings" in include:
+                result["embeddings"] = self._vectors[rows].astype(np.float32)
+            return result
+
+    def get_by_ids(self, ids, /):
+        with self._lock:
+            return [self._document(self._rows[id_]) for id_ in ids if id_ in self._rows]
+
+    def _mask(self, where):
+        """
+        Boolean mask over the stored rows for a Chroma-style metadata filter.
+        """
+        count = self._count
+        if len(where) != 1:
+            # Several keys at the top level are an implicit $and
+            return self._mask({"$and": [{key: value} for key, value in where.items()]})
+        (key, condition), = where.items()
+        if key in ("$and", "$or"):
+            masks = [self._mask(clause) for clause in condition]
+            combine = np.logical_and if key == "$and" else np.logical_or
+            return combine.reduce(masks) if masks else np.full(count, key == "$and")
+
+        column = self._columns.get(key)
+        codes = column[:count] if column is not None else np.full(count, MISSING, dtype=np.int32)
+        known = self._codes.get(key, {})
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        (operator, operand), = condition.items()
+        if operator in ("$eq", "$ne"):
+            mask = codes == known.get((type(operand), operand), -2)
+        elif operator in ("$in", "$nin"):
+            mask = np.isin(codes, [known[(type(value), value)] for value in operand if (type(value), value) in known])
+        else:
+            raise ValueError(f"Unsupported filter operator {operator!r}")
+        if operator in ("$ne", "$nin"):
+            mask = ~mask & (codes != MISSING)
+        return mask
+
+    def _search(self, embedding, k, filter=None, with_vectors=False):
+        """
+        Documents and cosine similarities of the k rows most similar to
+        `embedding`, best first (and their vectors with `with_vectors`).
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+        with self._lock:
+            if not self._count or k <= 0:
+                return [], [], None
+            rows = np.flatnonzero(self._mask(filter)) if filter is not None else None
+            matrix = self._vectors[:self._count] if rows is None else self._vectors[rows]
+            if matrix.dtype == np.float32:
+                scores = matrix @ query
+            else:
+                # NumPy has no BLAS kernel for float16; convert a block at a time
+                scores = np.empty(len(matrix), dtype=np.float32)
+                for start in range(0, len(matrix), BLOCK_ROWS):
+                    scores[start:start + BLOCK_ROWS] = matrix[start:start + BLOCK_ROWS].astype(np.float32) @ query
+            if k < len(scores):
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+            else:
+                top = np.argsort(-scores, kind="stable")
+            found = top if rows is None else rows[top]
+            docs = [self._document(row) for row in found]
+            vectors = self._vectors[found].astype(np.float32) if with_vectors else None
+        return docs, scores[top].tolist(), vectors
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        docs, _, _ = self._search(embedding, k, filter)
+        return docs
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        """
+        (document, cosine distance) pairs, best first.
+        """
+        docs, scores, _ = self._search(self._embedding_function.embed_query(query), k, filter)
+        return [(doc, 1.0 - score) for doc, score in zip(docs, scores)]
+
+    def _select_relevance_score_fn(self):
+        # Relevance is the cosine similarity
+        return lambda distance: 1.0 - distance
+
+    def max_marginal_relevance_search(self, query, k=4, fetch_k=20, lambda_mult=0.5, filter=None, **kwargs):
+        embedding = self._embedding_function.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult, filter)
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5, filter=None,
+                                                **kwargs):
+        docs, _, vectors = self._search(embedding, fetch_k, filter, with_vectors=True)
+        if not docs:
+            return []
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32), vectors, lambda_mult=lambda_mult, k=k
+        )
+        return [docs[i] for i in selected]
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, persist_directory=None, dtype="float32",
+                   **kwargs):
+        store = cls(embedding, persist_directory, dtype)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
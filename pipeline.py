@@ -0,0 +1,108 @@
+"""
+pipeline.py — Minimal threaded pipeline with bounded queues
+
+Each stage runs in its own thread and hands its results to the next stage
+through a bounded queue, so a slow stage applies back-pressure instead of
+letting work pile up in memory. `Pipeline.run` is a generator of
+(stage name, result) progress events consumed by the caller's thread.
+Stage threads run in a copy of the caller's context, so their metrics spans
+nest under the span open where `run` was called.
+"""
+
+import contextvars
+import queue
+import threading
+
+_DONE = object()
+_ERROR = object()
+
+
+class Pipeline:
+    def __init__(self, source, stages, source_name="source", maxsize=2):
+        """
+        source: iterable of work items, consumed in its own thread.
+        stages: list of (name, func); func(item) returns the item for the next stage.
+        """
+        self.source = source
+        self.stages = stages
+        self.source_name = source_name
+        self.maxsize = maxsize
+
+    def run(self):
+        stop = threading.Event()
+        events = queue.Queue()
+        queues = [queue.Queue(self.maxsize) for _ in self.stages]
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return _DONE
+
+        def feed():
+            try:
+                for item in self.source:
+                    events.put((self.source_name, item))
+                    if not put(queues[0], item):
+                        return
+            except BaseException as exc:
+                events.put((_ERROR, exc))
+                stop.set()
+                return
+            put(queues[0], _DONE)
+
+        def work(index, name, func):
+            out = queues[index + 1] if index + 1 < len(queues) else None
+            try:
+                while True:
+                    item = get(queues[index])
+                    if item is _DONE:
+                        break
+                    result = func(item)
+                    events.put((name, result))
+                    if out is not None and not put(out, result):
+                        return
+            except BaseException as exc:
+                events.put((_ERROR, exc))
+                stop.set()
+                return
+            if out is not None:
+                put(out, _DONE)
+            else:
+                events.put((_DONE, None))
+
+        # New threads start with an empty context; each needs its own copy of ours
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(feed,),
+                                    name=f"pipeline-{self.source_name}", daemon=True)]
+        threads.extend(
+            threading.Thread(target=contextvars.copy_context().run, args=(work, i, name, func),
+                             name=f"pipeline-{name}", daemon=True)
+            for i, (name, func) in enumerate(self.stages)
+        )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                name, payload = events.get()
+                if name is _ERROR:
+                    raise payload
+                if name is _DONE:
+                    break
+                yield name, payload
+        finally:
+            # Also reached when the caller abandons the generator
+            stop.set()
+            for thread in threads:
+                thread.join()
@@ -1,80 +1,228 @@
-import requests
+import io
 from xml.etree import ElementTree
-from time import sleep
+import metrics
+from articles import Article
+from pubmed_client import HISTORY_PAGE_SIZE, date_filter, get_client, run_sync, submit
+
+
+_MISSING = object()
 
 
 class PubMedRetriever:
-    SEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    FETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    """
+    Synchronous facade over the shared AsyncPubMedClient: requests share one
+    connection pool and the NCBI rate limit, and batches run concurrently.
+    """
+
+    @staticmethod
+    def search_pubmed_articles(search_term, max_results=300, since=None):
+        """
+        PMIDs matching the search; with `since` (a timestamp) only those
+        added to PubMed since that day.
+        """
+        filters = date_filter(since) if since is not None else {}
+        with metrics.span("pubmed_search") as span:
+            pmids = run_sync(get_client().search(search_term, max_results, **filters))
+            span.add(len(pmids))
+        return pmids
+
+    @staticmethod
+    def fetch_pubmed_abstracts(pmid_list, store=None):
+        """
+        Fetches article details for the given PMIDs. When an ArticleStore is
+        passed, PMIDs already in it are served from the store and only the
+        remaining ones are requested from PubMed (and then added to the store).
+        """
+        if store is None:
+            return PubMedRetriever._efetch_abstracts(pmid_list)
+
+        cached = store.get_articles(pmid_list)
+        missing = [pmid for pmid in dict.fromkeys(pmid_list) if pmid not in cached]
+        metrics.count("article_store", len(cached), result="hit")
+        metrics.count("article_store", len(missing), result="miss")
+        fetched = PubMedRetriever._efetch_abstracts(missing) if missing else []
+        store.put_articles(fetched)
+
+        by_pmid = {**cached, **{article["pmid"]: article for article in fetched}}
+        return [by_pmid[pmid] for pmid in dict.fromkeys(pmid_list) if pmid in by_pmid]
+
+    @staticmethod
+    def stream_pubmed_abstracts(search_term, max_results=300, page_size=HISTORY_PAGE_SIZE):
+        """
+        Bulk retrieval through NCBI's history server: esearch runs once with
+        usehistory=y and efetch pages are requested by WebEnv/query_key, so
+        PMID lists are never sent back to NCBI. All pages are requested up
+        front (within the rate limit) and yielded in order as lists of articles.
+        """
+        client = get_client()
+        with metrics.span("pubmed_search") as span:
+            count, webenv, query_key = run_sync(client.esearch_history(search_term))
+            span.add(count)
+        total = min(count, max_results)
+        pages = [
+            submit(client.efetch_history(webenv, query_key, start, min(page_size, total - start)))
+            for start in range(0, total, page_size)
+        ]
+        try:
+            for page in pages:
+                yield _parse_page(page)
+        finally:
+            for page in pages:
+                page.cancel()
 
     @staticmethod
-    def search_pubmed_articles(search_term, max_results=300):
-        params = {
-            'db': 'pubmed',
-            'term': search_term,
-            'retmax': 100,
-            'retmode': 'xml'
-        }
-
-        pmid_list = []
-        start = 0
-        while len(pmid_list) < max_results:
-            params['retstart'] = start
-            response = requests.get(PubMedRetriever.SEARCH_URL, params=params)
-            root = ElementTree.fromstring(response.content)
-            ids = [id_elem.text for id_elem in root.findall(".//Id")]
-            if not ids:
-                break
-            pmid_list.extend(ids)
-            start += 100
-            sleep(1)  # avoid overloading PubMed's servers
-        return pmid_list[:max_results]
+    def retrieve_pubmed_abstracts(search_term, max_results=300, page_size=HISTORY_PAGE_SIZE):
+        """
+        Non-streaming form of `stream_pubmed_abstracts`.
+        """
+        return [
+            article
+            for page in PubMedRetriever.stream_pubmed_abstracts(search_term, max_results, page_size)
+            for article in page
+        ]
 
     @staticmethod
-    def fetch_pubmed_abstracts(pmid_list):
+    def stream_abstracts_by_id(pmid_list, batch_size=100):
+        """
+        Yields parsed pages of articles for the given PMIDs, in order, as their
+        efetch batches complete. All batches are requested concurrently.
+        """
+        client = get_client()
+        pmid_list = list(pmid_list)
+        pages = [
+            submit(client.efetch(pmid_list[i:i + batch_size]))
+            for i in range(0, len(pmid_list), batch_size)
+        ]
+        try:
+            for page in pages:
+                yield _parse_page(page)
+        finally:
+            for page in pages:
+                page.cancel()
+
+    @staticmethod
+    def _efetch_abstracts(pmid_list):
+        with metrics.span("pubmed_fetch") as span:
+            pages = run_sync(get_client().fetch(list(pmid_list)))
+            span.add(len(pages))
         abstracts = []
-        for i in range(0, len(pmid_list), 100):
-            fetch_params = {
-                'db': 'pubmed',
-                'id': ','.join(pmid_list[i:i + 100]),
-                'retmode': 'xml'
-            }
-            fetch_response = requests.get(PubMedRetriever.FETCH_URL, params=fetch_params)
-            fetch_root = ElementTree.fromstring(fetch_response.content)
-
-            for article in fetch_root.findall(".//PubmedArticle"):
-                pmid = article.find(".//PMID").text
-                title = article.find(".//ArticleTitle").text if article.find(
-                    ".//ArticleTitle") is not None else "No Title"
-
-                abstract_sections = article.findall(".//AbstractText")
-                abstract = {
-                    section.attrib.get('Label', 'SUMMARY'): section.text
-                    for section in abstract_sections if section.text is not None
-                } if abstract_sections else {"SUMMARY": "No Abstract"}
-
-                journal = article.find(".//Journal/Title").text if article.find(
-                    ".//Journal/Title") is not None else "Unknown Journal"
-                pub_date = article.find(".//PubDate/Year").text if article.find(
-                    ".//PubDate/Year") is not None else "Unknown Year"
-
-                authors = [
-                    f"{author.find('.//ForeName').text} {author.find('.//LastName').text}"
-                    for author in article.findall(".//Author")
-                    if author.find(".//ForeName") is not None and author.find(".//LastName") is not None
-                ]
-
-                abstracts.append({
-                    "pmid": pmid,
-                    "title": title,
-                    "abstract": abstract,
-                    "journal": journal,
-                    "authors": ", ".join(authors) if authors else "No Authors",
-                    "publication_date": pub_date
-                })
+        with metrics.span("pubmed_parse") as span:
+            for content in pages:
+                abstracts.extend(iter_pubmed_articles(content))
+            span.add(len(abstracts))
         return abstracts
 
 
+def _parse_page(page):
+    """
+    Waits for one submitted efetch page and parses it. The spans close before
+    the caller's generator yields, so they never wrap the consumer's work.
+    """
+    with metrics.span("pubmed_fetch") as span:
+        content = page.result()
+        span.add(1)
+    with metrics.span("pubmed_parse") as span:
+        articles = list(iter_pubmed_articles(content))
+        span.add(len(articles))
+    return articles
+
+
+# ---- XML parsing ----
+def iter_pubmed_articles(source, with_terms=False, deleted=None):
+    """
+    Streams Articles (see articles.py) out of efetch XML (bytes or a binary
+    file object).
+
+    Uses iterparse and extracts every field in a single pass over each
+    PubmedArticle, clearing it once yielded, so memory stays flat regardless
+    of response size. Field semantics match the original find()-based parser:
+    the first PMID, ArticleTitle, Journal/Title and PubDate/Year win, and
+    authors need both a ForeName and a LastName. Titles include the text
+    of inline markup (<i>, <sup>, ...).
+
+    Also reads PubMed baseline/update dump files (a PubmedArticleSet with
+    the same elements). with_terms=True also fills each article's
+    mesh_terms and keywords; PMIDs listed in DeleteCitation are appended to
+    `deleted` when a list is given.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    root = None
+    path = []
+    for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if root is None:
+                root = elem
+            path.append(tag)
+            if tag == "PubmedArticle":
+                pmid = title = journal = pub_date = _MISSING
+                abstract = {}
+                has_abstract = False
+                authors = []
+                mesh_terms = []
+                keywords = []
+            elif tag == "Author":
+                fore_name = last_name = _MISSING
+            continue
+
+        path.pop()
+        if tag == "PMID":
+            if path and path[-1] == "DeleteCitation":
+                if deleted is not None:
+                    deleted.append(elem.text)
+            elif pmid is _MISSING:
+                pmid = elem.text
+        elif tag == "ArticleTitle":
+            if title is _MISSING:
+                # Titles may start with inline markup, e.g. <i>In vitro</i> ...
+                title = "".join(elem.itertext())
+        elif tag == "AbstractText":
+            has_abstract = True
+            if elem.text is not None:
+                abstract[elem.get("Label", "SUMMARY")] = elem.text
+        elif tag == "Title":
+            if journal is _MISSING and path and path[-1] == "Journal":
+                journal = "".join(elem.itertext())
+        elif tag == "Year":
+            if pub_date is _MISSING and path and path[-1] == "PubDate":
+                pub_date = elem.text
+        elif tag == "ForeName":
+            if "Author" in path and fore_name is _MISSING:
+                fore_name = elem.text
+        elif tag == "LastName":
+            if "Author" in path and last_name is _MISSING:
+                last_name = elem.text
+        elif tag == "Author":
+            if fore_name is not _MISSING and last_name is not _MISSING:
+                authors.append(f"{fore_name} {last_name}")
+        elif tag == "DescriptorName":
+            if with_terms and elem.text:
+                mesh_terms.append(elem.text)
+        elif tag == "Keyword":
+            if with_terms:
+                keyword = "".join(elem.itertext()).strip()
+                if keyword:
+                    keywords.append(keyword)
+        elif tag == "PubmedArticle":
+            # Missing or empty fields get Article.create's placeholders
+            yield Article.create(
+                None if pmid is _MISSING else pmid,
+                None if title is _MISSING else title,
+                abstract if has_abstract else {"SUMMARY": "No Abstract"},
+                None if journal is _MISSING else journal,
+                ", ".join(authors),
+                None if pub_date is _MISSING else pub_date,
+                mesh_terms,
+                keywords
+            )
+            elem.clear()
+            root.clear()
+        elif tag == "DeleteCitation":
+            root.clear()
+
+
 # ---- Combined workflow ----
 def retrieve_pubmed_data(search_term, max_results=5):
     print(f"🔍 Searching PubMed for: '{search_term}'...")
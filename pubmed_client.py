@@ -0,0 +1,264 @@
+"""
+pubmed_client.py — Concurrent, rate-limited NCBI E-utilities client
+
+All requests go through one pooled httpx.AsyncClient running on a background
+event loop, and a token bucket keeps us under NCBI's limit of 3 requests per
+second (10 with an NCBI_API_KEY). PubMedRetriever in pubmed.py keeps its
+synchronous API on top of this via `run_sync`.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from xml.etree import ElementTree
+
+import metrics
+
+EUTILS_BASE_URL = os.getenv("PUBMED_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+NCBI_API_KEY = os.getenv("NCBI_API_KEY")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HISTORY_PAGE_SIZE = 500  # efetch accepts up to 10,000 records per request
+
+
+class TokenBucket:
+    """
+    Token bucket usable from both threads and coroutines.
+
+    Callers reserve a token and are told how long to wait for it, so waiting
+    never happens while holding the lock. With the default capacity of 1,
+    requests are spaced evenly at 1/rate seconds.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one token and returns the number of seconds until it is valid.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AsyncPubMedClient:
+    def __init__(self, base_url=EUTILS_BASE_URL, api_key=NCBI_API_KEY, rate=None,
+                 max_connections=10, max_retries=4, backoff=0.5, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.limiter = TokenBucket(rate or (10 if api_key else 3))
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._client = None
+
+    def _http_client(self):
+        # Created lazily so it binds to the event loop that first uses it;
+        # httpx itself is imported here too to keep module import cheap
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def _get(self, endpoint, params):
+        import httpx
+
+        params = {"db": "pubmed", **params}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        url = f"{self.base_url}/{endpoint}"
+
+        stage = endpoint.removesuffix(".fcgi")
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async()
+            retry_after = None
+            try:
+                with metrics.span("eutils_request", endpoint=stage):
+                    response = await self._http_client().get(url, params=params)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.content
+                retry_after = response.headers.get("Retry-After")
+
+            metrics.count("eutils_retries", endpoint=stage)
+            if retry_after is not None and retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                delay = self.backoff * 2 ** attempt + random.uniform(0, self.backoff)
+            await asyncio.sleep(delay)
+
+    # ---------- ESEARCH ----------
+    async def esearch(self, term, retstart=0, retmax=100, **filters):
+        """
+        Returns (total hit count, PMIDs) for one page of search results.
+        `filters` are passed to esearch as is, e.g. datetype/mindate/maxdate
+        or reldate (see `date_filter`).
+        """
+        content = await self._get("esearch.fcgi", {
+            "term": term,
+            "retstart": retstart,
+            "retmax": retmax,
+            "retmode": "xml",
+            **filters
+        })
+        root = ElementTree.fromstring(content)
+        count = int(root.findtext("Count", default="0"))
+        return count, [id_elem.text for id_elem in root.findall(".//Id")]
+
+    async def search(self, term, max_results=300, page_size=100, **filters):
+        """
+        Collects up to `max_results` PMIDs. The first page tells us the total
+        hit count; the remaining pages are then requested concurrently.
+        """
+        count, pmid_list = await self.esearch(term, 0, min(page_size, max_results), **filters)
+        last = min(count, max_results)
+        pages = await asyncio.gather(*(
+            self.esearch(term, start, min(page_size, last - start), **filters)
+            for start in range(len(pmid_list), last, page_size)
+        )) if pmid_list else []
+        for _, ids in pages:
+            pmid_list.extend(ids)
+        return pmid_list[:max_results]
+
+    async def esearch_history(self, term):
+        """
+        Runs the search once on NCBI's history server.
+        Returns (total hit count, WebEnv, query_key).
+        """
+        content = await self._get("esearch.fcgi", {
+            "term": term,
+            "usehistory": "y",
+            "retmax": 0,
+            "retmode": "xml"
+        })
+        root = ElementTree.fromstring(content)
+        return int(root.findtext("Count", default="0")), root.findtext("WebEnv"), root.findtext("QueryKey")
+
+    # ---------- EFETCH ----------
+    async def efetch(self, pmid_list):
+        return await self._get("efetch.fcgi", {
+            "id": ",".join(pmid_list),
+            "retmode": "xml"
+        })
+
+    async def fetch(self, pmid_list, batch_size=100):
+        """
+        Fetches efetch XML for all PMIDs in concurrent batches, returned in order.
+        """
+        return await asyncio.gather(*(
+            self.efetch(pmid_list[i:i + batch_size])
+            for i in range(0, len(pmid_list), batch_size)
+        ))
+
+    async def efetch_history(self, webenv, query_key, retstart, retmax=HISTORY_PAGE_SIZE):
+        """
+        Fetches one page of a history-server result set; no PMIDs are sent.
+        """
+        return await self._get("efetch.fcgi", {
+            "WebEnv": webenv,
+            "query_key": query_key,
+            "retstart": retstart,
+            "retmax": retmax,
+            "retmode": "xml"
+        })
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def date_filter(since):
+    """
+    esearch filters for records added to PubMed (Entrez date) on or after
+    the day of timestamp `since`. NCBI requires maxdate along with mindate.
+    """
+    return {
+        "datetype": "edat",
+        "mindate": time.strftime("%Y/%m/%d", time.gmtime(since)),
+        "maxdate": "3000"
+    }
+
+
+# ---------- SYNC BRIDGE ----------
+_loop = None
+_client = None
+_lock = threading.Lock()
+
+
+def _event_loop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="pubmed-client", daemon=True).start()
+        return _loop
+
+
+def configure_client(**kwargs):
+    """
+    Replaces the process-wide client, e.g. to point it at another base_url or rate.
+    """
+    global _client
+    with _lock:
+        old_client, _client = _client, AsyncPubMedClient(**kwargs)
+    if old_client is not None:
+        run_sync(old_client.aclose())
+    return _client
+
+
+def get_client():
+    """
+    Returns the process-wide client whose connection pool is shared by all callers.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = AsyncPubMedClient()
+        return _client
+
+
+def run_sync(coro):
+    """
+    Runs a coroutine on the client's background event loop and waits for the result.
+    """
+    return submit(coro).result()
+
+
+def submit(coro):
+    """
+    Schedules a coroutine on the background event loop and returns a
+    concurrent.futures.Future for it.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop())
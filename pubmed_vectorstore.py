@@ -1,132 +1,734 @@
-from uuid import uuid4
+import os
+import json
+import hashlib
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_chroma import Chroma
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQAWithSourcesChain
-from langchain_groq import ChatGroq
-from langchain_community.docstore.document import Document
-from prompt import PROMPT, EXAMPLE_PROMPT
+import threading
+from functools import cache
+import metrics
+from pipeline import Pipeline
+from answer_stream import AnswerStream
+from articles import Article
+from namespaces import NamespaceEvicted, NamespaceRegistry
+# langchain, Chroma, Groq and the embedding model are imported on first use,
+# so importing this module (and starting the front ends) stays fast
 
 # Load environment variables (for Groq API key, etc.)
 load_dotenv()
 
 # ---------- CONSTANTS ----------
+LLM_MODEL = "llama-3.3-70b-versatile"
 CHUNK_SIZE = 1000
+# "sections": chunks aligned to abstract sections (section_chunking.py);
+# "recursive": fixed-size overlapping windows over the flattened abstract
+CHUNKING = os.getenv("CHUNKING", "sections")
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Embedding backend tuning for CPU hosts (see embedding_backends.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0")) or None
 VECTORSTORE_DIR = Path(__file__).parent / "resources" / "vectorstore"
 COLLECTION_NAME = "mediassist_articles"
+# "chroma": persistent HNSW collection; "numpy": exact in-memory matrix (numpy_vectorstore.py),
+# saved with the BM25 index
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float32")  # numpy backend: float32 | float16
+NUMPY_STORE_DIR = VECTORSTORE_DIR / "numpy"
+INGEST_BATCH_SIZE = 50  # articles per pipeline batch
+MANIFEST_FILE = VECTORSTORE_DIR / "manifest.json"
+BM25_INDEX_FILE = VECTORSTORE_DIR / "bm25.pkl"
+EMBEDDING_CACHE_DIR = Path(__file__).parent / "resources" / "embedding_cache"
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000  # ~150 MB of float16 MiniLM vectors
+# Retrieval depth, dense search type and context size sent to the LLM
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+RETRIEVAL_SEARCH_TYPE = os.getenv("RETRIEVAL_SEARCH_TYPE", "similarity")  # similarity | mmr | similarity_score_threshold
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))
+RETRIEVAL_LAMBDA_MULT = float(os.getenv("RETRIEVAL_LAMBDA_MULT", "0.5"))
+RETRIEVAL_SCORE_THRESHOLD = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.2"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")) or None  # 0 disables the limit
+# Default abstract sections to retrieve from, e.g. "RESULTS,CONCLUSIONS"; empty for all
+RETRIEVAL_SECTIONS = os.getenv("RETRIEVAL_SECTIONS", "")
+# Extractive compression of retrieved chunks to their most relevant sentences
+CONTEXT_COMPRESSION = os.getenv("CONTEXT_COMPRESSION", "true").lower() in ("1", "true", "yes")
+CONTEXT_MAX_SENTENCES = int(os.getenv("CONTEXT_MAX_SENTENCES", "12"))
+ANSWER_CACHE_FILE = Path(__file__).parent / "resources" / "cache" / "answers.sqlite3"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # cosine similarity
+ANSWER_CACHE_MAX_ENTRIES = 1000
+# Per-session retrieval scopes and the size budget of the shared index
+DEFAULT_NAMESPACE = "default"
+MAX_NAMESPACES = int(os.getenv("MAX_NAMESPACES", "64"))
+NAMESPACE_IDLE_TTL = float(os.getenv("NAMESPACE_IDLE_TTL", "3600"))  # seconds
+INDEX_MAX_ARTICLES = int(os.getenv("INDEX_MAX_ARTICLES", "20000"))  # bounds Chroma disk and BM25 memory
+# Load the models in a background thread as soon as a front end starts
+WARM_UP = os.getenv("WARM_UP", "true").lower() in ("1", "true", "yes")
 
 llm = None
 vector_store = None
+bm25_index = None
+answer_cache = None
+qa_engine = None
+# Article set (and its corpus fingerprint) each session retrieves from
+namespaces = NamespaceRegistry(max_namespaces=MAX_NAMESPACES, idle_ttl=NAMESPACE_IDLE_TTL)
+
+_init_lock = threading.Lock()  # warm-up thread and callers may initialize concurrently
+_ingest_lock = threading.Lock()  # one ingestion at a time updates the collection, BM25 index and manifest
+_warm_up_thread = None
+
 
 # ---------- INITIALIZATION ----------
 def initialize_components():
     """
-    Initializes the LLM and the Chroma vector store.
+    Initializes the LLM, the vector store (Chroma or NumPy, see
+    VECTOR_STORE_BACKEND), the BM25 index kept next to it, the semantic answer cache and the QA engine built on top of them.
+
+    Safe to call from several threads; components are created once per
+    process and shared by every caller.
     """
-    global llm, vector_store
+    global llm, vector_store, bm25_index, answer_cache, qa_engine
 
-    if llm is None:
-        llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=2000
-        )
+    with _init_lock:
+        if llm is None:
+            from langchain_groq import ChatGroq
 
-    if vector_store is None:
-        ef = HuggingFaceEmbeddings(
-            model=EMBEDDING_MODEL,
-            model_kwargs={"trust_remote_code": True},
-        )
-        vector_store = Chroma(
+            llm = ChatGroq(
+                model=LLM_MODEL,
+                temperature=0.3,
+                max_tokens=2000
+            )
+
+        if vector_store is None:
+            vector_store = create_vector_store()
+
+        if bm25_index is None:
+            from hybrid_retrieval import BM25Index
+
+            bm25_index = BM25Index.load(BM25_INDEX_FILE)
+
+        if answer_cache is None:
+            from answer_cache import SemanticAnswerCache
+
+            answer_cache = SemanticAnswerCache(
+                ANSWER_CACHE_FILE,
+                threshold=ANSWER_CACHE_THRESHOLD,
+                max_entries=ANSWER_CACHE_MAX_ENTRIES
+            )
+
+        if qa_engine is None:
+            from qa_engine import QAEngine
+            from context_compression import ContextCompressor
+            from embedding_cache import CachedEmbeddings
+
+            # Compression caches sentence vectors in memory; persisting them
+            # would evict chunk vectors from the embedding cache
+            sentence_embeddings = vector_store.embeddings
+            if isinstance(sentence_embeddings, CachedEmbeddings):
+                sentence_embeddings = sentence_embeddings.embeddings
+
+            qa_engine = QAEngine(
+                llm,
+                vector_store,
+                bm25_index,
+                k=RETRIEVAL_K,
+                search_type=RETRIEVAL_SEARCH_TYPE,
+                fetch_k=RETRIEVAL_FETCH_K,
+                lambda_mult=RETRIEVAL_LAMBDA_MULT,
+                score_threshold=RETRIEVAL_SCORE_THRESHOLD,
+                context_tokens=CONTEXT_TOKEN_BUDGET,
+                compressor=ContextCompressor(
+                    sentence_embeddings,
+                    max_sentences=CONTEXT_MAX_SENTENCES
+                ) if CONTEXT_COMPRESSION else None
+            )
+
+
+def create_vector_store(backend=None, embeddings=None):
+    """
+    The configured vector store over `embeddings` (by default the cached
+    embedding model).
+    """
+    backend = backend or VECTOR_STORE_BACKEND
+    embeddings = embeddings or create_embeddings()
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+
+        return Chroma(
             collection_name=COLLECTION_NAME,
-            embedding_function=ef,
+            embedding_function=embeddings,
             persist_directory=str(VECTORSTORE_DIR)
         )
+    if backend == "numpy":
+        from numpy_vectorstore import NumpyVectorStore
+
+        return NumpyVectorStore.load(NUMPY_STORE_DIR, embeddings, dtype=VECTOR_STORE_DTYPE)
+    raise ValueError(f"Unknown vector store backend {backend!r}; expected 'chroma' or 'numpy'")
+
+
+def save_vector_store():
+    """
+    Chroma persists every write itself; the NumPy store is written out here,
+    together with the BM25 index. Call with the ingestion lock held.
+    """
+    if VECTOR_STORE_BACKEND == "numpy":
+        vector_store.save()
+
+
+def create_embeddings(backend=None):
+    """
+    The configured embedding model wrapped in the persistent embedding cache.
+    """
+    from embedding_backends import make_embeddings
+    from embedding_cache import CachedEmbeddings
+
+    backend = backend or EMBEDDING_BACKEND
+    # Quantized backends produce different vectors, so they get their own cache entries
+    cache_model_name = EMBEDDING_MODEL if not backend.endswith("int8") \
+        else f"{EMBEDDING_MODEL}@{backend}"
+    return CachedEmbeddings(
+        make_embeddings(
+            EMBEDDING_MODEL,
+            backend=backend,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            num_threads=EMBEDDING_THREADS
+        ),
+        model_name=cache_model_name,
+        cache_dir=EMBEDDING_CACHE_DIR,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+    )
+
+
+def warm_up(background=True):
+    """
+    Initializes the components and runs one embedding so the model weights
+    are loaded before the first real question. With background=True this
+    happens in a daemon thread (started once per process) and the thread is
+    returned; callers needing the components just call them, as
+    `initialize_components` waits for an initialization in progress.
+    """
+    global _warm_up_thread
+
+    def run():
+        initialize_components()
+        vector_store.embeddings.embed_query("warm-up")
+
+    if not background:
+        run()
+        return None
+    with _init_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=run, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def embedding_cache_stats():
+    """
+    Hit rate and on-disk size of the embedding cache (None before initialization).
+    """
+    if vector_store is None:
+        return None
+    return vector_store.embeddings.stats()
+
+
+# ---------- INDEX MANIFEST ----------
+def load_manifest():
+    """
+    Returns the manifest of indexed articles: {pmid: {"hash": ..., "ids": [...]}}.
+    """
+    if MANIFEST_FILE.exists():
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest):
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = MANIFEST_FILE.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    tmp_file.replace(MANIFEST_FILE)
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def document_hash(doc):
+    """
+    Hash of an article document's content and metadata; a change means the
+    article must be re-embedded. Includes the chunking strategy, as
+    switching it changes every chunk (recursive chunks predate the setting).
+    """
+    strategy = "" if CHUNKING == "recursive" else CHUNKING
+    return content_hash(doc.page_content + json.dumps(doc.metadata, sort_keys=True) + strategy)
+
+
+def chunk_id(pmid, text):
+    """
+    Deterministic chunk ID: the same chunk of the same article always maps
+    to the same ID, so re-ingesting it is a no-op.
+    """
+    return f"{pmid}-{content_hash(text)[:16]}"
+
+
+def scope_filter(pmids):
+    """
+    Chroma metadata filter restricting retrieval to the given PMIDs.
+    """
+    pmids = list(pmids)
+    if not pmids:
+        # Chroma rejects an empty $in list; match nothing instead
+        return {"pmid": ""}
+    return {"pmid": {"$in": pmids}}
+
+
+def article_metadata(article):
+    return {
+        "pmid": article.pmid,
+        "journal": article.journal,
+        "authors": article.authors,
+        "publication_date": article.publication_date,
+        "source": f"https://pubmed.ncbi.nlm.nih.gov/{article.pmid}/"
+    }
+
+
+def article_to_document(article):
+    if not isinstance(article, Article):
+        article = Article.from_dict(article)
+    # Combine title and abstract into a single text block
+    abstract_text = " ".join(article.section_texts)
+    content = f"Title: {article.title}\n\nAbstract: {abstract_text}"
+
+    from langchain_core.documents import Document
+
+    return Document(page_content=content, metadata=article_metadata(article))
+
+
+def split_articles(articles, chunking=None):
+    """
+    Chunk documents of the given articles, split with the configured
+    CHUNKING strategy (or `chunking`).
+    """
+    from langchain_core.documents import Document
+
+    chunking = chunking or CHUNKING
+    articles = [article if isinstance(article, Article) else Article.from_dict(article) for article in articles]
+    if chunking == "recursive":
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        text_splitter = RecursiveCharacterTextSplitter(
+            separators=["\n\n", "\n", ".", " "],
+            chunk_size=CHUNK_SIZE
+        )
+        return text_splitter.split_documents([article_to_document(article) for article in articles])
+    if chunking == "sections":
+        from section_chunking import SectionChunker
+
+        chunker = SectionChunker(CHUNK_SIZE)
+        return [
+            Document(page_content=content, metadata=metadata)
+            for article in articles
+            for content, metadata in chunker.split(article, article_metadata(article))
+        ]
+    raise ValueError(f"Unknown chunking strategy {chunking!r}; expected 'sections' or 'recursive'")
+
 
 # ---------- VECTOR CREATION ----------
-def process_pubmed_articles(articles):
+def _article_batches(articles, batch_size=INGEST_BATCH_SIZE):
+    """
+    Normalises the input of process_pubmed_articles into article batches.
+    Accepts a flat iterable of articles or an iterable of article pages
+    (e.g. PubMedRetriever.stream_pubmed_abstracts).
+    """
+    batch = []
+    for item in articles:
+        if isinstance(item, (list, tuple)):
+            if batch:
+                yield batch
+                batch = []
+            for i in range(0, len(item), batch_size):
+                yield list(item[i:i + batch_size])
+        else:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def process_pubmed_articles(articles, incremental=True, namespace=DEFAULT_NAMESPACE):
     """
     Takes a list of article dictionaries (from PubMedRetriever)
     and stores them as vector embeddings in the Chroma DB.
+
+    `articles` may also be an iterable of article pages that is still being
+    fetched: fetching, chunking and embedding run as pipelined stages over
+    bounded queues, so the first batch is embedded while later pages are
+    still downloading. Progress messages are yielded as each stage advances.
+
+    In incremental mode only articles that are new or whose content changed
+    are embedded; everything else is reused from the collection. Pass
+    incremental=False to re-embed every given article.
+
+    The collection is shared: afterwards `namespace` (one per user session)
+    retrieves from exactly this article set, without affecting other
+    namespaces. Ingestions run one at a time.
     """
+    if not _ingest_lock.acquire(blocking=False):
+        yield "Waiting for another ingestion to finish..."
+        _ingest_lock.acquire()
+    try:
+        yield from _ingest(articles, incremental, namespace)
+    finally:
+        _ingest_lock.release()
+
 
+def _ingest(articles, incremental, namespace):
     yield "Initializing components..."
     initialize_components()
 
-    vector_store.reset_collection()
+    manifest = load_manifest()
     yield "Processing articles..."
 
-    docs = []
-    for article in articles:
-        # Combine title and abstract into a single text block
-        abstract_text = " ".join(article["abstract"].values())
-        content = f"Title: {article['title']}\n\nAbstract: {abstract_text}"
-
-        metadata = {
-            "pmid": article["pmid"],
-            "journal": article["journal"],
-            "authors": article["authors"],
-            "publication_date": article["publication_date"],
-            "source": f"https://pubmed.ncbi.nlm.nih.gov/{article['pmid']}/"
+    pmids = []
+    seen_pmids = set()
+
+    def chunk(batch):
+        with metrics.span("chunk") as span:
+            result = _chunk(batch)
+            span.add(len(result["docs"]))
+        return result
+
+    def _chunk(batch):
+        articles_by_pmid = {}
+        article_hashes = {}
+        for article in batch:
+            if not isinstance(article, Article):
+                article = Article.from_dict(article)
+            pmid = article.pmid
+            if pmid in seen_pmids:
+                continue
+            seen_pmids.add(pmid)
+            pmids.append(pmid)
+            articles_by_pmid[pmid] = article
+            article_hashes[pmid] = document_hash(article_to_document(article))
+
+        unchanged = [
+            pmid for pmid in articles_by_pmid
+            if incremental and manifest.get(pmid, {}).get("hash") == article_hashes[pmid]
+        ]
+        # The manifest can outlive the collection (e.g. a deleted vectorstore directory),
+        # so confirm the chunks it lists are actually present before trusting it.
+        if unchanged:
+            known_ids = [id_ for pmid in unchanged for id_ in manifest[pmid]["ids"]]
+            present_ids = set(vector_store.get(ids=known_ids, include=[])["ids"])
+            unchanged = [pmid for pmid in unchanged if present_ids.issuperset(manifest[pmid]["ids"])]
+        unchanged = set(unchanged)
+
+        changed = []
+        stale_ids = []
+        lexical_only = []
+        for pmid, article in articles_by_pmid.items():
+            if pmid in unchanged:
+                # Already embedded; only backfill the BM25 index if it lacks these chunks
+                if not all(id_ in bm25_index for id_ in manifest[pmid]["ids"]):
+                    lexical_only.append(article)
+                continue
+            if pmid in manifest:
+                stale_ids.extend(manifest[pmid]["ids"])
+            changed.append(article)
+
+        split_docs = []
+        ids = []
+        seen_ids = set()
+        for doc in split_articles(changed):
+            id_ = chunk_id(doc.metadata["pmid"], doc.page_content)
+            if id_ in seen_ids:
+                continue
+            seen_ids.add(id_)
+            split_docs.append(doc)
+            ids.append(id_)
+
+        lexical_docs = split_articles(lexical_only)
+
+        return {
+            "articles": len(articles_by_pmid),
+            "reused": len(unchanged),
+            "docs": split_docs,
+            "ids": ids,
+            "stale_ids": stale_ids,
+            "hashes": article_hashes,
+            "lexical_docs": lexical_docs
         }
 
-        docs.append(Document(page_content=content, metadata=metadata))
+    def embed(batch):
+        # Embedding itself is timed inside this span, as "embed" (embedding_cache.py)
+        with metrics.span("vector_store_add") as span:
+            if batch["stale_ids"]:
+                vector_store.delete(ids=batch["stale_ids"])
+            if batch["docs"]:
+                vector_store.add_documents(batch["docs"], ids=batch["ids"])
+            span.add(len(batch["docs"]))
+        return batch
 
-    # Split long abstracts if needed
-    yield "Splitting text into chunks..."
-    text_splitter = RecursiveCharacterTextSplitter(
-        separators=["\n\n", "\n", ".", " "],
-        chunk_size=CHUNK_SIZE
+    fetched = reused = chunks = 0
+    pipeline = Pipeline(
+        _article_batches(articles),
+        [("chunk", chunk), ("embed", embed)],
+        source_name="fetch"
     )
+    for stage, batch in pipeline.run():
+        if stage == "fetch":
+            fetched += len(batch)
+            yield f"Received {fetched} articles..."
+        elif stage == "chunk":
+            reused += batch["reused"]
+            yield f"Split {batch['articles'] - batch['reused']} new or changed articles into {len(batch['docs'])} chunks..."
+        else:
+            chunks += len(batch["docs"])
+            new_ids = {}
+            for doc, id_ in zip(batch["docs"], batch["ids"]):
+                new_ids.setdefault(doc.metadata["pmid"], []).append(id_)
+            for pmid, chunk_ids in new_ids.items():
+                manifest[pmid] = {"hash": batch["hashes"][pmid], "ids": chunk_ids}
 
-    split_docs = text_splitter.split_documents(docs)
-    uuids = [str(uuid4()) for _ in range(len(split_docs))]
+            lexical_docs = batch["docs"] + batch["lexical_docs"]
+            with metrics.span("bm25_add") as span:
+                bm25_index.delete(batch["stale_ids"])
+                bm25_index.add(
+                    batch["ids"] + [chunk_id(doc.metadata["pmid"], doc.page_content) for doc in batch["lexical_docs"]],
+                    [doc.page_content for doc in lexical_docs],
+                    [doc.metadata["pmid"] for doc in lexical_docs]
+                )
+                span.add(len(lexical_docs))
+            yield f"Added {chunks} chunks to the vector store..."
 
-    yield f"Adding {len(split_docs)} chunks to the vector store..."
-    vector_store.add_documents(split_docs, ids=uuids)
+    now = time.time()
+    for pmid in pmids:
+        if pmid in manifest:
+            manifest[pmid]["last_used"] = now
+    namespaces.assign(namespace, pmids, corpus_version(pmids, manifest))
+    # Other namespaces sharing a re-embedded article must not keep serving answers from its old version
+    namespaces.refresh_corpus(pmids, lambda scope: corpus_version(scope, manifest))
+    removed = _enforce_index_budget(manifest, keep=namespace)
 
+    with metrics.span("save_index"):
+        save_manifest(manifest)
+        bm25_index.save()
+        save_vector_store()
+    metrics.count("ingested_articles", reused, result="reused")
+    metrics.count("ingested_articles", len(pmids) - reused, result="embedded")
+
+    yield f"{reused} articles already indexed, {len(pmids) - reused} new or changed."
+    if removed:
+        yield f"Removed {removed} articles no session uses to stay within the index budget."
     yield "✅ Done adding PubMed articles to vector DB."
 
+def _enforce_index_budget(manifest, keep=None):
+    """
+    Removes articles from the collection, BM25 index and manifest until at
+    most INDEX_MAX_ARTICLES remain: first those no namespace references
+    (least recently ingested first), then those freed by evicting the least
+    recently used namespaces other than `keep`. Returns the number removed.
+    Call with the ingestion lock held.
+    """
+    excess = len(manifest) - INDEX_MAX_ARTICLES
+    if excess <= 0:
+        return 0
+
+    while True:
+        referenced = namespaces.referenced_pmids()
+        candidates = [pmid for pmid in manifest if pmid not in referenced]
+        if len(candidates) >= excess or namespaces.evict_lru(keep=keep) is None:
+            break
+
+    candidates.sort(key=lambda pmid: manifest[pmid].get("last_used", 0))
+    removed_ids = [id_ for pmid in candidates[:excess] for id_ in manifest.pop(pmid)["ids"]]
+    if removed_ids:
+        vector_store.delete(ids=removed_ids)
+        bm25_index.delete(removed_ids)
+    return len(candidates[:excess])
+
+
+def reset_index():
+    """
+    Empties the collection, BM25 index and manifest and forgets every
+    namespace. Affects all sessions.
+    """
+    initialize_components()
+    with _ingest_lock:
+        vector_store.reset_collection()
+        bm25_index.clear()
+        bm25_index.save()
+        save_manifest({})
+        namespaces.clear()
+
+
+@cache
+def answer_cache_salt():
+    """
+    Cached answers are only valid for the same model, prompts and retrieval settings.
+    """
+    from prompt import PROMPT, EXAMPLE_PROMPT
+
+    return hashlib.sha1(
+        f"{LLM_MODEL}|{PROMPT.template}|{EXAMPLE_PROMPT.template}|{RETRIEVAL_K}|{RETRIEVAL_SEARCH_TYPE}|"
+        f"{RETRIEVAL_FETCH_K}|{RETRIEVAL_LAMBDA_MULT}|{RETRIEVAL_SCORE_THRESHOLD}|{CONTEXT_TOKEN_BUDGET}|"
+        f"{CONTEXT_COMPRESSION}|{CONTEXT_MAX_SENTENCES}".encode("utf-8")
+    ).hexdigest()
+
+
+def corpus_version(pmids=None, manifest=None):
+    """
+    Fingerprint of the indexed content of the given PMIDs (all indexed
+    articles when None). Changes whenever any of those articles changes.
+    """
+    if manifest is None:
+        manifest = load_manifest()
+    from answer_cache import corpus_fingerprint
+
+    scope = manifest if pmids is None else pmids
+    return corpus_fingerprint(
+        ((pmid, manifest.get(pmid, {}).get("hash")) for pmid in scope),
+        salt=answer_cache_salt()
+    )
+
+
 # ---------- QUERY FUNCTION ----------
-def generate_answer(query):
+def _sections(sections):
     """
-    Uses the vector DB to retrieve relevant articles
-    and generate an LLM-based answer with sources.
+    Canonical section names to retrieve from: `sections` when given,
+    otherwise RETRIEVAL_SECTIONS; an empty list means all sections.
     """
-    if not vector_store:
-        raise RuntimeError("Vector database is not initialized")
+    from section_chunking import parse_sections
 
-    chain = RetrievalQAWithSourcesChain.from_chain_type(
-        llm=llm,
-        chain_type="stuff",
-        retriever=vector_store.as_retriever(),
-        return_source_documents=True,
-        chain_type_kwargs={
-            "prompt": PROMPT,
-            "document_prompt": EXAMPLE_PROMPT,
-            "document_variable_name": "summaries"
-        }
+    return parse_sections(RETRIEVAL_SECTIONS if sections is None else sections)
+
+
+def _cached_answer(query, pmids, namespace, use_cache, sections):
+    """
+    Resolves the retrieval scope and looks the question up in the answer
+    cache. Returns (pmids, cache key, cached answer or None). Raises
+    NamespaceEvicted when `namespace` has no articles.
+    """
+    corpus = None
+    if pmids is None:
+        scope = namespaces.get(namespace)
+        if scope is None:
+            # Never fall back to the whole collection: it holds other sessions' articles
+            raise NamespaceEvicted(namespace)
+        pmids, corpus = scope["pmids"], scope["corpus"]
+    if not use_cache:
+        return pmids, None, None
+
+    if corpus is None:
+        corpus = corpus_version(pmids)
+    if sections:
+        # Answers from a section subset are not answers from the whole abstracts
+        corpus = f"{corpus}|{','.join(sorted(sections))}"
+    with metrics.span("answer_cache_lookup"):
+        cache_key = (vector_store.embeddings.embed_query(query), corpus)
+        cached = answer_cache.lookup(*cache_key)
+    metrics.count("answer_cache", result="hit" if cached is not None else "miss")
+    return pmids, cache_key, cached
+
+
+def _retrieve(query, pmids, sections):
+    # Dense + BM25 retrieval fused with reciprocal rank fusion, within the context budget
+    from section_chunking import section_filter
+
+    filters = []
+    if pmids is not None:
+        filters.append(scope_filter(pmids))
+    if sections:
+        filters.append(section_filter(sections))
+    return qa_engine.retrieve(
+        query,
+        filter=(filters[0] if len(filters) == 1 else {"$and": filters}) if filters else None,
+        pmids=list(pmids) if pmids is not None else None,
+        sections=sections or None
     )
 
-    result = chain.invoke({"question": query}, return_only_outputs=True)
 
+def _sources(docs):
+    """
+    Unique source URLs of the retrieved documents, in retrieval order, and
+    the content of the first one.
+    """
     # Extract unique sources by using a set to track PMIDs we've seen
     unique_sources = []
     seen_sources = set()
 
-    for doc in result["source_documents"]:
+    for doc in docs:
         source_url = doc.metadata["source"]
         if source_url not in seen_sources:
             seen_sources.add(source_url)
             unique_sources.append(source_url)
 
-    first_doc_content = (
-        result["source_documents"][0].page_content
-        if result["source_documents"]
-        else None
-    )
+    first_doc_content = docs[0].page_content if docs else None
+    return unique_sources, first_doc_content
+
+
+def generate_answer(query, pmids=None, use_cache=True, namespace=DEFAULT_NAMESPACE, sections=None):
+    """
+    Uses the vector DB to retrieve relevant articles
+    and generate an LLM-based answer with sources.
+
+    Retrieval fuses vector and BM25 results and is limited to `pmids`
+    when given, otherwise to the articles of the last
+    `process_pubmed_articles` call for `namespace` (NamespaceEvicted is
+    raised when it has none). `sections` (e.g. ["RESULTS", "CONCLUSIONS"])
+    restricts it to chunks of those abstract sections plus
+    unstructured abstracts; it defaults to RETRIEVAL_SECTIONS.
+
+    Paraphrases of a question already answered against the same corpus
+    version are served from the semantic answer cache without an LLM call.
+    """
+    if not vector_store or qa_engine is None:
+        raise RuntimeError("Vector database is not initialized")
+
+    sections = _sections(sections)
+    pmids, cache_key, cached = _cached_answer(query, pmids, namespace, use_cache, sections)
+    if cached is not None:
+        return cached["answer"], cached["sources"], cached["first_doc"]
+
+    docs = _retrieve(query, pmids, sections)
+    answer = qa_engine.answer(query, docs)
+    unique_sources, first_doc_content = _sources(docs)
+
+    if cache_key is not None:
+        answer_cache.put(query, *cache_key, answer, unique_sources, first_doc_content)
+
+    return answer, unique_sources, first_doc_content
+
+
+def stream_answer(query, pmids=None, use_cache=True, namespace=DEFAULT_NAMESPACE, sections=None):
+    """
+    Streaming variant of `generate_answer`.
+
+    Returns an AnswerStream: iterate it to receive answer text as the LLM
+    generates it; afterwards its `answer`, `sources` and `first_doc` hold
+    what `generate_answer` would have returned and `ttft` the
+    time-to-first-token in seconds.
+    """
+    if not vector_store or qa_engine is None:
+        raise RuntimeError("Vector database is not initialized")
+
+    started = time.perf_counter()
+    sections = _sections(sections)
+    pmids, cache_key, cached = _cached_answer(query, pmids, namespace, use_cache, sections)
+    if cached is not None:
+        return AnswerStream(iter([cached["answer"]]), cached["sources"], cached["first_doc"], started)
+
+    docs = _retrieve(query, pmids, sections)
+    unique_sources, first_doc_content = _sources(docs)
+    chunks = qa_engine.stream(query, docs)
+
+    def on_complete(stream):
+        metrics.observe("ttft_seconds", stream.ttft)
+        metrics.observe("answer_seconds", stream.total_time)
+        if cache_key is not None:
+            answer_cache.put(query, *cache_key, stream.answer, stream.sources, stream.first_doc)
 
-    return result["answer"], unique_sources, first_doc_content
\ No newline at end of file
+    return AnswerStream(chunks, unique_sources, first_doc_content, started, on_complete)
@@ -0,0 +1,114 @@
+"""
+qa_engine.py — Long-lived question answering engine
+
+The prompt -> LLM chain and the retriever configuration are built once and
+reused for every question; only the PMID scope changes per call. Retrieved
+chunks are optionally compressed to their most relevant sentences (see
+context_compression.py), then formatted with EXAMPLE_PROMPT and trimmed to a
+context token budget before they are stuffed into PROMPT, so prompt size
+(and with it LLM latency and cost) stays bounded however many chunks
+retrieval returns.
+"""
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import format_document
+
+import metrics
+from answer_stream import strip_sources
+from hybrid_retrieval import HybridRetriever
+from prompt import PROMPT, EXAMPLE_PROMPT
+
+DOCUMENT_SEPARATOR = "\n\n"  # as in the "stuff" documents chain
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (~4 characters per token for English text); avoids
+    loading a tokenizer for the LLM served remotely.
+    """
+    return (len(text) + 3) // 4
+
+
+class QAEngine:
+    def __init__(self, llm, vector_store, bm25_index, k=4, search_type="similarity", fetch_k=20,
+                 lambda_mult=0.5, score_threshold=0.0, context_tokens=None, compressor=None,
+                 prompt=PROMPT, document_prompt=EXAMPLE_PROMPT):
+        """
+        k: chunks passed to the LLM (before the token budget is applied).
+        search_type: "similarity", "mmr" or "similarity_score_threshold".
+        context_tokens: budget for the formatted context; None for no limit.
+        compressor: optional ContextCompressor applied before the budget.
+        """
+        self.retriever = HybridRetriever(
+            vector_store=vector_store,
+            bm25_index=bm25_index,
+            k=k,
+            dense_k=max(k, 10),
+            lexical_k=max(k, 10),
+            search_type=search_type,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            score_threshold=score_threshold
+        )
+        self.context_tokens = context_tokens
+        self.compressor = compressor
+        self.document_prompt = document_prompt
+        self.chain = prompt | llm | StrOutputParser()
+
+    def retrieve(self, query, filter=None, pmids=None, sections=None):
+        """
+        Chunks for the question, best first, within the context budget.
+        `filter` must already include the section filter for `sections`.
+        """
+        retriever = self.retriever.model_copy(update={"filter": filter, "pmids": pmids, "sections": sections})
+        with metrics.span("retrieve", search_type=self.retriever.search_type) as span:
+            docs = retriever.invoke(query)
+            span.add(len(docs))
+        if self.compressor is not None:
+            with metrics.span("compress") as span:
+                docs = self.compressor.compress(query, docs)
+                span.add(len(docs))
+        return self.fit_context(docs)
+
+    def fit_context(self, docs):
+        """
+        Keeps the best-ranked chunks whose formatted text fits the token
+        budget. The top chunk is always kept, truncated if it alone is over.
+        """
+        if self.context_tokens is None or not docs:
+            return docs
+        kept = []
+        used = 0
+        for doc in docs:
+            tokens = estimate_tokens(format_document(doc, self.document_prompt)) \
+                + estimate_tokens(DOCUMENT_SEPARATOR)
+            if used + tokens <= self.context_tokens:
+                kept.append(doc)
+                used += tokens
+        if not kept:
+            top = docs[0]
+            overhead = estimate_tokens(format_document(top.model_copy(update={"page_content": ""}),
+                                                       self.document_prompt))
+            chars = max(0, (self.context_tokens - overhead) * 4)
+            kept = [top.model_copy(update={"page_content": top.page_content[:chars]})]
+        return kept
+
+    def inputs(self, query, docs):
+        return {
+            "question": query,
+            "summaries": DOCUMENT_SEPARATOR.join(format_document(doc, self.document_prompt) for doc in docs)
+        }
+
+    def answer(self, query, docs):
+        """
+        Complete answer text for the question over the given chunks.
+        """
+        with metrics.span("llm"):
+            return strip_sources(self.chain.invoke(self.inputs(query, docs)))
+
+    def stream(self, query, docs):
+        """
+        Answer text chunks as the LLM generates them (including the
+        trailing sources line; see AnswerStream).
+        """
+        return self.chain.stream(self.inputs(query, docs))
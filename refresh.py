@@ -0,0 +1,136 @@
+"""
+refresh.py — Stale-while-revalidate refresh of cached PubMed queries
+
+Cached queries are always answered from the article cache right away. When
+a query was last refreshed more than `ttl` seconds ago, its search is re-run
+in a background thread, restricted to records added to PubMed since the
+last refresh (esearch datetype=edat with mindate/maxdate), so only new
+PMIDs are fetched. They are appended to the cached query and handed to
+`on_new_articles`, typically to index them before anyone asks again.
+
+    refresher = RefreshScheduler(article_store, on_new_articles=index_new_articles)
+    articles = article_store.get_query(query)
+    if articles is not None:
+        refresher.request(query)  # never blocks
+"""
+
+import os
+import queue
+import threading
+import time
+
+import metrics
+from pubmed import PubMedRetriever
+
+QUERY_REFRESH_TTL = float(os.getenv("QUERY_REFRESH_TTL", "86400"))  # seconds
+REFRESH_MAX_NEW = int(os.getenv("REFRESH_MAX_NEW", "100"))  # new articles per query and refresh
+
+
+class RefreshScheduler:
+    def __init__(self, store, ttl=QUERY_REFRESH_TTL, on_new_articles=None, max_new=REFRESH_MAX_NEW):
+        """
+        store: the ArticleStore holding the cached queries.
+        on_new_articles: optional callback(query, articles) run in the
+        background thread after new articles were stored.
+        """
+        self.store = store
+        self.ttl = ttl
+        self.on_new_articles = on_new_articles
+        self.max_new = max_new
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._timer = None
+        self._stopped = threading.Event()
+
+    # ---------- SCHEDULING ----------
+    def request(self, query):
+        """
+        Schedules a background refresh of a cached query if it is stale.
+        Returns True if a refresh was scheduled.
+        """
+        entry = self.store.query_pmids(query)
+        if entry is None or time.time() - entry[1] < self.ttl:
+            return False
+        return self._schedule(query)
+
+    def refresh_stale(self):
+        """
+        Schedules every stale cached query; returns how many were scheduled.
+        """
+        return sum(self._schedule(query) for query in self.store.stale_queries(self.ttl))
+
+    def start(self, interval=600):
+        """
+        Also checks for stale queries every `interval` seconds, for
+        long-running processes (the CLI only refreshes what it serves).
+        """
+
+        def loop():
+            while not self._stopped.wait(interval):
+                self.refresh_stale()
+
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Thread(target=loop, name="refresh-timer", daemon=True)
+                self._timer.start()
+
+    def wait(self):
+        """
+        Blocks until all scheduled refreshes have finished.
+        """
+        self._queue.join()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _schedule(self, query):
+        with self._lock:
+            if query in self._pending:
+                return False
+            self._pending.add(query)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="refresh", daemon=True)
+                self._worker.start()
+        self._queue.put(query)
+        return True
+
+    def _work(self):
+        while True:
+            query = self._queue.get()
+            try:
+                self.refresh(query)
+            except Exception as e:
+                # A failed refresh leaves the cached entry as it was; it is retried next time
+                print(f"⚠️ Background refresh of '{query}' failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(query)
+                self._queue.task_done()
+
+    # ---------- REFRESH ----------
+    def refresh(self, query):
+        """
+        Fetches the articles added to PubMed for `query` since its last
+        refresh, stores them and returns them. Runs in the caller's thread.
+        """
+        entry = self.store.query_pmids(query)
+        if entry is None:
+            return []
+        known, refreshed_at = entry
+        started = time.time()
+
+        with metrics.span("query_refresh") as span:
+            known = set(known)
+            pmids = PubMedRetriever.search_pubmed_articles(query, self.max_new, since=refreshed_at)
+            # mindate has day granularity, so the last day's records come back again
+            new_pmids = [pmid for pmid in pmids if pmid not in known]
+            articles = PubMedRetriever.fetch_pubmed_abstracts(new_pmids, store=self.store) if new_pmids else []
+            if not self.store.extend_query(query, [article.pmid for article in articles], refreshed_at=started):
+                return []  # evicted meanwhile
+            span.add(len(articles))
+
+        if articles and self.on_new_articles is not None:
+            self.on_new_articles(query, articles)
+        return articles
@@ -0,0 +1,185 @@
+"""
+section_chunking.py — Section-aware chunking of structured abstracts
+
+Most PubMed abstracts are structured (BACKGROUND, METHODS, RESULTS,
+CONCLUSIONS, ...). Instead of cutting the flattened abstract every
+CHUNK_SIZE characters with overlapping windows, SectionChunker emits chunks
+aligned to those sections: consecutive sections are packed together until
+the next one would not fit, a section longer than a chunk is split at
+sentence boundaries, and nothing is repeated between chunks except the
+title. This gives fewer, denser chunks to embed and store. The findings
+(RESULTS, CONCLUSIONS) start a chunk of their own unless what precedes them
+is short, so a findings chunk is not diluted by the background and methods.
+
+Free-text labels ("RESEARCH DESIGN AND METHODS", "MAIN OUTCOME MEASURES",
+...) are mapped to a few canonical sections, stored in the chunk metadata
+as boolean flags (Chroma metadata cannot hold lists), so retrieval can be
+restricted to e.g. RESULTS and CONCLUSIONS only:
+
+    filter = section_filter(["RESULTS", "CONCLUSIONS"])
+    vector_store.similarity_search(query, filter=filter)
+
+Unstructured abstracts become SUMMARY chunks, which every section filter
+matches, so articles without labels are never filtered out.
+"""
+
+from functools import lru_cache
+
+from context_compression import SENTENCE_BOUNDARY
+
+SUMMARY = "SUMMARY"  # unlabelled abstracts (see pubmed.py)
+OTHER = "OTHER"  # labels that match no canonical section, e.g. TRIAL REGISTRATION
+# Canonical sections and the label words that map to them, checked in order
+# ("MAIN OUTCOME MEASURES" is METHODS, not RESULTS)
+SECTION_KEYWORDS = (
+    ("BACKGROUND", ("BACKGROUND", "INTRODUCTION", "CONTEXT", "RATIONALE")),
+    ("OBJECTIVE", ("OBJECTIVE", "AIM", "PURPOSE", "GOAL", "HYPOTHES", "QUESTION")),
+    ("METHODS", ("METHOD", "DESIGN", "SETTING", "PARTICIPANT", "PATIENT", "SUBJECT", "MATERIAL",
+                 "INTERVENTION", "MEASURE", "PROCEDURE", "SOURCES", "SELECTION", "POPULATION")),
+    ("RESULTS", ("RESULT", "FINDING", "OUTCOME")),
+    ("CONCLUSIONS", ("CONCLUSION", "INTERPRETATION", "DISCUSSION", "IMPLICATION", "SIGNIFICANCE",
+                     "RELEVANCE")),
+)
+SECTIONS = tuple(section for section, _ in SECTION_KEYWORDS) + (OTHER, SUMMARY)
+FINDINGS = frozenset({"RESULTS", "CONCLUSIONS"})
+
+
+@lru_cache(maxsize=4096)
+def section_category(label):
+    """
+    Canonical section of an abstract label.
+    """
+    label = label.upper()
+    if label == SUMMARY or not label:
+        return SUMMARY
+    for section, keywords in SECTION_KEYWORDS:
+        if any(keyword in label for keyword in keywords):
+            return section
+    return OTHER
+
+
+def section_key(section):
+    """
+    Metadata key flagging chunks that contain `section`.
+    """
+    return f"section_{section.lower()}"
+
+
+def parse_sections(sections):
+    """
+    Canonical section names from a list or a comma-separated string
+    (e.g. the RETRIEVAL_SECTIONS setting); unknown names raise ValueError.
+    """
+    if isinstance(sections, str):
+        sections = sections.split(",")
+    parsed = []
+    for section in sections:
+        section = section.strip().upper()
+        if not section:
+            continue
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section {section!r}; expected one of {SECTIONS}")
+        if section not in parsed:
+            parsed.append(section)
+    return parsed
+
+
+def section_filter(sections):
+    """
+    Chroma metadata filter matching chunks that contain any of `sections`
+    or are unstructured (SUMMARY).
+    """
+    keys = [section_key(section) for section in parse_sections(sections)]
+    if section_key(SUMMARY) not in keys:
+        keys.append(section_key(SUMMARY))
+    conditions = [{key: True} for key in keys]
+    # Chroma requires at least two conditions in $or
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+def matches_sections(metadata, sections):
+    """
+    The same test as section_filter, on one chunk's metadata (e.g. for BM25 hits).
+    """
+    return bool(metadata.get(section_key(SUMMARY))) or any(
+        metadata.get(section_key(section)) for section in parse_sections(sections)
+    )
+
+
+class SectionChunker:
+    def __init__(self, chunk_size=1000, min_chunk_size=400, min_budget=200):
+        """
+        chunk_size: maximum characters per chunk, including the title.
+        min_chunk_size: sections before the findings shorter than this
+            (without the title) share a chunk with them.
+        min_budget: characters left for sections however long the title is.
+        """
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.min_budget = min_budget
+
+    def split(self, article, metadata):
+        """
+        (page content, metadata) pairs for one Article; `metadata` is the
+        article metadata shared by all of its chunks.
+        """
+        header = f"Title: {article.title}\n\n"
+        budget = max(self.min_budget, self.chunk_size - len(header))
+
+        chunks = []
+        current = []
+        size = 0
+        for section, block in self._blocks(article, budget):
+            added = len(block) + (2 if current else 0)
+            starts_findings = section in FINDINGS and not any(other in FINDINGS for other, _ in current)
+            if current and (size + added > budget or starts_findings and size >= self.min_chunk_size):
+                chunks.append(current)
+                current, size, added = [], 0, len(block)
+            current.append((section, block))
+            size += added
+        if current:
+            chunks.append(current)
+
+        pairs = []
+        for chunk in chunks:
+            sections = list(dict.fromkeys(section for section, _ in chunk))
+            chunk_metadata = dict(metadata, sections=", ".join(sections))
+            chunk_metadata.update((section_key(section), True) for section in sections)
+            pairs.append((header + "\n\n".join(block for _, block in chunk), chunk_metadata))
+        return pairs
+
+    def _blocks(self, article, budget):
+        """
+        ("SECTION", "LABEL: text") blocks of at most `budget` characters;
+        long sections are split at sentence boundaries (and, for sentences
+        longer than a chunk, at the last space that fits).
+        """
+        labels = article.section_labels or (SUMMARY,)
+        texts = article.section_texts or ("",)
+        for label, text in zip(labels, texts):
+            section = section_category(label)
+            prefix = "Abstract: " if section == SUMMARY else f"{label}: "
+            block = prefix + text
+            if len(block) <= budget:
+                yield section, block
+                continue
+
+            current = prefix
+            for sentence in self._pieces(text, budget - len(prefix)):
+                if current != prefix and len(current) + 1 + len(sentence) > budget:
+                    yield section, current
+                    current = prefix
+                current += sentence if current == prefix else " " + sentence
+            if current != prefix:
+                yield section, current
+
+    @staticmethod
+    def _pieces(text, size):
+        for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+            while len(sentence) > size:
+                cut = sentence.rfind(" ", 0, size)
+                cut = cut if cut > 0 else size
+                yield sentence[:cut]
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                yield sentence
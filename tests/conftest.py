@@ -0,0 +1,11 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def article_store(tmp_path):
+    """
+    A fresh article cache per test, so tests never touch resources/.
+    """
+    return main.configure_article_store(tmp_path / "cache" / "articles.sqlite3")
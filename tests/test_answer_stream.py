@@ -0,0 +1,114 @@
+"""
+test_answer_stream.py — Streaming answers through QAEngine.stream
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+import pubmed_vectorstore as pv
+from answer_stream import AnswerStream, strip_sources
+from benchmarks.bench_e2e import fresh_components, release_components
+from benchmarks.eutils_server import FIXTURES_DIR
+from benchmarks.fake_llm import FakeChatModel
+from hybrid_retrieval import BM25Index
+from numpy_vectorstore import NumpyVectorStore
+from pubmed import iter_pubmed_articles
+from qa_engine import QAEngine
+
+RESPONSE = "FINAL ANSWER: Fasting improved insulin sensitivity.\nSOURCES: https://pubmed.ncbi.nlm.nih.gov/1/"
+DOCS = [Document(page_content="Title: Fasting", metadata={"source": "https://pubmed.ncbi.nlm.nih.gov/1/"})]
+
+
+def engine(llm):
+    return QAEngine(llm, NumpyVectorStore(DeterministicFakeEmbedding(size=8)), BM25Index())
+
+
+class Chunks:
+    """
+    Iterator over fixed chunks that records how many were consumed and whether it was closed.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self.chunks)
+        self.consumed += 1
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_holds_back_sources_marker():
+    # FakeListChatModel streams one character per chunk, so the marker arrives split
+    llm = FakeListChatModel(responses=[RESPONSE])
+    stream = AnswerStream(engine(llm).stream("fasting?", DOCS), [], None)
+    chunks = list(stream)
+
+    assert "".join(chunks) == strip_sources(RESPONSE) == stream.answer
+    assert not any("SOU" in chunk for chunk in chunks)
+
+
+@pytest.mark.parametrize("chunks", [
+    ["FINAL ANSWER: yes. SOU", "RCES: 1", "never read"],
+    ["FINAL ANSWER: yes. S", "O", "URCES", ": 1", "never read"],
+    ["FINAL ANSWER: yes. QUESTION", ": next", "never read"],
+])
+def test_marker_split_across_chunks(chunks):
+    source = Chunks(chunks)
+    stream = AnswerStream(source, [], None)
+
+    assert "".join(stream) == "FINAL ANSWER: yes. "
+    assert source.consumed == len(chunks) - 1
+    assert source.closed
+
+
+def test_ttft_before_total_time():
+    llm = FakeChatModel(first_token_latency=0.2, token_latency=0.005, answer_tokens=20)
+    stream = AnswerStream(engine(llm).stream("fasting?", DOCS), [], None)
+    first = next(iter(stream))
+
+    assert first and stream.ttft >= 0.2
+    assert stream.total_time is None  # still streaming
+    for _ in stream:
+        pass
+    assert stream.ttft < stream.total_time
+    assert "SOURCES" not in stream.answer
+
+
+@pytest.fixture
+def components(tmp_path):
+    llm = FakeListChatModel(responses=[RESPONSE, "FINAL ANSWER: a second LLM call.\nSOURCES: -"])
+    fresh_components(tmp_path, llm, fake_embeddings=True)
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+    for _ in pv.process_pubmed_articles(articles, namespace="test"):
+        pass
+    yield
+    release_components()
+
+
+def test_complete_stream_writes_answer_cache(components):
+    stream = pv.stream_answer("fasting?", namespace="test")
+    for _ in stream:
+        pass
+    cached = pv.stream_answer("fasting?", namespace="test")
+
+    assert "".join(cached) == stream.answer == strip_sources(RESPONSE)
+    assert cached.sources == stream.sources
+
+
+def test_abandoned_stream_is_not_cached(components):
+    stream = pv.stream_answer("fasting?", namespace="test")
+    next(iter(stream))
+    again = pv.stream_answer("fasting?", namespace="test")
+
+    assert "".join(again) == "FINAL ANSWER: a second LLM call.\n"
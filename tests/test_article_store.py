@@ -0,0 +1,50 @@
+"""
+test_article_store.py — Eviction keeps the article cache bounded
+"""
+
+from article_store import ArticleStore
+from articles import Article
+
+
+def article(pmid):
+    return Article.create(pmid, "Title", {"SUMMARY": "Text"}, "Journal", "Authors", "2020")
+
+
+def stored(store):
+    return {pmid for (pmid,) in store._connect().execute("SELECT pmid FROM articles")}
+
+
+def test_re_put_drops_articles_of_previous_result(tmp_path):
+    store = ArticleStore(tmp_path / "articles.sqlite3")
+    store.put_articles([article("1"), article("2")])
+    store.put_query("q", ["1", "2"])
+    store.put_articles([article("3")])
+    store.put_query("q", ["2", "3"])
+
+    assert stored(store) == {"2", "3"}
+
+
+def test_eviction_sweeps_unreferenced_articles(tmp_path):
+    store = ArticleStore(tmp_path / "articles.sqlite3", max_queries=1, orphan_grace=60)
+    # e.g. fetched by a refresh of a query that was evicted meanwhile
+    store.put_articles([article("old"), article("new")])
+    store._connect().execute("UPDATE articles SET fetched_at = 0 WHERE pmid = 'old'")
+    store._connect().commit()
+    store.put_articles([article("1")])
+    store.put_query("q", ["1"])
+
+    # "new" is within the grace period, e.g. a page of a query still being fetched
+    assert stored(store) == {"1", "new"}
+
+
+def test_expired_queries_are_evicted(tmp_path):
+    store = ArticleStore(tmp_path / "articles.sqlite3", ttl=100)
+    store.put_articles([article("1")])
+    store.put_query("q", ["1"])
+    store._connect().execute("UPDATE queries SET created_at = 0")
+    store._connect().commit()
+    store.put_articles([article("2")])
+    store.put_query("other", ["2"])
+
+    assert store.query_pmids("q") is None
+    assert stored(store) == {"2"}
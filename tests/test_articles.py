@@ -0,0 +1,44 @@
+"""
+test_articles.py — Parsing and encoding articles with unusual fields
+"""
+
+from article_store import ArticleStore
+from articles import NO_JOURNAL, NO_TITLE, NO_YEAR, Article
+from pubmed import iter_pubmed_articles
+
+EFETCH = b"""<?xml version="1.0" ?>
+<PubmedArticleSet>
+<PubmedArticle><MedlineCitation><PMID>1</PMID><Article>
+  <Journal><Title><i>Cell</i> Reports</Title><JournalIssue><PubDate><Year>2021</Year></PubDate></JournalIssue></Journal>
+  <ArticleTitle><i>In vivo</i> effects of fasting on CD4<sup>+</sup> T cells</ArticleTitle>
+  <Abstract><AbstractText>Fasting changed T cells.</AbstractText></Abstract>
+</Article></MedlineCitation></PubmedArticle>
+<PubmedArticle><MedlineCitation><PMID>2</PMID><Article>
+  <Journal><Title/><JournalIssue><PubDate><Year/></PubDate></JournalIssue></Journal>
+  <ArticleTitle/>
+</Article></MedlineCitation></PubmedArticle>
+</PubmedArticleSet>"""
+
+
+def test_inline_markup_and_empty_fields():
+    marked_up, empty = iter_pubmed_articles(EFETCH)
+
+    assert marked_up.title == "In vivo effects of fasting on CD4+ T cells"
+    assert marked_up.journal == "Cell Reports"
+    assert (empty.title, empty.journal, empty.publication_date) == (NO_TITLE, NO_JOURNAL, NO_YEAR)
+
+
+def test_create_normalises_none():
+    article = Article.create("3", None, {"SUMMARY": None}, None, None, None)
+
+    assert Article.from_bytes(article.to_bytes()) == article
+    assert article.abstract == {"SUMMARY": ""}
+
+
+def test_round_trip_through_article_store(tmp_path):
+    articles = list(iter_pubmed_articles(EFETCH))
+    store = ArticleStore(tmp_path / "articles.sqlite3")
+    store.put_articles(articles)
+
+    assert store.get_articles(["1", "2"]) == {article.pmid: article for article in articles}
+    assert [Article.from_bytes(article.to_bytes()) for article in articles] == articles
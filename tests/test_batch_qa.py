@@ -0,0 +1,72 @@
+"""
+test_batch_qa.py — Failed searches, resumed runs and search grouping
+"""
+
+import json
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+import batch_qa
+from benchmarks.bench_e2e import fresh_components, release_components
+from benchmarks.eutils_server import FIXTURES_DIR
+from pubmed import iter_pubmed_articles
+from pubmed_client import TokenBucket
+
+QUESTIONS = [
+    {"id": "1", "question": "Does fasting help?", "search": "fasting"},
+    {"id": "2", "question": "Is fasting safe?", "search": "fasting"},
+    {"id": "3", "question": "Does keto help?", "search": "keto"},
+]
+
+
+@pytest.fixture
+def components(tmp_path):
+    fresh_components(tmp_path, FakeListChatModel(responses=["FINAL ANSWER: yes\nSOURCES: -"]), fake_embeddings=True)
+    yield
+    release_components()
+
+
+def test_failed_search_writes_error_rows(components, tmp_path, monkeypatch):
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+
+    def update_query_cache(search):
+        if search == "keto":
+            raise ConnectionError("PubMed unreachable")
+        return articles
+
+    monkeypatch.setattr(batch_qa, "update_query_cache", update_query_cache)
+    groups = batch_qa.group_by_search(QUESTIONS)
+    fetched = batch_qa.fetch_groups(groups, concurrency=2)
+    assert fetched["keto"][2] == "ConnectionError: PubMed unreachable"
+
+    output = tmp_path / "answers.jsonl"
+    answered, failed = batch_qa.answer_all(
+        groups, fetched, output, 2, TokenBucket(1000), True, batch_qa.ingest(fetched)
+    )
+    records = {record["id"]: record for record in map(json.loads, output.read_text().splitlines())}
+
+    assert (answered, failed) == (3, 1)
+    assert records["3"]["answer"] is None and "PubMed unreachable" in records["3"]["error"]
+    assert records["1"]["error"] is None and records["1"]["answer"]
+    assert records["2"]["error"] is None
+    assert records["3"]["timings"]["answer_s"] is None
+
+
+def test_resume_replaces_failed_rows(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    rows = [{"id": "1", "answer": "yes", "error": None}, {"id": "3", "answer": None, "error": "Search failed"}]
+    output.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    assert batch_qa.done_ids(output) == {"1"}
+    assert [json.loads(line)["id"] for line in output.read_text().splitlines()] == ["1"]
+
+
+def test_only_same_word_searches_share_a_group():
+    groups = batch_qa.group_by_search([
+        {"id": "1", "question": "a", "search": "Fasting and insulin"},
+        {"id": "2", "question": "b", "search": "insulin, fasting"},
+        {"id": "3", "question": "c", "search": "fasting insulin glucose"},
+    ])
+    assert sorted(len(questions) for _, questions in groups.values()) == [1, 2]
@@ -0,0 +1,61 @@
+"""
+test_context_compression.py — Sentence vectors stay out of the persistent embedding cache
+"""
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+import pubmed_vectorstore as pv
+from benchmarks.bench_e2e import fresh_components, release_components
+from benchmarks.eutils_server import FIXTURES_DIR
+from context_compression import ContextCompressor
+from pubmed import iter_pubmed_articles
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+
+DOCS = [
+    Document(page_content="Title: Fasting\n\nAbstract: Fasting lowered insulin. Weight fell. Sleep was unchanged.",
+             metadata={"pmid": "1"}),
+    Document(page_content="Title: Diet\n\nAbstract: Diet changed lipids. Insulin fell.", metadata={"pmid": "2"}),
+]
+
+
+def test_sentence_vectors_cached_in_memory():
+    embeddings = CountingEmbeddings(size=16)
+    compressor = ContextCompressor(embeddings, max_sentences=3)
+
+    first = compressor.compress("insulin?", DOCS)
+    calls = embeddings.calls
+    assert compressor.compress("insulin?", DOCS) == first
+    assert embeddings.calls == calls
+
+
+def test_sentence_cache_is_bounded():
+    compressor = ContextCompressor(CountingEmbeddings(size=16), cache_size=4)
+    compressor.compress("insulin?", DOCS)
+    assert len(compressor._cache) == 4
+
+
+def test_compression_does_not_fill_embedding_cache(tmp_path):
+    fresh_components(tmp_path, FakeListChatModel(responses=["FINAL ANSWER: -\nSOURCES: -"]), fake_embeddings=True)
+    try:
+        with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+            articles = list(iter_pubmed_articles(f))
+        for _ in pv.process_pubmed_articles(articles, namespace="test"):
+            pass
+        assert pv.qa_engine.compressor is not None
+        entries = pv.vector_store.embeddings.stats()["entries"]
+
+        pv.generate_answer("Does fasting improve insulin sensitivity?", namespace="test", use_cache=False)
+        # Only the question itself is added
+        assert pv.vector_store.embeddings.stats()["entries"] == entries + 1
+    finally:
+        release_components()
@@ -0,0 +1,52 @@
+"""
+test_embedding_cache.py — Embedding cache shared by several processes
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from embedding_cache import CachedEmbeddings
+
+MODEL = DeterministicFakeEmbedding(size=16)
+
+
+def expected(texts):
+    return np.asarray(MODEL.embed_documents(texts), dtype=np.float16).astype(np.float32)
+
+
+def embed_random(cache_dir, seed, max_entries):
+    rng = np.random.default_rng(seed)
+    cache = CachedEmbeddings(MODEL, "fake", cache_dir, max_entries=max_entries)
+    for _ in range(100):
+        texts = [f"text {i}" for i in rng.integers(0, 2000, 20)]
+        assert np.allclose(cache.embed_documents(texts), expected(texts))
+
+
+@pytest.mark.parametrize("max_entries", [100_000, 300])
+def test_processes_share_cache(tmp_path, max_entries):
+    processes = [
+        multiprocessing.Process(target=embed_random, args=(tmp_path, seed, max_entries))
+        for seed in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+
+    cache = CachedEmbeddings(MODEL, "fake", tmp_path, max_entries=max_entries)
+    texts = [f"text {i}" for i in range(2000)]
+    assert np.allclose(cache.embed_documents(texts), expected(texts))
+    assert cache.stats()["entries"] <= max_entries
+
+
+def test_sees_rows_of_other_instances(tmp_path):
+    writer = CachedEmbeddings(MODEL, "fake", tmp_path)
+    reader = CachedEmbeddings(MODEL, "fake", tmp_path)
+    writer.embed_documents(["a", "b"])
+
+    assert np.allclose(reader.embed_documents(["a", "b"]), expected(["a", "b"]))
+    assert reader.stats()["hits"] == 2
@@ -0,0 +1,51 @@
+"""
+test_history.py — History-server retrieval against the local E-utilities stand-in
+"""
+
+import math
+
+import pytest
+
+from benchmarks.eutils_server import EUtilsServer
+from pubmed import PubMedRetriever
+from pubmed_client import configure_client
+
+N_ARTICLES = 250
+PAGE_SIZE = 100
+
+
+@pytest.fixture(scope="module")
+def server():
+    with EUtilsServer(N_ARTICLES) as server:
+        configure_client(base_url=server.base_url, api_key=None, rate=1000)
+        yield server
+        configure_client()
+
+
+def test_history_retrieval_pages(server):
+    server.requests.clear()
+    articles = PubMedRetriever.retrieve_pubmed_abstracts("diet", N_ARTICLES, page_size=PAGE_SIZE)
+
+    assert [article["pmid"] for article in articles] == server.pmids
+    assert server.requests["esearch.fcgi"] == 1
+    assert server.requests["efetch.fcgi"] == math.ceil(N_ARTICLES / PAGE_SIZE)
+
+
+def test_history_retrieval_respects_max_results(server):
+    server.requests.clear()
+    articles = PubMedRetriever.retrieve_pubmed_abstracts("diet", 150, page_size=PAGE_SIZE)
+
+    assert [article["pmid"] for article in articles] == server.pmids[:150]
+    assert server.requests["efetch.fcgi"] == 2
+
+
+def test_history_retrieval_matches_id_list(server):
+    history = PubMedRetriever.retrieve_pubmed_abstracts("diet", N_ARTICLES, page_size=PAGE_SIZE)
+
+    server.requests.clear()
+    pmids = PubMedRetriever.search_pubmed_articles("diet", N_ARTICLES)
+    by_id = PubMedRetriever.fetch_pubmed_abstracts(pmids)
+
+    assert pmids == server.pmids
+    assert server.requests["esearch.fcgi"] >= 1
+    assert history == by_id
@@ -0,0 +1,36 @@
+"""
+test_jobs.py — Job reuse, forgetting and separate pools
+"""
+
+import threading
+
+from jobs import DONE, JobManager
+
+
+def wait(job):
+    job.future.result(timeout=5)
+    return job
+
+
+def test_forget_reruns_finished_job():
+    manager = JobManager(max_workers=1)
+    runs = []
+    first = wait(manager.submit("key", lambda job: runs.append(1) or len(runs)))
+    assert manager.submit("key", lambda job: None) is first
+
+    assert manager.forget("key")
+    second = wait(manager.submit("key", lambda job: runs.append(1) or len(runs)))
+    assert (first.result, second.result, second.status) == (1, 2, DONE)
+    manager.shutdown()
+
+
+def test_blocked_pool_does_not_hold_up_default_pool():
+    manager = JobManager(max_workers=1, pools={"ingest": 1})
+    release = threading.Event()
+    blocked = manager.submit("ingest", lambda job: release.wait(5), pool="ingest")
+    answer = wait(manager.submit("answer", lambda job: "answer"))
+
+    assert answer.result == "answer" and not blocked.finished
+    release.set()
+    assert wait(blocked).status == DONE
+    manager.shutdown()
@@ -0,0 +1,56 @@
+"""
+test_namespaces.py — Answers never widen to the whole collection or outlive re-embedded articles
+"""
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+import pubmed_vectorstore as pv
+from benchmarks.bench_e2e import fresh_components, release_components
+from benchmarks.eutils_server import FIXTURES_DIR
+from namespaces import NamespaceEvicted
+from pubmed import iter_pubmed_articles
+
+
+@pytest.fixture
+def components(tmp_path):
+    fresh_components(tmp_path, FakeListChatModel(responses=["FINAL ANSWER: -\nSOURCES: -"]), fake_embeddings=True)
+    with open(FIXTURES_DIR / "efetch_sample.xml", "rb") as f:
+        articles = list(iter_pubmed_articles(f))
+    for _ in pv.process_pubmed_articles(articles[:2], namespace="session"):
+        pass
+    yield articles
+    release_components()
+
+
+@pytest.mark.parametrize("answer", [pv.generate_answer, pv.stream_answer])
+def test_missing_namespace_raises(components, answer):
+    with pytest.raises(NamespaceEvicted):
+        answer("Does fasting help?", namespace="never-ingested")
+    with pytest.raises(NamespaceEvicted):
+        answer("Does fasting help?", namespace="never-ingested", use_cache=False)
+
+
+def test_evicted_namespace_raises(components):
+    pv.generate_answer("Does fasting help?", namespace="session")
+    pv.namespaces.discard("session")
+    with pytest.raises(NamespaceEvicted):
+        pv.generate_answer("Does fasting help?", namespace="session")
+
+
+def test_answers_stay_in_scope(components):
+    for _ in pv.process_pubmed_articles(components[2:], namespace="other"):
+        pass
+    _, sources, _ = pv.generate_answer("Does fasting help?", namespace="session", use_cache=False)
+    in_scope = {f"https://pubmed.ncbi.nlm.nih.gov/{article.pmid}/" for article in components[:2]}
+    assert sources and set(sources) <= in_scope
+
+
+def test_reembedded_shared_article_changes_corpus(components):
+    corpus = pv.namespaces.get("session")["corpus"]
+    changed = components[0].to_dict()
+    changed["title"] = "Revised: " + changed["title"]
+    for _ in pv.process_pubmed_articles([changed], namespace="other"):
+        pass
+    assert pv.namespaces.get("session")["corpus"] == pv.corpus_version(pv.namespaces.get("session")["pmids"])
+    assert pv.namespaces.get("session")["corpus"] != corpus
@@ -0,0 +1,20 @@
+"""
+test_pipeline.py — Stage threads see the caller's metrics span
+"""
+
+import metrics
+from pipeline import Pipeline
+
+
+def test_stages_run_in_callers_context():
+    parents = []
+
+    def stage(item):
+        parents.append(metrics._current_span.get())
+        return item
+
+    with metrics.Span("ingest", ()):
+        results = [result for name, result in Pipeline(range(3), [("chunk", stage)]).run() if name == "chunk"]
+
+    assert results == [0, 1, 2]
+    assert parents == ["ingest"] * 3